@@ -1,6 +1,10 @@
 # backtest_es_csv.py
+import argparse
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from market_data import SYMBOL_COL, check_single_symbol, load_ohlcv, source_zone
+from streaming_indicators import SMA, RollingMax, RollingMin, WilderRSI
 
 CSV_PATH = "ES_F_1m_7jours_16h_17h30_FR.csv"  # ton fichier téléchargé
 SHORT_MA = 20
@@ -55,13 +59,159 @@ def decide(mkt):
 
     return "HOLD", "neutral"
 
-def main():
-    path = Path(CSV_PATH)
+# Codes des signaux / raisons pour la version vectorisée de decide()
+HOLD, BUY, SELL = 0, 1, -1
+SIGNAL_NAMES = {BUY: "BUY", SELL: "SELL", HOLD: "HOLD"}
+REASONS = np.array(["neutral", "breakout_up", "breakout_down", "ma_crossover_up",
+                    "ma_crossover_down", "rsi_oversold", "rsi_overbought"], dtype=object)
+
+def decide_arrays(price, res, sup, sma, lma, r):
+    """
+    decide() évaluée sur des colonnes entières (tableaux NumPy), mêmes priorités.
+    Retourne (signal, reason) : signal en codes BUY/SELL/HOLD, reason en index de REASONS.
+    Les NaN font échouer les comparaisons, comme dans decide().
+    """
+    conds = [price > res, price < sup, sma > lma, sma < lma, r < 30, r > 70]
+    signal = np.select(conds, [BUY, SELL, BUY, SELL, BUY, SELL], default=HOLD)
+    reason = np.select(conds, [1, 2, 3, 4, 5, 6], default=0)
+    return signal, reason
+
+def next_index(mask):
+    """nxt[i] = plus petit j >= i avec mask[j] (len(mask) si aucun)."""
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1]
+
+def run_positions(signal, start_idx, stop_idx, position=None):
+    """
+    Machine à états des positions (une à la fois) sur le tableau de signaux, bougies [start_idx, stop_idx).
+    Entrée au close du signal ; sortie sur signal opposé ou après MAX_HOLD_BARS barres,
+    exécutée au close suivant. Saute directement d'un évènement au suivant.
+    position : (index d'entrée, côté) d'une position déjà ouverte avant start_idx (index < start_idx).
+    Retourne (entrées, sorties, côtés, raisons, position encore ouverte à stop_idx ou None).
+    """
+    next_signal = next_index(signal != HOLD)
+    next_opposite = {BUY: next_index(signal == SELL), SELL: next_index(signal == BUY)}
+
+    entries, exits, sides, reasons = [], [], [], []
+    i = start_idx
+    while i < stop_idx:
+        if position is None:
+            e = next_signal[i]
+            if e >= stop_idx:
+                break
+            position = (e, signal[e])
+        e, side = position
+        opp = next_opposite[side][max(e + 1, start_idx)]  # <= stop_idx < n
+        x = min(opp, e + MAX_HOLD_BARS)
+        if x >= stop_idx:
+            break  # position encore ouverte en fin de données
+        entries.append(e)
+        exits.append(x)
+        sides.append(side)
+        reasons.append("opposite_signal" if x == opp else "time_exit")
+        position = None
+        i = x  # on peut ré-entrer sur la bougie de sortie
+    return (np.array(entries, dtype=np.int64), np.array(exits, dtype=np.int64),
+            np.array(sides, dtype=np.int64), reasons, position)
+
+class ChunkIndicators:
+    """
+    Colonnes de main() (short_ma, long_ma, rsi, resistance, support) bloc par bloc, pour le
+    mode --chunksize : indicateurs de streaming_indicators, état porté d'un bloc à l'autre,
+    résultats identiques bit à bit au calcul en mémoire.
+    """
+
+    def __init__(self):
+        self.short_ma = SMA(SHORT_MA)
+        self.long_ma = SMA(LONG_MA)
+        self.rsi = WilderRSI(RSI_PERIOD, zero=1e-12)
+        self.res = RollingMax(ROLL_WINDOW)
+        self.sup = RollingMin(ROLL_WINDOW)
+        self.prev_res = self.prev_sup = np.nan   # pour le shift(1)
+
+    def update(self, high, low, close):
+        res = self.res.update_many(high)
+        sup = self.sup.update_many(low)
+        out = {
+            "short_ma": self.short_ma.update_many(close),
+            "long_ma": self.long_ma.update_many(close),
+            "rsi": self.rsi.update_many(close),
+            "resistance": np.r_[self.prev_res, res[:-1]],
+            "support": np.r_[self.prev_sup, sup[:-1]],
+        }
+        if len(close):
+            self.prev_res, self.prev_sup = res[-1], sup[-1]
+        return out
+
+TRADES_CSV = "backtest_es_trades.csv"
+EQUITY_CSV = "backtest_es_equity.csv"
+
+def book_trades(close, timestamps, start_idx, stop_idx, entries, exits, sides, exit_reasons,
+                cum=(0.0, 0.0), carried=None):
+    """
+    Trades + courbe d'equity des bougies [start_idx, stop_idx) à partir de run_positions().
+    cum : PnL cumulé (points, $) avant start_idx ; carried : (prix, heure) d'entrée d'une
+    position ouverte avant le bloc (son index d'entrée est alors négatif).
+    Retourne (trades, equity, cum) ; trades / equity vides = [] (comme pd.DataFrame([])).
+    """
+    idx = np.maximum(entries, 0)
+    entry_price = close[idx]
+    entry_time = timestamps[idx]
+    if len(entries) and entries[0] < 0:
+        entry_time = entry_time.copy()
+        entry_price[0], entry_time[0] = carried
+    next_close = close[exits + 1]  # exécution au close suivant
+    pnl_points = np.where(sides == BUY, next_close - entry_price, entry_price - next_close)
+    pnl_dollars = pnl_points * POINT_VALUE * CONTRACTS
+
+    trades = []
+    if len(entries):
+        trades = {
+            "entry_time": entry_time,
+            "exit_time": timestamps[exits + 1],
+            "side": np.where(sides == BUY, "LONG", "SHORT"),
+            "entry_price": entry_price,
+            "exit_price": next_close,
+            "pnl_points": pnl_points,
+            "pnl_dollars": pnl_dollars,
+            "exit_reason": exit_reasons,
+            "bars_held": exits - entries
+        }
+
+    # PnL cumulé par bougie : le PnL d'un trade est compté sur sa bougie de sortie
+    equity = []
+    if stop_idx > start_idx:
+        bar_pts = np.zeros(len(close))
+        bar_usd = np.zeros(len(close))
+        bar_pts[exits] = pnl_points
+        bar_usd[exits] = pnl_dollars
+        equity = {
+            "timestamp": timestamps[start_idx:stop_idx],
+            "cum_pnl_points": np.cumsum(np.r_[cum[0], bar_pts[start_idx:stop_idx]])[1:],
+            "cum_pnl_dollars": np.cumsum(np.r_[cum[1], bar_usd[start_idx:stop_idx]])[1:]
+        }
+        cum = (equity["cum_pnl_points"][-1], equity["cum_pnl_dollars"][-1])
+    return trades, equity, cum
+
+def report(total, wins, cum):
+    if total:
+        winrate = 100.0 * wins / total
+        print(f"📊 Trades: {total} | ✅ Gains: {wins} | Win rate: {winrate:.1f}%")
+        print(f"💰 PnL cumulé: {cum[0]:.2f} pts  (~${cum[1]:.2f})  "
+              f"avec {CONTRACTS} contrat(s), {POINT_VALUE}$/pt")
+    else:
+        print("⚠️ Aucun trade généré (fenêtre trop courte ou règles trop strictes).")
+    print(f"📝 Détails des trades -> {TRADES_CSV}")
+    print(f"📈 Courbe d’equity -> {EQUITY_CSV}")
+
+def main(csv_path=CSV_PATH):
+    path = Path(csv_path)
     if not path.exists():
         print(f"❌ Fichier introuvable: {path.resolve()}")
         return
 
-    df = pd.read_csv(path, parse_dates=["timestamp"])
+    df = load_ohlcv(path)
     # On s’assure des colonnes attendues
     needed = {"timestamp","open","high","low","close","volume"}
     if not needed.issubset(set(map(str.lower, df.columns))):
@@ -81,105 +231,150 @@ def main():
     # On démarre après le “warm-up” des indicateurs
     start_idx = max(SHORT_MA, LONG_MA, RSI_PERIOD, ROLL_WINDOW) + 1
 
-    position = None   # None / "LONG" / "SHORT"
-    entry_price = None
-    entry_time = None
-    bars_held = 0
-
-    trades = []
-    equity = []
-    cum_pnl_points = 0.0
-    cum_pnl_dollars = 0.0
-
-    for i in range(start_idx, len(df)-1):  # -1 pour disposer du "next close"
-        row = df.iloc[i]
-        ts = row["timestamp"]
-        price = row["close"]
-        mkt = {
-            "price": price,
-            "resistance": row["resistance"],
-            "support": row["support"],
-            "short_ma": row["short_ma"],
-            "long_ma": row["long_ma"],
-            "rsi": row["rsi"]
-        }
-        signal, reason = decide(mkt)
-
-        exit_now = False
-        exit_reason = None
-
-        # Si en position, on regarde sortie
-        if position is not None:
-            bars_held += 1
-            # Opposite signal -> sortie
-            if (position == "LONG" and signal == "SELL") or (position == "SHORT" and signal == "BUY"):
-                exit_now = True
-                exit_reason = "opposite_signal"
-            # Ou temps max en barres
-            elif bars_held >= MAX_HOLD_BARS:
-                exit_now = True
-                exit_reason = "time_exit"
-
-            if exit_now:
-                next_close = df.iloc[i+1]["close"]  # exécution au close suivant
-                if position == "LONG":
-                    pnl_points = (next_close - entry_price)
-                else:
-                    pnl_points = (entry_price - next_close)
-                pnl_dollars = pnl_points * POINT_VALUE * CONTRACTS
-                cum_pnl_points += pnl_points
-                cum_pnl_dollars += pnl_dollars
-
-                trades.append({
-                    "entry_time": entry_time,
-                    "exit_time": df.iloc[i+1]["timestamp"],
-                    "side": position,
-                    "entry_price": entry_price,
-                    "exit_price": next_close,
-                    "pnl_points": pnl_points,
-                    "pnl_dollars": pnl_dollars,
-                    "exit_reason": exit_reason,
-                    "bars_held": bars_held
-                })
-
-                position = None
-                entry_price = None
-                entry_time = None
-                bars_held = 0
-
-        # Si pas en position, on peut entrer
-        if position is None and signal in ("BUY", "SELL"):
-            position = "LONG" if signal == "BUY" else "SHORT"
-            entry_price = price
-            entry_time = ts
-            bars_held = 0
-
-        equity.append({
-            "timestamp": ts,
-            "cum_pnl_points": cum_pnl_points,
-            "cum_pnl_dollars": cum_pnl_dollars
-        })
+    # Signaux sur toutes les bougies d'un coup, puis machine à états sur les tableaux
+    signal, _ = decide_arrays(
+        df["close"].to_numpy(), df["resistance"].to_numpy(), df["support"].to_numpy(),
+        df["short_ma"].to_numpy(), df["long_ma"].to_numpy(), df["rsi"].to_numpy()
+    )
+    stop_idx = len(df) - 1  # -1 pour disposer du "next close"
+    entries, exits, sides, exit_reasons, _ = run_positions(signal, start_idx, stop_idx)
+    trades, equity, cum = book_trades(df["close"].to_numpy(), df["timestamp"].array,
+                                      start_idx, stop_idx, entries, exits, sides, exit_reasons)
 
     # Résultats
     trades_df = pd.DataFrame(trades)
     equity_df = pd.DataFrame(equity)
+    trades_df.to_csv(TRADES_CSV, index=False)
+    equity_df.to_csv(EQUITY_CSV, index=False)
+    wins = (trades_df["pnl_dollars"] > 0).sum() if not trades_df.empty else 0
+    report(len(trades_df), wins, cum)
 
-    if not trades_df.empty:
-        wins = (trades_df["pnl_dollars"] > 0).sum()
-        total = len(trades_df)
-        winrate = 100.0 * wins / total
-        print(f"📊 Trades: {total} | ✅ Gains: {wins} | Win rate: {winrate:.1f}%")
-        print(f"💰 PnL cumulé: {cum_pnl_points:.2f} pts  (~${cum_pnl_dollars:.2f})  "
-              f"avec {CONTRACTS} contrat(s), {POINT_VALUE}$/pt")
-    else:
-        print("⚠️ Aucun trade généré (fenêtre trop courte ou règles trop strictes).")
+def timestamp_parser(path, ts_col, chunksize):
+    """
+    1er passage sur la seule colonne timestamp : choisit le même parse que load_ohlcv()
+    pour tout le fichier (naïf, offset fixe, fuseau d'origine ou UTC si offsets mixtes).
+    Retourne aussi le date_format des CSV : pandas écrit un bloc naïf tombant pile à minuit
+    en "YYYY-MM-DD" ; on fixe le format quand le fichier entier n'est pas journalier.
+    """
+    offsets = set()
+    zones = set()
+    dates_only = True
+    for chunk in pd.read_csv(path, usecols=[ts_col], chunksize=chunksize):
+        try:
+            ts = pd.to_datetime(chunk[ts_col])
+            offsets.add(str(getattr(ts.dt, "tz", None)))
+            dates_only = dates_only and bool((ts == ts.dt.normalize()).all())
+        except ValueError:
+            offsets.add("mixed")
+        # fuseau qui redonne les offsets du bloc (comme load_ohlcv sur le fichier entier)
+        zones.add(source_zone(chunk[ts_col], pd.to_datetime(chunk[ts_col], utc=True))[1])
+    utc = len(offsets) > 1 or "mixed" in offsets
+    zone = zones.pop() if utc and len(zones) == 1 and None not in zones else None
+    naive = offsets == {"None"}
+    date_format = "%Y-%m-%d %H:%M:%S" if naive and not dates_only else None
+    if zone:
+        return (lambda col: pd.to_datetime(col, utc=True).dt.tz_convert(zone)), date_format
+    return (lambda col: pd.to_datetime(col, utc=utc)), date_format
 
-    trades_csv = "backtest_es_trades.csv"
-    equity_csv = "backtest_es_equity.csv"
-    trades_df.to_csv(trades_csv, index=False)
-    equity_df.to_csv(equity_csv, index=False)
-    print(f"📝 Détails des trades -> {trades_csv}")
-    print(f"📈 Courbe d’equity -> {equity_csv}")
+def main_chunked(csv_path=CSV_PATH, chunksize=100_000):
+    """
+    Même backtest que main(), en lisant le CSV par blocs de `chunksize` lignes : indicateurs
+    (ChunkIndicators) et position portés d'un bloc à l'autre, trades / equity ajoutés aux CSV
+    au fil de l'eau. Mémoire bornée par la taille de bloc ; résultats identiques à main().
+    CSV uniquement : une série du store (dossier, déjà lue par memmap) passe par main().
+    Les backtests alt (grille de paramètres sur tout l'historique) et risk (fenêtre de 1h30
+    par séance) n'ont pas de mode par blocs.
+    """
+    path = Path(csv_path)
+    if not path.exists():
+        print(f"❌ Fichier introuvable: {path.resolve()}")
+        return
+    if path.is_dir():
+        print(f"❌ --chunksize : CSV uniquement, {path} est un dossier (série du store : lancer sans --chunksize)")
+        return
+    header = pd.read_csv(path, nrows=0).columns
+    names = {c.lower(): c for c in header}
+    needed = {"timestamp","open","high","low","close","volume"}
+    if not needed.issubset(names):
+        print("❌ Le CSV doit contenir: timestamp, open, high, low, close, volume")
+        return
+
+    if SYMBOL_COL in names:
+        # CSV fusionné (market_merge) : refusé comme par load_ohlcv() dans main()
+        seen = pd.concat(chunk.drop_duplicates() for chunk in
+                         pd.read_csv(path, usecols=[names[SYMBOL_COL]], chunksize=chunksize))
+        try:
+            check_single_symbol(seen, path)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+    usecols = [names[c] for c in ("timestamp", "high", "low", "close")]
+    parse_ts, date_format = timestamp_parser(path, names["timestamp"], chunksize)
+    start_idx = max(SHORT_MA, LONG_MA, RSI_PERIOD, ROLL_WINDOW) + 1
+    indicators = ChunkIndicators()
+
+    # Dernière bougie du bloc précédent : traitée au bloc suivant (il lui faut le "next close")
+    carry_ts, carry_close, carry_signal = None, np.empty(0), np.empty(0, dtype=np.int64)
+    g0 = 0                 # index global de la 1re bougie du tampon
+    position = None        # (index global d'entrée, côté, prix, heure)
+    cum = (0.0, 0.0)
+    total = wins = 0
+    wrote_trades = wrote_equity = False
+
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize):
+        chunk.columns = [c.lower() for c in chunk.columns]
+        close_new = chunk["close"].to_numpy(dtype=np.float64)
+        ind = indicators.update(chunk["high"].to_numpy(dtype=np.float64),
+                                chunk["low"].to_numpy(dtype=np.float64), close_new)
+        signal_new, _ = decide_arrays(close_new, ind["resistance"], ind["support"],
+                                      ind["short_ma"], ind["long_ma"], ind["rsi"])
+
+        ts_new = parse_ts(chunk["timestamp"]).reset_index(drop=True)
+        ts = ts_new if carry_ts is None else pd.concat([carry_ts, ts_new], ignore_index=True)
+        close = np.r_[carry_close, close_new]
+        signal = np.r_[carry_signal, signal_new]
+
+        lo = max(0, start_idx - g0)
+        stop = len(close) - 1
+        if lo < stop:
+            pos_rel = None if position is None else (position[0] - g0, position[1])
+            entries, exits, sides, exit_reasons, pos_out = run_positions(signal, lo, stop, pos_rel)
+            carried = None if position is None else position[2:]
+            trades, equity, cum = book_trades(close, ts.array, lo, stop, entries, exits, sides,
+                                              exit_reasons, cum, carried)
+            if pos_out is None:
+                position = None
+            elif position is None or pos_out[0] >= 0:
+                position = (g0 + pos_out[0], pos_out[1], close[pos_out[0]], ts.iat[pos_out[0]])
+            if len(entries):
+                trades_df = pd.DataFrame(trades)
+                trades_df.to_csv(TRADES_CSV, index=False, mode="a" if wrote_trades else "w",
+                                 header=not wrote_trades, date_format=date_format)
+                wrote_trades = True
+                total += len(trades_df)
+                wins += int((trades_df["pnl_dollars"] > 0).sum())
+            pd.DataFrame(equity).to_csv(EQUITY_CSV, index=False, mode="a" if wrote_equity else "w",
+                                        header=not wrote_equity, date_format=date_format)
+            wrote_equity = True
+
+        carry_ts, carry_close, carry_signal = ts.iloc[-1:], close[-1:], signal[-1:]
+        g0 += len(close) - 1
+
+    # Aucun trade / aucune bougie après le warm-up : mêmes fichiers que main()
+    if not wrote_trades:
+        pd.DataFrame([]).to_csv(TRADES_CSV, index=False)
+    if not wrote_equity:
+        pd.DataFrame([]).to_csv(EQUITY_CSV, index=False)
+    report(total, wins, cum)
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("csv", nargs="?", default=CSV_PATH)
+    ap.add_argument("--chunksize", type=int, default=0,
+                    help="Lecture du CSV par blocs de N lignes (mémoire bornée, gros fichiers) ; "
+                         "0 = tout en mémoire (seul mode pour une série du store)")
+    args = ap.parse_args()
+    if args.chunksize > 0:
+        main_chunked(args.csv, args.chunksize)
+    else:
+        main(args.csv)
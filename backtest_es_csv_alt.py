@@ -2,12 +2,41 @@
 # Bouton B (agressif) : 3 stratégies + grid search léger + money management agressif
 
 import argparse
+import os
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from itertools import product
+from multiprocessing import shared_memory
+from market_data import load_ohlcv
 
 POINT_VALUE = {"MES": 5.0, "ES": 50.0}
 
+class SweepCache:
+    """
+    Cache clé -> série (indicateurs, signaux) valable le temps d'un balayage sur UN df.
+    Chaque série distincte n'est calculée qu'une fois ; hits/misses comptent les accès.
+    """
+    def __init__(self):
+        self._store = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        if key in self._store:
+            self.hits += 1
+            return self._store[key]
+        self.misses += 1
+        value = self._store[key] = compute()
+        return value
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._store)}
+
+def cached(cache, key, compute):
+    """Passe par le cache s'il y en a un, sinon calcule directement."""
+    return compute() if cache is None else cache.get(key, compute)
+
 def ema(series, period):
     return series.ewm(span=period, adjust=False).mean()
 
@@ -17,9 +46,9 @@ def atr(df, period=14):
     tr = pd.concat([(h - l), (h - prev_c).abs(), (l - prev_c).abs()], axis=1).max(axis=1)
     return tr.rolling(period).mean()
 
-def strategy_ema_crossover(df, fast=8, slow=21):
-    f = ema(df["close"], fast)
-    s = ema(df["close"], slow)
+def strategy_ema_crossover(df, fast=8, slow=21, cache=None):
+    f = cached(cache, ("ema", fast), lambda: ema(df["close"], fast))
+    s = cached(cache, ("ema", slow), lambda: ema(df["close"], slow))
     sig = pd.Series(0, index=df.index)
     sig[(f > s) & (f.shift(1) <= s.shift(1))] = 1   # buy cross up
     sig[(f < s) & (f.shift(1) >= s.shift(1))] = -1  # sell cross down
@@ -54,9 +83,227 @@ def strategy_pullback(df, impulse_look=10, retrace=0.5):
     sig[cond_short] = -1
     return sig.rename("pb")
 
+# Codes de sortie du noyau tableau (0 = pas de sortie)
+EXIT_REASONS = np.array(["", "SL", "TP"], dtype=object)
+
+# Une ligne par trade clôturé ; "bar" = index de la bougie de sortie
+TRADE_DTYPE = np.dtype([
+    ("bar", np.int64), ("direction", np.int8), ("entry", np.float64), ("exit", np.float64),
+    ("pnl_pts", np.float64), ("pnl_usd", np.float64), ("fees", np.float64), ("reason", np.int8),
+])
+
+def aggregate_signals(signals, index):
+    """Priorité EMA > Breakout > Pullback le même bar -> tableau int64 (NaN = 0)."""
+    agg = pd.Series(0, index=index)
+    for col in ["ema_x", "brk", "pb"]:
+        if col in signals.columns:
+            agg = agg.where(agg != 0, signals[col])
+    return agg.fillna(0).to_numpy(dtype=np.int64)
+
+def simulate_arrays(o, h, l, c, a, sig, atr_mult_sl=1.5, rr_target=1.5, trail_mult=1.0,
+                    contracts=5, pv=5.0, fee_per_contract=1.0):
+    """
+    Noyau de simulation sur tableaux NumPy contigus (open/high/low/close/atr/signal).
+    Mêmes règles SL/TP/trailing que simulate_pandas().
+    Retourne (eq, trades, equity) : trades = tableau TRADE_DTYPE (tronqué au nb de trades),
+    equity = tableau float64 d'une valeur par bougie. Les deux sont préalloués.
+    """
+    n = len(c)
+    trades = np.empty(n, dtype=TRADE_DTYPE)
+    equity = np.empty(n, dtype=np.float64)
+    # Boucle sur des floats Python : bien plus rapide que l'indexation scalaire NumPy
+    h, l, c, a, sig = (np.ascontiguousarray(x).tolist() for x in (h, l, c, a, sig))
+    fees = fee_per_contract * contracts * 2  # aller/retour
+
+    direction = 0
+    entry = sl = tp = 0.0
+    eq = 0.0
+    k = 0
+
+    for i in range(n):
+        hi, lo, cl, at = h[i], l[i], c[i], a[i]
+
+        if direction != 0:
+            # Trailing (at == at <=> ATR non NaN)
+            if at == at:
+                if direction == 1:
+                    sl = max(sl, cl - trail_mult * at)
+                else:
+                    sl = min(sl, cl + trail_mult * at)
+
+            reason = 0
+            if direction == 1:
+                if lo <= sl:
+                    exit_price, reason = sl, 1
+                elif hi >= tp:
+                    exit_price, reason = tp, 2
+            else:
+                if hi >= sl:
+                    exit_price, reason = sl, 1
+                elif lo <= tp:
+                    exit_price, reason = tp, 2
+
+            if reason:
+                pnl_pts = (exit_price - entry) * direction
+                pnl_usd = pnl_pts * pv * contracts
+                eq += (pnl_usd - fees)
+                trades[k] = (i, direction, entry, exit_price, pnl_pts, pnl_usd, fees, reason)
+                k += 1
+                direction = 0
+
+        # Entrée à close si signal et ATR valide (at > 0 est faux pour NaN)
+        if direction == 0 and sig[i] != 0 and at > 0:
+            direction = sig[i]
+            entry = cl
+            risk_pts = atr_mult_sl * at
+            sl = entry - risk_pts if direction == 1 else entry + risk_pts
+            tp = entry + rr_target * risk_pts if direction == 1 else entry - rr_target * risk_pts
+
+        equity[i] = eq
+
+    return eq, trades[:k], equity
+
 def simulate(df, signals, atr_mult_sl=1.5, rr_target=1.5, trail_mult=1.0,
+             contracts=5, symbol="MES", fee_per_contract=1.0, cache=None):
+    """
+    Exécute un seul trade à la fois. Entrée à close du signal.
+    SL = ATR*atr_mult_sl, TP = RR*SL ; Trailing au fur et à mesure (trail_mult*ATR courant).
+    Même interface et mêmes résultats que simulate_pandas(), via le noyau simulate_arrays().
+    `cache` (SweepCache) évite de recalculer l'ATR à chaque appel d'un balayage.
+    """
+    pv = POINT_VALUE.get(symbol.upper(), 5.0)
+    sig = aggregate_signals(signals, df.index)
+    eq, tr, eq_curve = simulate_arrays(
+        df["open"].to_numpy(dtype=np.float64), df["high"].to_numpy(dtype=np.float64),
+        df["low"].to_numpy(dtype=np.float64), df["close"].to_numpy(dtype=np.float64),
+        cached(cache, ("atr", 14), lambda: atr(df, 14).to_numpy(dtype=np.float64)), sig,
+        atr_mult_sl=atr_mult_sl, rr_target=rr_target, trail_mult=trail_mult,
+        contracts=contracts, pv=pv, fee_per_contract=fee_per_contract
+    )
+    return summarize(df.index, eq, tr, eq_curve)
+
+def summarize(index, eq, tr, eq_curve):
+    """Convertit les tableaux du noyau en (eq, winrate, total, trades_df, equity_df)."""
+    if len(tr):
+        trades = pd.DataFrame({
+            "timestamp": index.take(tr["bar"]),
+            "direction": tr["direction"].astype(np.int64),
+            "entry": tr["entry"], "exit": tr["exit"],
+            "pnl_pts": tr["pnl_pts"], "pnl_usd": tr["pnl_usd"], "fees": tr["fees"],
+            "exit_reason": EXIT_REASONS[tr["reason"]],
+        })
+    else:
+        trades = pd.DataFrame([], columns=["timestamp","direction","entry","exit","pnl_pts","pnl_usd","fees","exit_reason"])
+    equity = pd.DataFrame({"timestamp": index, "equity": eq_curve})
+    winrate, total = trade_stats(tr)
+    return eq, winrate, total, trades, equity
+
+def trade_stats(tr):
+    """(winrate, total) d'un tableau TRADE_DTYPE, sans passer par un DataFrame."""
+    wins = (tr["pnl_usd"] > 0).sum()
+    total = len(tr)
+    winrate = 100.0 * wins / total if total > 0 else 0.0
+    return winrate, total
+
+# Trades du simulateur par lots : "combo" = colonne (jeu de paramètres) du trade
+BATCH_TRADE_DTYPE = np.dtype(TRADE_DTYPE.descr + [("combo", np.int64)])
+
+def simulate_batch(o, h, l, c, a, sig, atr_mult_sl, rr_target, trail_mult,
+                   contracts=5, pv=5.0, fee_per_contract=1.0):
+    """
+    Simule K jeux de paramètres en parallèle, bar par bar (mêmes règles que simulate_arrays()).
+    L'état (position, entrée, SL, TP, equity) est un vecteur de K colonnes : le coût par bougie
+    est payé une fois pour les K combinaisons.
+    sig : tableau (n,) commun ou (n, K) ; atr_mult_sl / rr_target / trail_mult : tableaux (K,).
+    Retourne (eq, trades) : eq (K,) et trades BATCH_TRADE_DTYPE triés par bougie de sortie.
+    """
+    am = np.asarray(atr_mult_sl, dtype=np.float64)
+    rr = np.asarray(rr_target, dtype=np.float64)
+    tm = np.asarray(trail_mult, dtype=np.float64)
+    k = len(am)
+    sig = np.asarray(sig, dtype=np.int64)
+    if sig.ndim == 1:
+        sig = np.broadcast_to(sig[:, None], (len(sig), k))
+    # Bougies où au moins une colonne peut entrer (signal et ATR > 0)
+    can_enter = (sig != 0).any(axis=1) & (np.nan_to_num(np.asarray(a, dtype=np.float64)) > 0)
+    h, l, c, a, can_enter = (np.ascontiguousarray(x).tolist() for x in (h, l, c, a, can_enter))
+    fees = fee_per_contract * contracts * 2  # aller/retour
+
+    # Les shorts sont stockés "en miroir" (prix négés) : SL/TP/trailing suivent alors
+    # les règles du long pour toutes les colonnes. La négation est exacte en float64.
+    d = np.zeros(k)                      # +1 long, -1 short, 0 à plat
+    is_open = np.zeros(k, dtype=bool)
+    is_long = np.zeros(k, dtype=bool)
+    entry = np.zeros(k)
+    sl = np.zeros(k)                     # SL signé (d * SL)
+    tp = np.zeros(k)                     # TP signé (d * TP)
+    eq = np.zeros(k)
+    n_open = 0
+    exits = []
+
+    for i in range(len(c)):
+        hi, lo, cl, at = h[i], l[i], c[i], a[i]
+
+        if n_open:
+            if at == at:
+                # trailing : max(SL, c - m*ATR) pour un long, min(SL, c + m*ATR) pour un short
+                np.maximum(sl, d * cl - tm * at, out=sl, where=is_open)
+            sl_hit = (np.where(is_long, lo, -hi) <= sl) & is_open
+            tp_hit = (np.where(is_long, hi, -lo) >= tp) & is_open
+            out = np.flatnonzero(sl_hit | tp_hit)
+            if len(out):
+                on_sl = sl_hit[out]
+                dd = d[out]
+                exit_price = np.where(on_sl, sl[out], tp[out]) * dd
+                pnl_pts = (exit_price - entry[out]) * dd
+                pnl_usd = pnl_pts * pv * contracts
+                eq[out] += (pnl_usd - fees)
+                exits.append((i, out, dd, entry[out], exit_price, pnl_pts, pnl_usd, on_sl))
+                d[out] = 0.0
+                is_open[out] = False
+                n_open -= len(out)
+
+        if can_enter[i]:
+            new = np.flatnonzero(~is_open & (sig[i] != 0))
+            if len(new):
+                dd = sig[i][new].astype(np.float64)
+                risk_pts = am[new] * at
+                d[new] = dd
+                is_open[new] = True
+                is_long[new] = dd > 0
+                entry[new] = cl
+                sl[new] = dd * cl - risk_pts          # long: c - risque ; short: -(c + risque)
+                tp[new] = dd * cl + rr[new] * risk_pts
+                n_open += len(new)
+
+    trades = np.empty(sum(len(e[1]) for e in exits), dtype=BATCH_TRADE_DTYPE)
+    pos = 0
+    for i, out, dd, ent, exit_price, pnl_pts, pnl_usd, on_sl in exits:
+        rec = trades[pos:pos + len(out)]
+        rec["bar"] = i
+        rec["direction"] = dd
+        rec["entry"] = ent
+        rec["exit"] = exit_price
+        rec["pnl_pts"] = pnl_pts
+        rec["pnl_usd"] = pnl_usd
+        rec["fees"] = fees
+        rec["reason"] = np.where(on_sl, 1, 2)
+        rec["combo"] = out
+        pos += len(out)
+    return eq, trades
+
+def batch_stats(eq, trades):
+    """Scores (eq, winrate, nb trades) par colonne, identiques à trade_stats() colonne par colonne."""
+    k = len(eq)
+    total = np.bincount(trades["combo"], minlength=k)
+    wins = np.bincount(trades["combo"][trades["pnl_usd"] > 0], minlength=k)
+    return [(float(eq[j]), 100.0 * wins[j] / total[j] if total[j] > 0 else 0.0, int(total[j]))
+            for j in range(k)]
+
+def simulate_pandas(df, signals, atr_mult_sl=1.5, rr_target=1.5, trail_mult=1.0,
              contracts=5, symbol="MES", fee_per_contract=1.0):
     """
+    Implémentation de référence (pandas, bar par bar) : conservée pour valider simulate().
     Exécute un seul trade à la fois. Entrée à close du signal.
     SL = ATR*atr_mult_sl, TP = RR*SL ; Trailing au fur et à mesure (trail_mult*ATR courant).
     """
@@ -142,48 +389,153 @@ def simulate(df, signals, atr_mult_sl=1.5, rr_target=1.5, trail_mult=1.0,
     winrate = 100.0 * wins / total if total > 0 else 0.0
     return eq, winrate, total, trades, equity
 
-def run_grid(df, contracts, symbol):
-    # Grille légère de paramètres
+OHLC_COLS = ["open", "high", "low", "close"]
+
+def grid():
+    """Grille légère de paramètres -> (combinaisons signal (f, s, lb), combinaisons risque (am, rr, tr))."""
     ema_fast_list = [8, 12]
     ema_slow_list = [21, 26]
     brk_look_list = [10, 20]
     atr_mult_list = [1.2, 1.5, 2.0]
     rr_list = [1.2, 1.5, 2.0]
     trail_list = [0.5, 1.0]
+    return (list(product(ema_fast_list, ema_slow_list, brk_look_list)),
+            list(product(atr_mult_list, rr_list, trail_list)))
+
+def combo_signal(df, cache, f, s, lb):
+    """Signal agrégé (tableau int64) d'une combinaison (fast, slow, lookback), mémoïsé dans `cache`."""
+    return cache.get(("signal", f, s, lb), lambda: aggregate_signals(pd.concat([
+        cache.get(("ema_x", f, s), lambda: strategy_ema_crossover(df, f, s, cache=cache)),
+        cache.get(("brk", lb, 0.0), lambda: strategy_breakout_range(df, lb, buffer=0.0)),
+        cache.get(("pb", 10, 0.5), lambda: strategy_pullback(df, impulse_look=10, retrace=0.5)),
+    ], axis=1), df.index))
+
+def combo_arrays(df, cache, sig_key, risk, contracts, pv):
+    """Simule une combinaison complète -> (eq, trades, equity) du noyau."""
+    o, h, l, c = cache.get(("ohlc",), lambda: tuple(df[col].to_numpy(dtype=np.float64) for col in OHLC_COLS))
+    a = cache.get(("atr", 14), lambda: atr(df, 14).to_numpy(dtype=np.float64))
+    am, rr, tr = risk
+    return simulate_arrays(
+        o, h, l, c, a, combo_signal(df, cache, *sig_key),
+        atr_mult_sl=am, rr_target=rr, trail_mult=tr,
+        contracts=contracts, pv=pv
+    )
+
+def sweep_risk(df, cache, sig_key, risk_grid, contracts, pv):
+    """Scores (eq, winrate, nb trades) de toutes les combinaisons risque pour un même signal."""
+    scores = []
+    for risk in risk_grid:
+        eq, trades, _ = combo_arrays(df, cache, sig_key, risk, contracts, pv)
+        wr, n = trade_stats(trades)
+        scores.append((eq, wr, n))
+    return scores
 
+def sweep_batch(df, cache, signal_grid, risk_grid, contracts, pv):
+    """Toutes les combinaisons (signal x risque) en un seul passage de simulate_batch()."""
+    o, h, l, c = cache.get(("ohlc",), lambda: tuple(df[col].to_numpy(dtype=np.float64) for col in OHLC_COLS))
+    a = cache.get(("atr", 14), lambda: atr(df, 14).to_numpy(dtype=np.float64))
+    sig = np.repeat(np.column_stack([combo_signal(df, cache, *key) for key in signal_grid]), len(risk_grid), axis=1)
+    am, rr, tr = (np.tile(col, len(signal_grid)) for col in np.array(risk_grid, dtype=np.float64).T)
+    eq, trades = simulate_batch(o, h, l, c, a, sig, am, rr, tr, contracts=contracts, pv=pv)
+    return batch_stats(eq, trades)
+
+# --- Mode multi-process : OHLC en mémoire partagée, un cache par worker ---
+_worker = {}
+
+def _worker_init(shm_name, n):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray((len(OHLC_COLS), n), dtype=np.float64, buffer=shm.buf)
+    _worker["shm"] = shm  # garde le segment attaché pendant toute la vie du worker
+    _worker["df"] = pd.DataFrame({col: block[i] for i, col in enumerate(OHLC_COLS)}, copy=False)
+    _worker["cache"] = SweepCache()
+
+def _worker_sweep(sig_keys, risk_grid, contracts, pv, engine):
+    cache = _worker["cache"]
+    df = _worker["df"]
+    if engine == "batch":
+        scores = sweep_batch(df, cache, sig_keys, risk_grid, contracts, pv)
+    else:
+        scores = [score for key in sig_keys for score in sweep_risk(df, cache, key, risk_grid, contracts, pv)]
+    return scores, os.getpid(), cache.stats()
+
+def parallel_scores(df, signal_grid, risk_grid, contracts, pv, workers, engine="scalar"):
+    """
+    Répartit les combinaisons signal sur un pool de processus. Les tableaux OHLC sont copiés
+    une seule fois en mémoire partagée (pas de pickle du DataFrame). Scores renvoyés dans l'ordre de la grille.
+    """
+    n = len(df)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(OHLC_COLS) * n * 8))
+    try:
+        block = np.ndarray((len(OHLC_COLS), n), dtype=np.float64, buffer=shm.buf)
+        for i, col in enumerate(OHLC_COLS):
+            block[i] = df[col].to_numpy(dtype=np.float64)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init, initargs=(shm.name, n)) as pool:
+            # scalar : une tâche par signal ; batch : une tranche contiguë de signaux par worker
+            if engine == "batch":
+                size = -(-len(signal_grid) // workers)
+                tasks = [signal_grid[i:i + size] for i in range(0, len(signal_grid), size)]
+            else:
+                tasks = [[key] for key in signal_grid]
+            futures = [pool.submit(_worker_sweep, keys, risk_grid, contracts, pv, engine) for keys in tasks]
+            results = [fut.result() for fut in futures]
+        del block
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # Stats de cache : dernier instantané de chaque worker
+    per_worker = {}
+    for _, pid, stats in results:
+        per_worker[pid] = stats
+    stats = {k: sum(st[k] for st in per_worker.values()) for k in ("hits", "misses", "size")}
+    return [score for scores, _, _ in results for score in scores], stats
+
+def run_grid(df, contracts, symbol, workers=1, engine="scalar"):
+    """
+    engine="scalar" : une simulation simulate_arrays() par combinaison.
+    engine="batch"  : simulate_batch() avance toutes les combinaisons en lockstep
+                      (avec workers > 1 : une tranche de signaux x sous-grille risque par worker).
+    """
+    signal_grid, risk_grid = grid()
+    pv = POINT_VALUE.get(symbol.upper(), 5.0)
+
+    # Indicateurs et signaux mémoïsés pour tout le balayage :
+    # EMA par période, signal EMA par (fast, slow), breakout par lookback, pullback et ATR une fois.
+    cache = SweepCache()
+    if workers > 1:
+        scores, worker_stats = parallel_scores(df, signal_grid, risk_grid, contracts, pv, workers, engine)
+    elif engine == "batch":
+        scores = sweep_batch(df, cache, signal_grid, risk_grid, contracts, pv)
+    else:
+        scores = [score for key in signal_grid for score in sweep_risk(df, cache, key, risk_grid, contracts, pv)]
+
+    # Même réduction qu'en série : 1er meilleur score dans l'ordre de la grille
     best = None
     best_detail = None
-
-    for f,s,lb,am,rr,tr in product(ema_fast_list, ema_slow_list, brk_look_list, atr_mult_list, rr_list, trail_list):
-        sig_ema = strategy_ema_crossover(df, f, s)
-        sig_brk = strategy_breakout_range(df, lb, buffer=0.0)
-        sig_pb  = strategy_pullback(df, impulse_look=10, retrace=0.5)
-        sigs = pd.concat([sig_ema, sig_brk, sig_pb], axis=1)
-
-        eq, wr, n, trades, equity = simulate(
-            df, sigs,
-            atr_mult_sl=am, rr_target=rr, trail_mult=tr,
-            contracts=contracts, symbol=symbol
-        )
-        score = (eq, wr, n)  # priorité PnL, puis winrate, puis nb trades
+    for ((f, s, lb), (am, rr, tr)), score in zip(product(signal_grid, risk_grid), scores):
+        # score = (eq, wr, n) : priorité PnL, puis winrate, puis nb trades
         if (best is None) or (score > best):
             best = score
             best_detail = {
                 "ema_fast": f, "ema_slow": s, "brk_look": lb,
                 "atr_mult": am, "rr": rr, "trail_mult": tr,
-                "eq": eq, "winrate": wr, "trades": n,
-                "trades_df": trades, "equity_df": equity
+                "eq": score[0], "winrate": score[1], "trades": score[2],
             }
-    return best_detail
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("csv", help="Chemin du CSV (colonnes: timestamp, open, high, low, close, volume)")
-    ap.add_argument("--symbol", default="MES", help="MES (5$/pt) ou ES (50$/pt)")
-    ap.add_argument("--contracts", type=int, default=5, help="Nb de contrats (agressif)")
-    args = ap.parse_args()
+    # DataFrames construits une seule fois, pour la meilleure combinaison
+    best_arrays = combo_arrays(df, cache,
+                               (best_detail["ema_fast"], best_detail["ema_slow"], best_detail["brk_look"]),
+                               (best_detail["atr_mult"], best_detail["rr"], best_detail["trail_mult"]),
+                               contracts, pv)
+    _, _, _, best_detail["trades_df"], best_detail["equity_df"] = summarize(df.index, *best_arrays)
+    best_detail["cache"] = cache.stats()
+    if workers > 1:
+        best_detail["cache"] = {k: v + worker_stats[k] for k, v in best_detail["cache"].items()}
+    return best_detail
 
-    df = pd.read_csv(args.csv)
+def load_frame(csv_path):
+    """CSV -> DataFrame indexé par timestamp (trié), colonnes en minuscules."""
+    df = load_ohlcv(csv_path)
     # Colonnes attendues
     # Normalise noms
     df.columns = [c.strip().lower() for c in df.columns]
@@ -202,7 +554,21 @@ def main():
         if col not in df.columns:
             raise ValueError(f"Colonne requise manquante: {col}")
 
-    best = run_grid(df, contracts=args.contracts, symbol=args.symbol)
+    return df
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("csv", help="Chemin du CSV (colonnes: timestamp, open, high, low, close, volume)")
+    ap.add_argument("--symbol", default="MES", help="MES (5$/pt) ou ES (50$/pt)")
+    ap.add_argument("--contracts", type=int, default=5, help="Nb de contrats (agressif)")
+    ap.add_argument("--workers", type=int, default=1, help="Nb de processus pour le grid search (1 = série)")
+    ap.add_argument("--engine", choices=["scalar", "batch"], default="scalar",
+                    help="scalar = 1 simulation par combinaison ; batch = combinaisons simulées en lockstep")
+    args = ap.parse_args()
+
+    df = load_frame(args.csv)
+
+    best = run_grid(df, contracts=args.contracts, symbol=args.symbol, workers=args.workers, engine=args.engine)
 
     # Sauvegardes
     base = args.csv.rsplit(".",1)[0]
@@ -221,6 +587,7 @@ def main():
     print(f"💰 PnL cumulé: ${best['eq']:.2f}   (contrats={args.contracts}, symbol={args.symbol}, point=${pv:.0f})")
     print(f"🏦 Après prélèvement 10% prop: ${kept_usd:.2f} (tu gardes 90%)")
     print(f"📝 Détails -> {trades_csv} | 📈 Equity -> {equity_csv}")
+    print(f"🧮 Cache indicateurs: {best['cache']['misses']} calculs, {best['cache']['hits']} réutilisations")
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,10 @@
 # backtest_es_csv_risk.py
-import sys, math
+import argparse, math
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from market_data import load_ohlcv
+import session_calendar
 
 # === Paramètres marché / contrat (ES futures mini) ===
 TICK_VALUE = 5.0          # $/point
@@ -53,139 +56,176 @@ def position_size(capital, stop_pts):
     contracts = math.floor(risk_dollars / dollars_per_contract)
     return int(max(MIN_CONTRACTS, min(MAX_CONTRACTS, contracts)))
 
-def backtest(csv_path):
-    df = pd.read_csv(csv_path)
+SESSION_TZ = "Europe/Paris"
+INITIAL_CAPITAL = 50000.0
+
+def load_window(csv_path):
+    df = load_ohlcv(csv_path)
     # colonnes attendues: timestamp, open, high, low, close, volume
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    if getattr(df['timestamp'].dt, 'tz', None) is None:
+        # timestamps naïfs (BTC) : heure écrite dans le fichier, sans conversion de fuseau
+        minutes = session_calendar.minute_of_day(df['timestamp'], "UTC")
+        df = df[session_calendar.window_mask(minutes, (START, END))].copy()
+    else:
+        # fenêtre horaire (heure de Paris, été / hiver) : minutes du jour en cache par fichier
+        df = df[session_calendar.file_window_mask(csv_path, (START, END), SESSION_TZ)].copy()
+        df['timestamp'] = df['timestamp'].dt.tz_convert(SESSION_TZ)
     df = df.sort_values('timestamp')
-    # fenêtre horaire
-    df = df[(df['timestamp'].dt.time >= pd.to_datetime(START).time()) &
-            (df['timestamp'].dt.time <= pd.to_datetime(END).time())].copy()
-    if df.empty:
-        print("❌ Aucune donnée dans la fenêtre horaire.")
-        return
-
-    df['rsi'] = rsi(df['close'], 14)
-    df['atr'] = atr(df, ATR_LEN)
-
-    capital = 50000.0
-    equity = [capital]
+    return df.reset_index(drop=True)
+
+def session_bounds(df):
+    """Découpe en séances (une par jour de bourse, heure de Paris) -> liste de (début, fin) d'index."""
+    day = df['timestamp'].dt.normalize().to_numpy()
+    starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+    ends = np.r_[starts[1:], len(df)]
+    return list(zip(starts.tolist(), ends.tolist()))
+
+def run_session(c, h, l, a, r, minute, capital, compound):
+    """
+    Noyau d'une séance (tableaux -> listes Python). Garde-fous journaliers remis à zéro :
+    un garde-fou déclenché arrête la séance, pas le backtest. Position clôturée en fin de séance (EOD).
+    compound=False : taille de position calculée sur `capital` fixe (séances indépendantes).
+    Retourne (trades, arrêt) : trades = [(bar, side, entry, exit, reason, contracts, gross_pts, net_pts, pnl_usd)].
+    """
+    c, h, l, a, r, minute = (np.asarray(x).tolist() for x in (c, h, l, a, r, minute))
     trades = []
     daily_pl_pts = 0.0
     consec_losses = 0
+    stop = None
 
     in_pos = False
     side = None
-    entry = None
-    stop = None
-    target = None
+    entry = stop_px = target = None
     contracts = 0
     last_trade_minute = None
 
-    for i, row in df.iterrows():
-        ts = row['timestamp']
-        c  = row['close']
-        h  = row['high']
-        l  = row['low']
-        a  = row['atr']
-        r  = row['rsi']
-
+    def close(i, exit_price, reason):
+        nonlocal capital, daily_pl_pts, consec_losses
+        gross_pts = (exit_price - entry) if side == 'LONG' else (entry - exit_price)
+        net_pts = gross_pts - POINTS_PER_TRADE_FEE
+        pnl_usd = net_pts * TICK_VALUE * contracts
+        if compound:
+            capital += pnl_usd
+        daily_pl_pts += net_pts * contracts
+        consec_losses = 0 if net_pts > 0 else consec_losses + 1
+        trades.append((i, side, entry, exit_price, reason, contracts, gross_pts, net_pts, pnl_usd))
+
+    for i in range(len(c)):
         # stop-day guards
-        if daily_pl_pts <= -MAX_DAILY_LOSS_PTS: break
-        if daily_pl_pts >=  DAILY_PROFIT_LOCK_PTS: break
-        if consec_losses >= MAX_CONSEC_LOSSES: break
+        if daily_pl_pts <= -MAX_DAILY_LOSS_PTS: stop = 'daily_loss'; break
+        if daily_pl_pts >=  DAILY_PROFIT_LOCK_PTS: stop = 'profit_lock'; break
+        if consec_losses >= MAX_CONSEC_LOSSES: stop = 'consec_losses'; break
 
         # sortie si en position
         if in_pos:
-            # check stop/target
             exit_price = None
-            reason = None
             if side == 'LONG':
-                if l <= stop:
-                    exit_price = stop
-                    reason = 'SL'
-                elif h >= target:
-                    exit_price = target
-                    reason = 'TP'
+                if l[i] <= stop_px:
+                    exit_price, reason = stop_px, 'SL'
+                elif h[i] >= target:
+                    exit_price, reason = target, 'TP'
             else:
-                if h >= stop:
-                    exit_price = stop
-                    reason = 'SL'
-                elif l <= target:
-                    exit_price = target
-                    reason = 'TP'
-
+                if h[i] >= stop_px:
+                    exit_price, reason = stop_px, 'SL'
+                elif l[i] <= target:
+                    exit_price, reason = target, 'TP'
             if exit_price is not None:
-                gross_pts = (exit_price - entry) if side=='LONG' else (entry - exit_price)
-                net_pts   = gross_pts - POINTS_PER_TRADE_FEE
-                pnl_usd   = net_pts * TICK_VALUE * contracts
-                capital  += pnl_usd
-                equity.append(capital)
-                daily_pl_pts += net_pts * contracts
-                consec_losses = 0 if net_pts > 0 else consec_losses + 1
-
-                trades.append({
-                    'timestamp': ts,
-                    'side': side,
-                    'entry': entry,
-                    'exit': exit_price,
-                    'reason': reason,
-                    'contracts': contracts,
-                    'gross_pts': round(gross_pts,2),
-                    'net_pts': round(net_pts,2),
-                    'pnl_usd': round(pnl_usd,2),
-                    'capital': round(capital,2)
-                })
+                close(i, exit_price, reason)
                 in_pos = False
-                side = entry = stop = target = None
-                contracts = 0
-                continue  # pas de nouvelle entrée sur la même bougie
+            continue  # pas de nouvelle entrée sur la même bougie (ni d'ajout en position)
 
-        # pas d’entrée si conditions non réunies
-        if in_pos: 
-            continue
-        if pd.isna(a) or a < ATR_MIN or a > ATR_MAX:
+        ai = a[i]
+        if ai != ai or ai < ATR_MIN or ai > ATR_MAX:
             continue
-
-        minute_key = ts.floor('T')
-        if last_trade_minute is not None and minute_key == last_trade_minute:
+        if last_trade_minute is not None and minute[i] == last_trade_minute:
             continue  # cooldown même minute
+        if i == len(c) - 1:
+            break  # dernière bougie de la séance : l'entrée serait clôturée EOD au même prix
 
         # signal RSI
-        go_long  = r < 30
-        go_short = r > 70
-
-        if go_long:
-            stop_pts = max(a, 0.5)
+        if r[i] < 30 or r[i] > 70:
+            stop_pts = max(ai, 0.5)
             tp_pts   = 1.5 * stop_pts
             cts = position_size(capital, stop_pts)
             if cts > 0:
                 in_pos = True
-                side = 'LONG'
-                entry = c
-                stop = entry - stop_pts
-                target = entry + tp_pts
+                side = 'LONG' if r[i] < 30 else 'SHORT'
+                entry = c[i]
+                stop_px = entry - stop_pts if side == 'LONG' else entry + stop_pts
+                target = entry + tp_pts if side == 'LONG' else entry - tp_pts
                 contracts = cts
-                last_trade_minute = minute_key
+                last_trade_minute = minute[i]
+
+    if in_pos:
+        close(len(c) - 1, c[-1], 'EOD')  # pas de position gardée d'une séance à l'autre
+    return trades, stop
+
+def _run_session_task(args):
+    return run_session(*args)
+
+def backtest(csv_path, mode="compound", workers=1):
+    """
+    Backtest découpé par séance (fenêtre START-END de chaque jour, heure de Paris).
+    mode="compound" : séances en série, la taille suit le capital courant.
+    mode="fixed"    : taille calculée sur INITIAL_CAPITAL ; séances indépendantes,
+                      réparties sur `workers` processus.
+    """
+    df = load_window(csv_path)
+    if df.empty:
+        print("❌ Aucune donnée dans la fenêtre horaire.")
+        return
 
-        elif go_short:
-            stop_pts = max(a, 0.5)
-            tp_pts   = 1.5 * stop_pts
-            cts = position_size(capital, stop_pts)
-            if cts > 0:
-                in_pos = True
-                side = 'SHORT'
-                entry = c
-                stop = entry + stop_pts
-                target = entry - tp_pts
-                contracts = cts
-                last_trade_minute = minute_key
+    df['rsi'] = rsi(df['close'], 14)
+    df['atr'] = atr(df, ATR_LEN)
 
-        equity.append(capital)
+    cols = [df[k].to_numpy(dtype=np.float64) for k in ('close', 'high', 'low', 'atr', 'rsi')]
+    minute = df['timestamp'].dt.floor('min').astype('int64').to_numpy()
+    bounds = session_bounds(df)
+
+    def session_args(b, e, capital):
+        return tuple(x[b:e] for x in cols) + (minute[b:e], capital, mode == "compound")
+
+    results = []
+    if mode == "compound":
+        capital = INITIAL_CAPITAL
+        for b, e in bounds:
+            trades, stop = run_session(*session_args(b, e, capital))
+            for t in trades:
+                capital += t[8]
+            results.append((trades, stop))
+    elif workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            tasks = [session_args(b, e, INITIAL_CAPITAL) for b, e in bounds]
+            results = list(pool.map(_run_session_task, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+    else:
+        results = [run_session(*session_args(b, e, INITIAL_CAPITAL)) for b, e in bounds]
+
+    # Assemblage dans l'ordre des séances, capital cumulé sur tout le backtest
+    capital = INITIAL_CAPITAL
+    trades = []
+    bar_pnl = np.zeros(len(df))
+    for (b, _), (session_trades, _) in zip(bounds, results):
+        for i, side, entry, exit_price, reason, contracts, gross_pts, net_pts, pnl_usd in session_trades:
+            capital += pnl_usd
+            bar_pnl[b + i] = pnl_usd
+            trades.append({
+                'timestamp': df['timestamp'].iat[b + i],
+                'side': side,
+                'entry': entry,
+                'exit': exit_price,
+                'reason': reason,
+                'contracts': contracts,
+                'gross_pts': round(gross_pts,2),
+                'net_pts': round(net_pts,2),
+                'pnl_usd': round(pnl_usd,2),
+                'capital': round(capital,2)
+            })
+    stops = sum(1 for _, stop in results if stop)
 
     # stats
     trades_df = pd.DataFrame(trades)
-    equity_df = pd.DataFrame({'timestamp': pd.Series(equity).index, 'equity': equity})
+    equity_df = pd.DataFrame({'timestamp': df['timestamp'],
+                              'equity': np.cumsum(np.r_[INITIAL_CAPITAL, bar_pnl])[1:]})
 
     wins = (trades_df['pnl_usd'] > 0).sum() if not trades_df.empty else 0
     total = len(trades_df)
@@ -196,10 +236,16 @@ def backtest(csv_path):
     trades_df.to_csv('backtest_es_trades_risk.csv', index=False)
     equity_df.to_csv('backtest_es_equity_risk.csv', index=False)
 
+    print(f"📅 Séances: {len(bounds)} | 🛑 Arrêtées par un garde-fou: {stops} | mode={mode}")
     print(f"📊 Trades: {total} | ✅ Gains: {wins} | Win rate: {winrate:.1f}%")
     print(f"💰 PnL cumulé: {pnl_pts:.2f} pts  (~${pnl_usd:.2f})  avec sizing dynamique, frais inclus")
     print("📝 Détails -> backtest_es_trades_risk.csv | 📈 Equity -> backtest_es_equity_risk.csv")
 
 if __name__ == "__main__":
-    csv = sys.argv[1] if len(sys.argv)>1 else "ES_F_5m_30d_16h00_17h30_FR.csv"
-    backtest(csv)
+    ap = argparse.ArgumentParser()
+    ap.add_argument("csv", nargs="?", default="ES_F_5m_30d_16h00_17h30_FR.csv")
+    ap.add_argument("--mode", choices=["compound", "fixed"], default="compound",
+                    help="compound = capital réinvesti (séances en série) ; fixed = capital fixe (séances en parallèle)")
+    ap.add_argument("--workers", type=int, default=1, help="Nb de processus (mode fixed)")
+    args = ap.parse_args()
+    backtest(args.csv, mode=args.mode, workers=args.workers)
@@ -0,0 +1,152 @@
+# bench_backend.py
+# Test de charge du backend : lance main:app sous uvicorn en local, puis N clients async
+# (httpx) envoient des payloads data_generator.generate_market_data() sur /bot/strategy.
+# Rapport : requêtes/s + latences p50 / p95 / p99, comparé à un baseline JSON. Le baseline garde
+# les paramètres du run (clients, requêtes, workers, serveur) : pas de comparaison s'ils diffèrent.
+#
+#   python bench_backend.py --clients 32 --requests 20000
+#   python bench_backend.py --save bench_backend_baseline.json       # nouveau baseline
+#   python bench_backend.py --url https://...run.app --clients 8      # serveur déjà lancé
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from data_generator import generate_market_data
+
+BASELINE = "bench_backend_baseline.json"
+ROUTE = "/bot/strategy"
+RUN_KEYS = ("clients", "requests", "workers", "url")
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(port, workers):
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    proc = subprocess.Popen(cmd, cwd=os.path.dirname(os.path.abspath(__file__)))
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("uvicorn s'est arrêté au démarrage")
+        try:
+            httpx.get(url + "/openapi.json", timeout=1).raise_for_status()
+            return proc, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("uvicorn ne répond pas")
+
+async def client(http, url, payloads, latencies, errors):
+    for payload in payloads:
+        t0 = time.perf_counter()
+        try:
+            resp = await http.post(url, json=payload)
+            resp.raise_for_status()
+        except httpx.HTTPError:
+            errors.append(1)
+            continue
+        latencies.append(time.perf_counter() - t0)
+
+async def run_load(base_url, clients, total, warmup=200, seed=0):
+    random.seed(seed)
+    payloads = [generate_market_data() for _ in range(total)]
+    url = base_url.rstrip("/") + ROUTE
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as http:
+        await asyncio.gather(*(http.post(url, json=p) for p in payloads[:min(warmup, total)]))
+
+        latencies, errors = [], []
+        t0 = time.perf_counter()
+        # chaque client envoie sa tranche en boucle fermée (une requête en vol par client)
+        await asyncio.gather(*(client(http, url, payloads[i::clients], latencies, errors)
+                               for i in range(clients)))
+        elapsed = time.perf_counter() - t0
+
+    lat_ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(lat_ms, [50, 95, 99]) if len(lat_ms) else (np.nan,) * 3
+    return {
+        "clients": clients,
+        "requests": total,
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "req_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(lat_ms.max()), 2) if len(lat_ms) else None,
+    }
+
+def run_params(args):
+    return {"clients": args.clients, "requests": args.requests, "workers": args.workers,
+            "url": args.url or "local uvicorn"}
+
+def baseline_mismatch(baseline, params):
+    """Paramètres du run qui diffèrent du baseline : [(clé, baseline, run), ...]."""
+    recorded = baseline.get("run", {})
+    return [(k, recorded.get(k), params[k]) for k in RUN_KEYS if recorded.get(k) != params[k]]
+
+def report(result, baseline=None):
+    print(f"📡 {result['requests']} requêtes, {result['clients']} clients, {result['errors']} erreur(s)")
+    print(f"⚡ {result['req_per_s']} req/s")
+    print(f"⏱️ p50={result['p50_ms']} ms | p95={result['p95_ms']} ms | p99={result['p99_ms']} ms "
+          f"| max={result['max_ms']} ms")
+    if baseline:
+        for key in ("req_per_s", "p50_ms", "p95_ms", "p99_ms"):
+            ref = baseline["result"].get(key)
+            if ref:
+                print(f"   {key:<10} {result[key]:>10} vs baseline {ref:>10} ({100 * (result[key] / ref - 1):+.1f}%)")
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Benchmark de charge de /bot/strategy")
+    p.add_argument("--clients", type=int, default=32, help="clients concurrents")
+    p.add_argument("--requests", type=int, default=20000, help="nombre total de requêtes")
+    p.add_argument("--workers", type=int, default=1, help="workers uvicorn")
+    p.add_argument("--url", default=None, help="backend déjà lancé (sinon uvicorn local)")
+    p.add_argument("--baseline", default=BASELINE, help="baseline JSON à comparer")
+    p.add_argument("--save", default=None, metavar="JSON", help="enregistre le résultat comme baseline")
+    args = p.parse_args()
+
+    proc = None
+    url = args.url
+    if url is None:
+        proc, url = start_server(free_port(), args.workers)
+    try:
+        result = asyncio.run(run_load(url, args.clients, args.requests))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    params = run_params(args)
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        diff = baseline_mismatch(baseline, params)
+        if diff:
+            print(f"❌ Baseline {args.baseline} non comparable (paramètres différents) : "
+                  + ", ".join(f"{k}={run} vs {ref}" for k, ref, run in diff))
+            baseline = None
+    report(result, baseline)
+
+    if args.save:
+        meta = {"python": platform.python_version(), "machine": platform.machine(),
+                "cpus": os.cpu_count()}
+        with open(args.save, "w") as f:
+            json.dump({"env": meta, "run": params, "result": result}, f, indent=2)
+            f.write("\n")
+        print(f"💾 Baseline -> {args.save}")
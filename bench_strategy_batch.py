@@ -0,0 +1,72 @@
+# bench_strategy_batch.py
+# Vérifie que evaluate_strategy_batch() rend exactement les décisions de evaluate_strategy()
+# (cas limites compris : égalités, NaN, ±inf, -0.0) puis mesure le débit en lignes/s.
+#
+#   python bench_strategy_batch.py --rows 5000000
+#   python bench_strategy_batch.py --csv ES_F_1m_7jours.csv   # audit des décisions d'un historique
+
+import argparse
+import time
+
+import numpy as np
+
+from services.strategy_service import (BUY, FIELDS, HOLD, SELL, decision_names,
+                                       evaluate_strategy, evaluate_strategy_batch)
+
+CODES = {"BUY": BUY, "SELL": SELL, "HOLD": HOLD}
+
+def random_columns(n, seed=0):
+    """Colonnes aléatoires autour des seuils de la règle, avec égalités et valeurs spéciales."""
+    rng = np.random.default_rng(seed)
+    cols = {f: rng.normal(100, 2, n).round(1) for f in FIELDS if f != "rsi"}  # arrondi -> égalités
+    cols["rsi"] = rng.choice([0.0, 29.9, 30.0, 30.1, 50.0, 69.9, 70.0, 70.1, 100.0], n)
+    specials = np.array([np.nan, np.inf, -np.inf, -0.0, 0.0])
+    for f in FIELDS:
+        mask = rng.random(n) < 0.01
+        cols[f][mask] = rng.choice(specials, mask.sum())
+    return cols
+
+def check_parity(cols, limit=200_000):
+    """Compare au scalaire sur les `limit` premières lignes ; retourne le nb de différences."""
+    n = min(limit, len(cols["price"]))
+    codes = evaluate_strategy_batch({f: cols[f][:n] for f in FIELDS})
+    rows = zip(*(cols[f][:n].tolist() for f in FIELDS))
+    scalar = np.array([CODES[evaluate_strategy(dict(zip(FIELDS, row)))] for row in rows], dtype=np.int8)
+    return n, int((codes != scalar).sum())
+
+def bench(cols, repeat=5):
+    n = len(cols["price"])
+    best = min(_timed(evaluate_strategy_batch, cols) for _ in range(repeat))
+    sample = {f: cols[f][:min(n, 100_000)].tolist() for f in FIELDS}
+    t0 = time.perf_counter()
+    for row in zip(*(sample[f] for f in FIELDS)):
+        evaluate_strategy(dict(zip(FIELDS, row)))
+    scalar_rate = len(sample["price"]) / (time.perf_counter() - t0)
+    return n / best, scalar_rate
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+def csv_columns(path):
+    from replay_feeder import compute_indicators, load_data
+    df = compute_indicators(load_data(path)).rename(columns={"close": "price"})
+    return {f: df[f].to_numpy(dtype=np.float64) for f in FIELDS}
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Parité + débit de evaluate_strategy_batch")
+    p.add_argument("--rows", type=int, default=2_000_000)
+    p.add_argument("--csv", default=None, help="CSV OHLCV : décisions sur les indicateurs de replay_feeder")
+    args = p.parse_args()
+
+    cols = csv_columns(args.csv) if args.csv else random_columns(args.rows)
+    n, diffs = check_parity(cols)
+    print(f"{'✅' if diffs == 0 else '❌'} Parité scalaire / batch : {diffs} différence(s) sur {n} lignes")
+
+    batch_rate, scalar_rate = bench(cols)
+    print(f"⚡ Batch   : {batch_rate / 1e6:.1f} M lignes/s ({len(cols['price'])} lignes)")
+    print(f"🐢 Scalaire: {scalar_rate / 1e6:.2f} M lignes/s (x{batch_rate / scalar_rate:.0f})")
+
+    names = decision_names(evaluate_strategy_batch(cols))
+    print("📊 " + " | ".join(f"{d}: {names.count(d)}" for d in ("BUY", "SELL", "HOLD")))
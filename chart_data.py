@@ -0,0 +1,136 @@
+# chart_data.py
+# Courbes d'equity + marqueurs de trades des backtests, réduites à la largeur d'affichage.
+#
+# Les CSV d'equity ont une ligne par bougie (des centaines de milliers sur plusieurs mois
+# en 1m) : on ne renvoie au navigateur que `width` points choisis par LTTB
+# (Largest-Triangle-Three-Buckets), qui garde la forme (pics, creux) de la courbe.
+# Résultats en cache par (fichier, largeur), invalidés quand le mtime / la taille changent.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from market_data import FileCache, file_stamp
+
+VALUE_COLUMNS = ("equity", "cum_pnl_dollars", "cum_pnl_points")
+TRADE_TIME_COLUMNS = ("exit_time", "timestamp", "entry_time")
+CACHE_SIZE = 64
+
+_cache = FileCache(CACHE_SIZE)  # (chemin, largeur) -> résultat
+
+def lttb(x, y, threshold):
+    """Indices des `threshold` points retenus par LTTB (premier et dernier toujours gardés)."""
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1][:threshold], dtype=np.int64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)  # threshold-2 seaux internes
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # point moyen du seau suivant (ou dernier point)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+def _epoch_ms(col):
+    """Timestamps (texte) -> ms epoch UTC."""
+    text = col.astype(str)
+    try:
+        # "YYYY-MM-DD HH:MM:SS[+HH:MM]" : date parsée à format fixe, offsets (peu de valeurs
+        # distinctes) à part -> évite le parse lent de pandas sur les offsets mixtes été / hiver
+        naive = pd.to_datetime(text.str[:19], format="%Y-%m-%d %H:%M:%S")
+        codes, offsets = pd.factorize(text.str[19:])
+        offset_ms = np.array([_offset_ms(o) for o in offsets], dtype=np.int64)
+        ms = naive.to_numpy().astype("datetime64[ms]").astype(np.int64)
+        return ms - offset_ms[codes]
+    except ValueError:
+        ts = pd.to_datetime(col, utc=True).dt.tz_localize(None)  # offsets mixtes -> UTC
+        return ts.to_numpy().astype("datetime64[ms]").astype(np.int64)
+
+def _offset_ms(text):
+    if text in ("", "Z"):
+        return 0
+    if len(text) != 6 or text[0] not in "+-" or text[3] != ":":
+        raise ValueError(text)
+    sign = 1 if text[0] == "+" else -1
+    return sign * (int(text[1:3]) * 3600 + int(text[4:6]) * 60) * 1000
+
+def load_equity(path):
+    """CSV d'equity -> (x en ms epoch UTC, y) ; colonne de valeur : equity ou PnL cumulé ($)."""
+    df = pd.read_csv(path)
+    col = next((c for c in VALUE_COLUMNS if c in df.columns), None)
+    if col is None or "timestamp" not in df.columns or df.empty:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    return _epoch_ms(df["timestamp"]), df[col].to_numpy(dtype=np.float64)
+
+def trades_path(equity_path):
+    """backtest_es_equity.csv -> backtest_es_trades.csv (même convention pour _alt / _risk)."""
+    head, name = os.path.split(equity_path)
+    return os.path.join(head, name.replace("equity", "trades"))
+
+def load_trades(path):
+    """CSV de trades -> DataFrame (t ms, side LONG/SHORT, pnl) ; vide si absent / sans trade."""
+    empty = pd.DataFrame({"t": np.empty(0, dtype=np.int64), "side": [], "pnl": []})
+    if not os.path.exists(path) or os.path.getsize(path) < 2:
+        return empty
+    try:
+        df = pd.read_csv(path)
+    except pd.errors.EmptyDataError:
+        return empty
+    tcol = next((c for c in TRADE_TIME_COLUMNS if c in df.columns), None)
+    if tcol is None or df.empty:
+        return empty
+    if "side" in df.columns:
+        side = df["side"].astype(str)
+    elif "direction" in df.columns:
+        side = np.where(df["direction"] > 0, "LONG", "SHORT")
+    else:
+        side = np.full(len(df), "")
+    pnl_col = next((c for c in ("pnl_usd", "pnl_dollars", "pnl_points", "pnl_pts") if c in df.columns), None)
+    pnl = df[pnl_col].to_numpy(dtype=np.float64) if pnl_col else np.zeros(len(df))
+    return pd.DataFrame({"t": _epoch_ms(df[tcol]), "side": side, "pnl": pnl})
+
+def trade_markers(trades, x, y, width):
+    """
+    Marqueurs posés sur la courbe ; au plus un par pixel (le trade au |PnL| le plus fort),
+    pour que le nombre de marqueurs reste borné par la largeur.
+    """
+    if trades.empty or len(x) == 0:
+        return []
+    idx = np.clip(np.searchsorted(x, trades["t"].to_numpy(), side="right") - 1, 0, len(x) - 1)
+    trades = trades.assign(y=y[idx])
+    if len(trades) > width and x[-1] > x[0]:
+        pixel = ((trades["t"] - x[0]) * (width - 1) // (x[-1] - x[0])).clip(0, width - 1)
+        best = trades["pnl"].abs().groupby(pixel).idxmax()
+        trades = trades.loc[best.sort_values().to_numpy()]
+    return [{"t": int(t), "y": float(v), "side": s, "pnl": float(p)}
+            for t, v, s, p in zip(trades["t"], trades["y"], trades["side"], trades["pnl"])]
+
+def equity_chart(path, width=1000):
+    """Courbe réduite à `width` points + marqueurs de trades, avec cache invalidé sur mtime."""
+    stamp = (file_stamp(path),
+             file_stamp(trades_path(path)) if os.path.exists(trades_path(path)) else None)
+    return _cache.get((os.path.abspath(path), width), stamp, lambda: _equity_chart(path, width))
+
+def _equity_chart(path, width):
+    x, y = load_equity(path)
+    keep = lttb(x, y, width)
+    return {
+        "file": os.path.basename(path),
+        "points": int(len(x)),
+        "x": x[keep].tolist(),
+        "y": y[keep].tolist(),
+        "trades": trade_markers(load_trades(trades_path(path)), x, y, width),
+    }
+
+def equity_files(directory="."):
+    return sorted(f for f in os.listdir(directory) if f.endswith(".csv") and "equity" in f)
@@ -0,0 +1,157 @@
+# decision_index.py
+# Index SQLite du journal des décisions (trading.log) pour le dashboard.
+#
+# sync() ne lit que ce qui a été ajouté depuis la dernière fois (offset mémorisé) ; si le
+# logger a fait tourner le fichier (inode différent), on termine d'abord l'ancien fichier
+# (trading.log.1) à partir de l'offset, puis on reprend le nouveau depuis 0.
+# Les pages (plus récentes d'abord, filtre par décision) sont des requêtes par clé sur l'index
+# (id < dernier id de la page courante) : leur coût ne dépend ni de la taille du journal ni
+# de la profondeur de la page.
+
+import json
+import os
+import sqlite3
+import threading
+
+from logger import LOG_FILE, parse_line
+
+INDEX_FILE = "trading_log.sqlite"
+READ_BLOCK = 8 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY,
+    ts TEXT,
+    decision TEXT,
+    input TEXT
+);
+CREATE INDEX IF NOT EXISTS decisions_by_decision ON decisions (decision, id);
+CREATE TABLE IF NOT EXISTS counts (decision TEXT PRIMARY KEY, n INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS source (key TEXT PRIMARY KEY, value INTEGER);
+"""
+
+class DecisionIndex:
+    def __init__(self, log_path=LOG_FILE, index_path=INDEX_FILE):
+        self.log_path = log_path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(index_path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def _state(self):
+        rows = dict(self.db.execute("SELECT key, value FROM source"))
+        return rows.get("inode"), rows.get("offset", 0)
+
+    def sync(self):
+        """Indexe les lignes ajoutées au journal depuis le dernier appel. Retourne leur nombre."""
+        with self.lock:
+            try:
+                st = os.stat(self.log_path)
+            except FileNotFoundError:
+                return 0
+            inode, offset = self._state()
+            added = 0
+            if inode is not None and inode != st.st_ino:
+                # rotation : fin de l'ancien fichier s'il est encore là, puis nouveau fichier
+                rotated = f"{self.log_path}.1"
+                if os.path.exists(rotated) and os.stat(rotated).st_ino == inode:
+                    added += self._read_from(rotated, inode, offset)
+                offset = 0
+            elif st.st_size < offset:
+                offset = 0  # fichier tronqué / recréé
+            added += self._read_from(self.log_path, st.st_ino, offset)
+            return added
+
+    def _read_from(self, path, inode, offset):
+        """Indexe les lignes complètes à partir de offset ; retourne leur nombre."""
+        added = 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while True:
+                block = f.read(READ_BLOCK)
+                end = block.rfind(b"\n")
+                if end < 0:
+                    break  # dernière ligne pas encore terminée : relue au prochain sync
+                rows = []
+                for line in block[:end].decode("utf-8", errors="replace").splitlines():
+                    parsed = parse_line(line)
+                    if parsed is None:
+                        continue
+                    ts, data, decision = parsed
+                    if not isinstance(data, str):
+                        data = json.dumps(data, ensure_ascii=False)
+                    rows.append((ts, decision, data))
+                offset += end + 1
+                self._insert(rows, inode, offset)
+                added += len(rows)
+                f.seek(offset)
+        if added == 0:
+            self._insert([], inode, offset)
+        return added
+
+    def _insert(self, rows, inode, offset):
+        # lignes + position dans le journal dans la même transaction : pas de doublon après crash
+        counts = {}
+        for _, decision, _ in rows:
+            counts[decision] = counts.get(decision, 0) + 1
+        with self.db:
+            self.db.executemany("INSERT INTO decisions (ts, decision, input) VALUES (?, ?, ?)", rows)
+            self.db.executemany("INSERT INTO counts (decision, n) VALUES (?, ?) "
+                                "ON CONFLICT (decision) DO UPDATE SET n = n + excluded.n",
+                                counts.items())
+            self.db.executemany("INSERT OR REPLACE INTO source (key, value) VALUES (?, ?)",
+                                [("inode", inode), ("offset", offset)])
+
+    def count(self, decision=None):
+        with self.lock:
+            if decision:
+                row = self.db.execute("SELECT n FROM counts WHERE decision = ?", (decision,)).fetchone()
+            else:
+                row = self.db.execute("SELECT SUM(n) FROM counts").fetchone()
+        return (row[0] or 0) if row else 0
+
+    def page(self, limit=50, decision=None, before_id=None, after_id=None):
+        """
+        Décisions les plus récentes d'abord : liste de dict (id, ts, decision, input).
+        Pagination par clé (keyset) : before_id -> page suivante (plus anciennes), after_id ->
+        page précédente (plus récentes). Coût constant quelle que soit la profondeur.
+        """
+        where, args = self._where(decision, before_id, after_id)
+        # après after_id : on lit vers le haut puis on remet les plus récentes en tête
+        order = "ASC" if after_id is not None and before_id is None else "DESC"
+        sql = f"SELECT id, ts, decision, input FROM decisions{where} ORDER BY id {order} LIMIT ?"
+        with self.lock:
+            rows = self.db.execute(sql, args + [limit]).fetchall()
+        if order == "ASC":
+            rows.reverse()
+        return [dict(zip(("id", "ts", "decision", "input"), r)) for r in rows]
+
+    def has_rows(self, decision=None, before_id=None, after_id=None):
+        """Vrai s'il existe des décisions avant before_id / après after_id (liens de navigation)."""
+        where, args = self._where(decision, before_id, after_id)
+        with self.lock:
+            return self.db.execute(f"SELECT 1 FROM decisions{where} LIMIT 1", args).fetchone() is not None
+
+    @staticmethod
+    def _where(decision, before_id, after_id):
+        clauses, args = [], []
+        if decision:
+            clauses.append("decision = ?")
+            args.append(decision)
+        if before_id is not None:
+            clauses.append("id < ?")
+            args.append(before_id)
+        if after_id is not None:
+            clauses.append("id > ?")
+            args.append(after_id)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    def last_id(self):
+        with self.lock:
+            return self.db.execute("SELECT COALESCE(MAX(id), 0) FROM decisions").fetchone()[0]
+
+    def since(self, last_id, limit=1000):
+        """Décisions indexées après last_id, dans l'ordre (flux temps réel du dashboard)."""
+        with self.lock:
+            rows = self.db.execute("SELECT id, ts, decision, input FROM decisions WHERE id > ? "
+                                   "ORDER BY id LIMIT ?", (last_id, limit)).fetchall()
+        return [dict(zip(("id", "ts", "decision", "input"), r)) for r in rows]
@@ -1,55 +1,236 @@
 # fetch_binance_btc_1m.py
+# Klines Binance -> CSV (+ store OHLCV), en reprise : on repart de la dernière bougie déjà
+# enregistrée (CSV et/ou store) et on ne télécharge que le trou jusqu'à --end.
+#
+# La plage est découpée en fenêtres disjointes de `limit` bougies (une requête chacune),
+# téléchargées en parallèle sur une session HTTP keep-alive partagée, sous un token bucket
+# (--rate requêtes/s, rafale --burst). Les fenêtres sont écrites dans l'ordre, dédoublonnées :
+# un arrêt en cours de route laisse un historique contigu, repris au lancement suivant.
+#
+#   python fetch_binance_btc_1m.py --start 2025-08-01 --out BTCUSDT_1m.csv
+#   python fetch_binance_btc_1m.py --out BTCUSDT_1m.csv                # complète jusqu'à maintenant
+#   python fetch_binance_btc_1m.py --base-url http://127.0.0.1:8081    # serveur local de test
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import requests
-import time
-from datetime import datetime
-
-symbol = "BTCUSDT"
-interval = "1m"  # bougies 1 minute
-start_date = "2025-08-01"
-end_date = "2025-08-08"
-
-# Convertir en timestamps
-start_ts = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp() * 1000)
-end_ts = int(datetime.strptime(end_date, "%Y-%m-%d").timestamp() * 1000)
-
-url = "https://api.binance.com/api/v3/klines"
-
-all_klines = []
-limit = 1000
-current_ts = start_ts
-
-while current_ts < end_ts:
-    params = {
-        "symbol": symbol,
-        "interval": interval,
-        "startTime": current_ts,
-        "endTime": end_ts,
-        "limit": limit
-    }
-    resp = requests.get(url, params=params)
-    data = resp.json()
-
-    if not data:
-        break
-
-    all_klines.extend(data)
-    current_ts = data[-1][0] + 60_000  # +1 min
-    time.sleep(0.5)  # éviter d'être bloqué par l'API
-
-# Convertir en DataFrame
-df = pd.DataFrame(all_klines, columns=[
-    "timestamp", "open", "high", "low", "close", "volume", 
-    "close_time", "quote_asset_volume", "number_of_trades", 
+from requests.adapters import HTTPAdapter
+
+from ohlcv_store import OHLCVStore
+
+BASE_URL = "https://api.binance.com"
+KLINES_PATH = "/api/v3/klines"
+LIMIT = 1000  # bougies max par requête côté Binance
+RETRY_STATUS = {418, 429, 500, 502, 503, 504}
+COLUMNS = [
+    "timestamp", "open", "high", "low", "close", "volume",
+    "close_time", "quote_asset_volume", "number_of_trades",
     "taker_buy_base", "taker_buy_quote", "ignore"
-])
+]
+INTERVAL_MS = {"1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+               "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "1d": 86_400_000}
+
+class TokenBucket:
+    """
+    `rate` jetons/s, au plus `capacity` en réserve ; acquire() attend un jeton (thread-safe).
+    block_until() suspend tous les workers (429 / 418 de Binance : pause commune Retry-After).
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def block_until(self, deadline):
+        """Aucun jeton avant `deadline` (time.monotonic()) ; réserve vidée : pas de rafale ensuite."""
+        with self.lock:
+            self.tokens = 0.0
+            self.updated = max(self.updated, deadline)
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.updated:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    wait = self.updated - now  # pause commune en cours
+            time.sleep(wait)
+
+def to_ms(text):
+    """"2025-08-01" / ISO -> ms epoch (naïf = UTC)."""
+    ts = pd.Timestamp(text)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return ts.value // 1_000_000
+
+def last_csv_ms(path):
+    """Timestamp (ms UTC) de la dernière ligne du CSV, None si absent / vide."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        block = b""
+        while pos > 0 and block.count(b"\n") < 2:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step) + block
+    last = block.rstrip(b"\n").rsplit(b"\n", 1)[-1].decode()
+    if last.startswith("timestamp"):
+        return None
+    return to_ms(last.split(",", 1)[0])
+
+def resume_from(out_csv, store, symbol, interval):
+    """Dernier timestamp déjà enregistré (ms) : (CSV, store), None si vide / non utilisé."""
+    csv_last = last_csv_ms(out_csv) if out_csv else None
+    store_last = None
+    if store:
+        last = OHLCVStore(store).last_timestamp(symbol, interval)
+        store_last = None if last is None else last.value // 1_000_000
+    return csv_last, store_last
+
+def windows(start_ms, end_ms, step_ms, limit=LIMIT):
+    """[start, end) découpé en fenêtres disjointes de `limit` bougies : liste de (début, fin incluse)."""
+    span = step_ms * limit
+    return [(s, min(s + span, end_ms) - 1) for s in range(start_ms, end_ms, span)]
+
+def make_session(pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_window(session, bucket, url, symbol, interval, window, limit=LIMIT, retries=5):
+    """Klines d'une fenêtre (pages successives si le serveur en rend moins que demandé)."""
+    start, end = window
+    rows = []
+    while start <= end:
+        params = {"symbol": symbol, "interval": interval, "startTime": start,
+                  "endTime": end, "limit": limit}
+        for attempt in range(retries + 1):
+            bucket.acquire()
+            try:
+                resp = session.get(url, params=params, timeout=30)
+            except requests.RequestException:
+                if attempt == retries:
+                    raise
+                time.sleep(0.5 * 2 ** attempt)
+                continue
+            if resp.status_code in RETRY_STATUS and attempt < retries:
+                delay = float(resp.headers.get("Retry-After", 0.5 * 2 ** attempt))
+                if resp.status_code in (418, 429):
+                    # limite d'API : pause pour tous les workers (sinon 429 -> ban 418 de l'IP)
+                    bucket.block_until(time.monotonic() + delay)
+                else:
+                    time.sleep(delay)
+                continue
+            resp.raise_for_status()
+            break
+        data = resp.json()
+        if not data:
+            break
+        rows.extend(data)
+        start = data[-1][0] + 1
+    return rows
+
+def to_frame(rows):
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    df = df.drop_duplicates("timestamp").sort_values("timestamp")
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")  # naïf UTC
+    return df
+
+def fetch(symbol="BTCUSDT", interval="1m", start=None, end=None, out_csv=None, store=None,
+          base_url=BASE_URL, concurrency=4, rate=10.0, burst=None, limit=LIMIT):
+    """
+    Télécharge [reprise ou start, end) et l'ajoute au CSV / au store. Retourne le nombre de
+    bougies ajoutées.
+    """
+    step = INTERVAL_MS[interval]
+    end_ms = to_ms(end) if end else int(time.time() * 1000) // step * step  # bougie en cours exclue
+    csv_last, store_last = resume_from(out_csv, store, symbol, interval)
+    # on repart de la sortie la plus en retard (une sortie vide part de `start`)
+    starts = [to_ms(start) if last is None else last + step
+              for last, used in ((csv_last, out_csv), (store_last, store)) if used]
+    start_ms = min(starts) if starts else to_ms(start)
+    if start_ms >= end_ms:
+        print("✅ Déjà à jour")
+        return 0
+
+    todo = windows(start_ms, end_ms, step, limit)
+    print(f"⬇️ {symbol} {interval} : {pd.Timestamp(start_ms, unit='ms')} -> "
+          f"{pd.Timestamp(end_ms, unit='ms')} ({len(todo)} fenêtres, {concurrency} en parallèle)")
+    url = base_url.rstrip("/") + KLINES_PATH
+    bucket = TokenBucket(rate, burst)
+    with make_session(concurrency) as session, ThreadPoolExecutor(concurrency) as pool:
+        results = pool.map(lambda w: fetch_window(session, bucket, url, symbol, interval, w, limit), todo)
+        try:
+            added = _write(results, end_ms, csv_last, out_csv, store, symbol, interval)
+        except BaseException:
+            # fenêtre en échec : on n'attend pas le téléchargement des fenêtres restantes
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return added
 
-# Convertir timestamp en lisible
-df["timestamp"] = pd.to_datetime(df["timestamp"], unit='ms')
+def _write(results, end_ms, csv_last, out_csv, store, symbol, interval):
+    """Écrit les fenêtres au fil de l'eau, dans l'ordre ; retourne le nombre de bougies ajoutées."""
+    added = 0
+    # map rend les fenêtres dans l'ordre : historique contigu même après une interruption
+    for rows in results:
+        rows = [r for r in rows if r[0] < end_ms]
+        if not rows:
+            continue
+        df = to_frame(rows)
+        n = 0
+        if out_csv:
+            new_rows = df if csv_last is None else df[df["timestamp"] > pd.Timestamp(csv_last, unit="ms")]
+            if len(new_rows):
+                new_file = not os.path.exists(out_csv) or os.path.getsize(out_csv) == 0
+                new_rows.to_csv(out_csv, mode="a", header=new_file, index=False)
+                csv_last = to_ms(new_rows["timestamp"].iloc[-1])
+            n = len(new_rows)
+        if store:
+            # le store ne garde que les bougies postérieures à sa dernière
+            numeric = [c for c in df.columns if c != "timestamp"]
+            df[numeric] = df[numeric].astype(float)
+            n = max(n, OHLCVStore(store).append(symbol, interval, df, columns=numeric))
+        added += n
+    return added
 
-# Sauvegarder en CSV
-output_file = f"BTCUSDT_1m_{start_date}_to_{end_date}.csv"
-df.to_csv(output_file, index=False)
+def main():
+    p = argparse.ArgumentParser(description="Klines Binance -> CSV / store, en reprise et en parallèle")
+    p.add_argument("--symbol", default="BTCUSDT")
+    p.add_argument("--interval", default="1m", choices=sorted(INTERVAL_MS))
+    p.add_argument("--start", default="2025-08-01", help="début (UTC) si rien n'est encore enregistré")
+    p.add_argument("--end", default=None, help="fin exclue (UTC) ; défaut : maintenant")
+    p.add_argument("--out", default=None, help="CSV de sortie (défaut : <SYMBOL>_<interval>.csv)")
+    p.add_argument("--store", default=None, help="Racine du store OHLCV (ex: data_store)")
+    p.add_argument("--base-url", default=BASE_URL, help="API Binance (ou serveur local de test)")
+    p.add_argument("--concurrency", type=int, default=4, help="fenêtres téléchargées en parallèle")
+    p.add_argument("--rate", type=float, default=10.0, help="requêtes/s max (token bucket)")
+    p.add_argument("--burst", type=float, default=None, help="rafale max du token bucket")
+    args = p.parse_args()
 
-print(f"✅ Données sauvegardées dans {output_file} ({len(df)} lignes)")
+    out_csv = args.out or f"{args.symbol}_{args.interval}.csv"
+    t0 = time.perf_counter()
+    added = fetch(args.symbol, args.interval, args.start, args.end, out_csv, args.store,
+                  args.base_url, args.concurrency, args.rate, args.burst)
+    print(f"✅ +{added} bougies ({time.perf_counter() - t0:.1f}s) -> {out_csv}")
+    if args.store:
+        print(f"✅ Store: {args.store}/{args.symbol}/{args.interval}")
 
+if __name__ == "__main__":
+    main()
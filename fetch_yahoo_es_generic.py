@@ -2,6 +2,8 @@
 import argparse
 import pandas as pd
 import yfinance as yf
+from ohlcv_store import OHLCVStore
+import session_calendar
 
 def main():
     p = argparse.ArgumentParser(description="Télécharge ES=F en intraday depuis Yahoo Finance.")
@@ -11,6 +13,7 @@ def main():
     p.add_argument("--end",   default="17:30", help="Heure fin fenêtre Europe/Paris")
     p.add_argument("--tz",    default="Europe/Paris", help="Timezone locale")
     p.add_argument("--ticker", default="ES=F", help="Ticker Yahoo (ES=F continu)")
+    p.add_argument("--store", default=None, help="Racine du store OHLCV (ex: data_store) : ajoute les nouvelles bougies")
     args = p.parse_args()
 
     df = yf.download(args.ticker, interval=args.interval, period=args.period,
@@ -34,9 +37,8 @@ def main():
     out = out.rename(columns={out.columns[0]: "timestamp"})
 
     # Filtre horaire (Paris)
-    h_debut = pd.to_datetime(args.start).time()
-    h_fin   = pd.to_datetime(args.end).time()
-    mask = (out["timestamp"].dt.time >= h_debut) & (out["timestamp"].dt.time <= h_fin)
+    mask = session_calendar.window_mask(session_calendar.minute_of_day(out["timestamp"], args.tz),
+                                        (args.start, args.end))
     out_win = out.loc[mask].copy()
 
     # Sauvegardes
@@ -50,5 +52,10 @@ def main():
     print(f"✅ Enregistré {len(out)} lignes -> {full_csv}")
     print(f"✅ Enregistré {len(out_win)} lignes ({args.start}-{args.end}) -> {win_csv}")
 
+    if args.store:
+        symbol = args.ticker.replace("=", "_")
+        added = OHLCVStore(args.store).append(symbol, args.interval, out)
+        print(f"✅ Store: +{added} bougies -> {args.store}/{symbol}/{args.interval}")
+
 if __name__ == "__main__":
     main()
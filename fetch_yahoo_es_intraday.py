@@ -1,5 +1,7 @@
 import pandas as pd
 import yfinance as yf
+from ohlcv_store import OHLCVStore
+import session_calendar
 
 # Paramètres
 TICKER = "ES=F"     # E-mini S&P 500 continu
@@ -8,6 +10,7 @@ PERIOD = "7d"       # Fenêtre max pour 1m sur Yahoo
 LOCAL_TZ = "Europe/Paris"
 FENETRE_DEBUT = "16:00"
 FENETRE_FIN = "17:30"
+STORE_ROOT = None   # ex: "data_store" pour ajouter aussi les bougies au store OHLCV
 
 def main():
     # Téléchargement
@@ -34,9 +37,8 @@ def main():
     out = out.rename(columns={col_date: "timestamp"})
 
     # Filtre horaire (Paris)
-    h_debut = pd.to_datetime(FENETRE_DEBUT).time()
-    h_fin = pd.to_datetime(FENETRE_FIN).time()
-    masque = (out["timestamp"].dt.time >= h_debut) & (out["timestamp"].dt.time <= h_fin)
+    minutes = session_calendar.minute_of_day(out["timestamp"], LOCAL_TZ)
+    masque = session_calendar.window_mask(minutes, (FENETRE_DEBUT, FENETRE_FIN))
     out_win = out.loc[masque].copy()
 
     # Sauvegarde
@@ -48,6 +50,10 @@ def main():
     print(f"✅ Enregistré {len(out)} lignes -> {full_csv}")
     print(f"✅ Enregistré {len(out_win)} lignes (16h-17h30) -> {win_csv}")
 
+    if STORE_ROOT:
+        added = OHLCVStore(STORE_ROOT).append("ES_F", INTERVAL, out)
+        print(f"✅ Store: +{added} bougies -> {STORE_ROOT}/ES_F/{INTERVAL}")
+
 if __name__ == "__main__":
     main()
 
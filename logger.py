@@ -1,13 +1,162 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
 from datetime import datetime
 
 LOG_FILE = "trading.log"
+MAX_BYTES = 10 * 1024 * 1024   # rotation : trading.log -> trading.log.1 -> ... -> .BACKUP_COUNT
+BACKUP_COUNT = 5
+BATCH_SIZE = 256               # écriture dès BATCH_SIZE lignes en attente...
+FLUSH_INTERVAL = 1.0           # ...ou au plus tard après FLUSH_INTERVAL secondes
+
+_STOP = object()
+
+class DecisionLogger:
+    """
+    Journal des décisions en JSON lines, écrit par un thread de fond : log() ne fait qu'empiler
+    dans une file (pas d'open/close ni d'écriture sur le chemin de la requête).
+    Après close(), log() écrit directement dans le fichier (requête tardive pendant l'arrêt).
+    """
+
+    def __init__(self, path=LOG_FILE, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT,
+                 batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.pid = None
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def log(self, data, decision):
+        if self.pid != os.getpid():  # 1er appel, ou process forké (workers uvicorn)
+            self._start()
+        with self.lock:
+            if self.closed:
+                # plus de thread pour vider la file : écriture synchrone
+                f = open(self.path, "a", encoding="utf-8")
+                self._write(f, [format_line(time.time(), data, decision)]).close()
+                return
+            self.queue.put((time.time(), data, decision))
+
+    def flush(self, timeout=5.0):
+        """Bloque jusqu'à ce que tout ce qui a été loggé avant l'appel soit écrit."""
+        if self.thread is None or self.pid != os.getpid():
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Vide la file et arrête le thread ; les log() suivants écrivent de façon synchrone."""
+        with self.lock:
+            # sous le verrou : aucun log() ne peut empiler après _STOP
+            if self.thread is not None and self.pid == os.getpid():
+                self.queue.put(_STOP)
+                self.thread.join(timeout)
+            self.thread = None
+            self.pid = os.getpid()
+            self.closed = True
+
+    def _start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.queue = queue.SimpleQueue()
+            self.pid = os.getpid()
+            self.closed = False
+            self.thread = threading.Thread(target=self._run, name="decision-logger", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        f = open(self.path, "a", encoding="utf-8")
+        pending = []
+        deadline = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None  # délai écoulé -> écriture du lot
+
+                if isinstance(item, tuple):
+                    pending.append(format_line(*item))
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                    if len(pending) < self.batch_size:
+                        continue
+                if pending:
+                    f = self._write(f, pending)
+                    pending, deadline = [], None
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is _STOP:
+                    return
+        finally:
+            if pending:
+                f = self._write(f, pending)
+            f.close()
+
+    def _write(self, f, lines):
+        f.write("".join(lines))
+        f.flush()
+        if f.tell() >= self.max_bytes:
+            f.close()
+            self._rotate()
+            f = open(self.path, "a", encoding="utf-8")
+        return f
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+def format_line(ts, data, decision):
+    entry = {
+        "ts": datetime.fromtimestamp(ts).isoformat(sep=" ", timespec="milliseconds"),
+        "decision": decision,
+        "input": data,
+    }
+    return json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+
+def parse_line(line):
+    """
+    Ligne du journal -> (timestamp, input (dict ou texte), décision), ou None.
+    Lit le format JSON lines et l'ancien format "[ts] INPUT={...} -> DECISION=X".
+    """
+    line = line.strip()
+    if line.startswith("{"):
+        try:
+            entry = json.loads(line)
+            return entry["ts"], entry["input"], entry["decision"]
+        except (ValueError, KeyError):
+            return None
+    if "INPUT=" in line and "-> DECISION=" in line:
+        timestamp, rest = line.split("] ", 1)
+        input_part, decision = rest.split(" -> DECISION=")
+        return timestamp.lstrip("["), input_part[len("INPUT="):], decision
+    return None
+
+_logger = DecisionLogger()
+atexit.register(_logger.close)  # vide la file à l'arrêt
 
 def log_decision(data: dict, decision: str):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    entry = f"[{timestamp}] INPUT={data} -> DECISION={decision}\n"
+    _logger.log(data, decision)
 
-    with open(LOG_FILE, "a") as f:
-        f.write(entry)
+def flush():
+    _logger.flush()
 
 # Exemple d’utilisation
 if __name__ == "__main__":
@@ -1,11 +1,21 @@
 
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from routes.strategy_routes import router as strategy_router
+from routes.stream_routes import router as stream_router
+from services import metrics
 
 app = FastAPI(title="Trading Bot Backend")
 
 app.include_router(strategy_router)
+app.include_router(stream_router)
+app.add_middleware(metrics.MetricsMiddleware)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    # Format texte Prometheus (text/plain; version=0.0.4)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 
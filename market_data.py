@@ -0,0 +1,221 @@
+# market_data.py
+# Chargement OHLCV partagé par les backtests et le replay, avec cache colonnaire binaire.
+#
+# Au 1er chargement d'un CSV, on écrit à côté un dossier .ohlcv_cache/<nom du csv>/ :
+#   meta.json       -> mtime/taille du CSV source, colonnes, dtypes, fuseau
+#   timestamp.npy   -> epoch int64 (UTC) dans l'unité du parse pandas
+#   c<i>.npy        -> une colonne numérique par fichier
+# Les chargements suivants font un np.load(mmap_mode="r") au lieu de re-parser le CSV.
+# Le cache est ignoré (et réécrit) dès que le mtime ou la taille du CSV changent.
+# Une série du store (ohlcv_store, dossier <root>/<SYMBOL>/<TF>) peut aussi être passée
+# à la place d'un CSV : la plage start/end y est alors lue par recherche dichotomique.
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from ohlcv_store import OHLCVSeries, is_series_dir, _epoch_ns, _to_epoch_ns
+
+CACHE_DIR = ".ohlcv_cache"
+CACHE_VERSION = 2
+TIMESTAMP_COLS = ("timestamp", "datetime")
+SYMBOL_COL = "symbol"  # colonne des CSV fusionnés (market_merge)
+# Fuseaux essayés pour les CSV à offsets mixtes (heure d'été / d'hiver des fichiers Yahoo)
+SOURCE_ZONES = ("Europe/Paris",)
+
+def cache_path(csv_path):
+    csv_path = os.path.abspath(csv_path)
+    return os.path.join(os.path.dirname(csv_path), CACHE_DIR, os.path.basename(csv_path))
+
+def _source_stamp(csv_path):
+    st = os.stat(csv_path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+def file_stamp(path):
+    """(mtime ns, taille) : change dès que le fichier est réécrit."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+class FileCache:
+    """
+    Cache LRU en mémoire des résultats calculés à partir de fichiers (thread-safe) :
+    get() rend le résultat gardé pour `key` tant que son stamp (file_stamp...) n'a pas
+    changé, sinon le recalcule (hors verrou). Au plus `size` entrées.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()  # clé -> (stamp, résultat)
+        self.lock = threading.Lock()
+
+    def get(self, key, stamp, compute):
+        with self.lock:
+            hit = self.entries.get(key)
+            if hit is not None and hit[0] == stamp:
+                self.entries.move_to_end(key)
+                return hit[1]
+        result = compute()
+        with self.lock:
+            self.entries[key] = (stamp, result)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return result
+
+def _find_ts_col(columns):
+    for c in columns:
+        if str(c).strip().lower() in TIMESTAMP_COLS:
+            return c
+    return None
+
+def source_zone(text, ts_utc):
+    """
+    (timestamps, fuseau) : ts_utc converti dans le 1er fuseau de SOURCE_ZONES qui redonne
+    l'heure murale écrite dans le fichier (offsets mixtes), sinon (ts_utc, None).
+    """
+    wall = pd.to_datetime(text.astype(str).str.replace(r"(Z|[+-]\d\d:?\d\d)$", "", regex=True))
+    for zone in SOURCE_ZONES:
+        local = ts_utc.dt.tz_convert(zone)
+        if (local.dt.tz_localize(None).to_numpy() == wall.to_numpy()).all():
+            return local, zone
+    return ts_utc, None
+
+def check_single_symbol(df, csv_path):
+    """ValueError si df mélange plusieurs symboles (CSV fusionné par market_merge)."""
+    cols = {str(c).strip().lower(): c for c in df.columns}
+    if SYMBOL_COL in cols:
+        symbols = df[cols[SYMBOL_COL]].dropna().unique()
+        if len(symbols) > 1:
+            raise ValueError(f"{csv_path} : plusieurs symboles ({', '.join(map(str, symbols[:5]))}) ; "
+                             "une série par symbole attendue (un CSV par symbole)")
+
+def _parse(csv_path):
+    """Parse CSV -> (df, meta) ; meta=None si le fichier ne se prête pas au cache."""
+    df = pd.read_csv(csv_path)
+    check_single_symbol(df, csv_path)
+    ts_col = _find_ts_col(df.columns)
+    if ts_col is None:
+        return df, None
+    try:
+        ts = pd.to_datetime(df[ts_col])
+        kind = "fixed" if getattr(ts.dt, "tz", None) is not None else "naive"
+    except ValueError:
+        # Offsets mixtes (heure d'été / d'hiver) : pandas refuse sans utc=True ; on revient
+        # au fuseau d'origine quand il redonne exactement les offsets du fichier, sinon UTC
+        ts, zone = source_zone(df[ts_col], pd.to_datetime(df[ts_col], utc=True))
+        kind = "zone" if zone else "mixed"
+    df[ts_col] = ts
+
+    others = [c for c in df.columns if c != ts_col]
+    if not all(pd.api.types.is_numeric_dtype(df[c]) for c in others):
+        return df, None
+    unit = np.datetime_data(ts.dt.tz_localize(None).dtype if kind != "naive" else ts.dtype)[0]
+    meta = {
+        "version": CACHE_VERSION,
+        "ts_col": ts_col,
+        "ts_kind": kind,
+        "ts_unit": unit,
+        "tz_offset_s": ts.dt.tz.utcoffset(None).total_seconds() if kind == "fixed" else None,
+        "tz_name": str(ts.dt.tz) if kind == "zone" else None,
+        "columns": others,
+        "dtypes": [str(df[c].dtype) for c in others],
+        "order": list(df.columns),
+    }
+    return df, meta
+
+def _epoch(ts, kind):
+    """Timestamps -> int64 epoch UTC (unité d'origine)."""
+    if kind == "naive":
+        return ts.to_numpy().view(np.int64)
+    return ts.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy().view(np.int64)
+
+def _write_cache(csv_path, df, meta):
+    target = cache_path(csv_path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Écriture dans un dossier temporaire puis renommage : pas de cache à moitié écrit
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=os.path.dirname(target))
+    try:
+        os.chmod(tmp, 0o755)
+        np.save(os.path.join(tmp, "timestamp.npy"), _epoch(df[meta["ts_col"]], meta["ts_kind"]))
+        for i, c in enumerate(meta["columns"]):
+            np.save(os.path.join(tmp, f"c{i}.npy"), df[c].to_numpy())
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp, target)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # cache optionnel : dossier en lecture seule, etc.
+
+def _read_cache(csv_path, stamp):
+    target = cache_path(csv_path)
+    try:
+        with open(os.path.join(target, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION or meta.get("source") != stamp:
+        return None
+
+    epoch = np.load(os.path.join(target, "timestamp.npy"), mmap_mode="r")
+    values = np.asarray(epoch).view(f"M8[{meta['ts_unit']}]")
+    if meta["ts_kind"] == "naive":
+        ts = pd.Series(values)
+    else:
+        ts = pd.Series(values).dt.tz_localize("UTC")
+        if meta["ts_kind"] == "fixed":
+            ts = ts.dt.tz_convert(timezone(timedelta(seconds=meta["tz_offset_s"])))
+        elif meta["ts_kind"] == "zone":
+            ts = ts.dt.tz_convert(meta["tz_name"])
+    cols = {meta["ts_col"]: ts}
+    for i, c in enumerate(meta["columns"]):
+        cols[c] = np.load(os.path.join(target, f"c{i}.npy"), mmap_mode="r")
+    df = pd.DataFrame(cols, copy=False)
+    return df[meta["order"]]
+
+def load_ohlcv(csv_path, utc=False, use_cache=True, start=None, end=None):
+    """
+    Lit un CSV OHLCV (ou une série du store) -> DataFrame, colonne timestamp déjà en datetime
+    (comme read_csv + to_datetime). Offsets mixtes -> fuseau d'origine (SOURCE_ZONES), sinon UTC. utc=True : timestamps
+    convertis en UTC (les naïfs sont considérés UTC, comme pd.to_datetime(..., utc=True)).
+    start / end : bornes incluses (naïves = UTC).
+    """
+    if is_series_dir(csv_path):
+        df = OHLCVSeries(csv_path).read(start, end)
+        start = end = None
+    else:
+        df = _load_csv(csv_path, use_cache)
+        if start is not None or end is not None:
+            epoch = _epoch_ns(df[_find_ts_col(df.columns)])
+            keep = np.ones(len(df), dtype=bool)
+            if start is not None:
+                keep &= epoch >= _to_epoch_ns(start)
+            if end is not None:
+                keep &= epoch <= _to_epoch_ns(end)
+            df = df[keep].reset_index(drop=True)
+
+    if utc:
+        ts_col = _find_ts_col(df.columns)
+        if ts_col is not None:
+            df[ts_col] = pd.to_datetime(df[ts_col], utc=True)
+    return df
+
+def _load_csv(csv_path, use_cache):
+    df = None
+    if use_cache:
+        stamp = _source_stamp(csv_path)
+        df = _read_cache(csv_path, stamp)
+        if df is None:
+            df, meta = _parse(csv_path)
+            if meta is not None:
+                meta["source"] = stamp
+                _write_cache(csv_path, df, meta)
+    if df is None:
+        df, _ = _parse(csv_path)
+    return df
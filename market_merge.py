@@ -0,0 +1,121 @@
+# market_merge.py
+# Fusion k-voies, ordonnée par timestamp, de plusieurs sources OHLCV (ES, MES, BTCUSDT...)
+# sur une seule timeline, comme les voit un bot multi-instruments.
+#
+# Chaque source est lue en flux (csv ligne à ligne) et heapq.merge ne garde qu'une bougie en
+# attente par source : la mémoire ne dépend pas de la taille des fichiers. Les timestamps sont
+# normalisés en UTC (offsets "+02:00" des fichiers ES, BTC naïf = UTC). À timestamp égal,
+# l'ordre des sources sur la ligne de commande est conservé.
+#
+#   python market_merge.py ES_F_1m_7jours.csv BTC=BTCUSDT_1m_2025-08-01_to_2025-08-08.csv -o merged.csv
+
+import argparse
+import csv
+import heapq
+import os
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from market_data import _find_ts_col
+
+Bar = namedtuple("Bar", ["timestamp", "symbol", "open", "high", "low", "close", "volume"])
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+def parse_source(spec):
+    """"SYMBOLE=chemin" ou "chemin" (symbole = préfixe du nom de fichier : ES_F_1m... -> ES)."""
+    symbol, sep, path = spec.partition("=")
+    if not sep or not os.path.exists(path) and os.path.exists(spec):
+        path = spec
+        symbol = os.path.basename(spec).split("_")[0].split(".")[0]
+    return symbol, path
+
+def to_utc(text):
+    dt = datetime.fromisoformat(text.strip().replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)  # naïf = UTC (convention de load_ohlcv(utc=True))
+    return dt.astimezone(timezone.utc)
+
+def iter_bars(path, symbol):
+    """Bougies d'un CSV, une à la fois, timestamps en UTC."""
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        lower = [c.strip().lower() for c in header]
+        ts_i = header.index(_find_ts_col(header))
+        cols = [lower.index(c) for c in PRICE_COLUMNS]
+        for row in reader:
+            if not row:
+                continue
+            yield Bar(to_utc(row[ts_i]), symbol, *(float(row[i]) if row[i] else float("nan") for i in cols))
+
+def merge(sources):
+    """
+    sources : liste de chemins / "SYMBOLE=chemin", ou de couples (symbole, itérable de Bar).
+    Retourne un itérateur de Bar ordonné par timestamp UTC.
+    """
+    streams = []
+    specs = [parse_source(src) if isinstance(src, str) else src for src in sources]
+    symbols = [symbol for symbol, _ in specs]
+    for src, (symbol, path) in zip(sources, specs):
+        if isinstance(src, str):
+            if symbols.count(symbol) > 1 and "=" not in src:
+                # ES_F_1m... + ES_F_5m... : même préfixe -> nom du fichier, pour ne pas mélanger
+                # les deux séries dans les indicateurs par symbole
+                symbol = os.path.splitext(os.path.basename(path))[0]
+            streams.append(iter_bars(path, symbol))
+        else:
+            streams.append(iter(path))
+    # heapq.merge : une tête par flux dans le tas ; stable à timestamp égal (ordre des sources)
+    return heapq.merge(*streams, key=lambda bar: bar.timestamp)
+
+def merged_payloads(sources, short=10, long=30, rsi_len=14, start=None, end=None):
+    """
+    Flux fusionné -> (Bar, payload /bot/strategy) ; indicateurs incrémentaux par symbole
+    (streaming_indicators), bougies en warm-up ignorées. start / end : ISO, naïf = UTC.
+    """
+    from streaming_indicators import StreamingIndicators
+
+    start = to_utc(start) if start else None
+    end = to_utc(end) if end else None
+    indicators = {}
+    for bar in merge(sources):
+        if end is not None and bar.timestamp > end:
+            break
+        ind = indicators.get(bar.symbol)
+        if ind is None:
+            ind = indicators[bar.symbol] = StreamingIndicators(short, long, rsi_len)
+        values = ind.update(bar.high, bar.low, bar.close)  # warm-up aussi avant start
+        if (start is None or bar.timestamp >= start) and ind.ready(values):
+            yield bar, dict(values, symbol=bar.symbol, timestamp=bar.timestamp.isoformat())
+
+def merged_frame(sources):
+    """
+    Flux fusionné -> DataFrame (timestamp UTC, symbol, OHLCV), format long : les symboles sont
+    entrelacés. Les backtests et load_ohlcv() travaillent sur une seule série (indicateurs
+    calculés sur toute la colonne close) : load_ohlcv() refuse un CSV à plusieurs symboles,
+    les indicateurs se calculent par symbole (df.groupby("symbol"), ou merged_payloads()).
+    """
+    df = pd.DataFrame(merge(sources), columns=Bar._fields)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    return df
+
+def write_csv(sources, out_path):
+    """Écrit le flux fusionné en CSV, ligne à ligne. Retourne le nombre de bougies."""
+    n = 0
+    with open(out_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(Bar._fields)
+        for bar in merge(sources):
+            writer.writerow([bar.timestamp.isoformat(sep=" ")] + list(bar[1:]))
+            n += 1
+    return n
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Fusion k-voies de CSV OHLCV sur une timeline UTC")
+    p.add_argument("sources", nargs="+", help="CSV OHLCV, éventuellement SYMBOLE=chemin")
+    p.add_argument("-o", "--out", default="merged_ohlcv.csv")
+    args = p.parse_args()
+    n = write_csv(args.sources, args.out)
+    print(f"✅ {n} bougies fusionnées ({len(args.sources)} sources) -> {args.out}")
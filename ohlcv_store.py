@@ -0,0 +1,174 @@
+# ohlcv_store.py
+# Stockage OHLCV sur disque, append-only, un dossier par symbole / timeframe :
+#
+#   <root>/<SYMBOL>/<TF>/meta.json     -> colonnes, fuseau d'affichage
+#   <root>/<SYMBOL>/<TF>/timestamp.i8  -> epoch ns UTC (int64), strictement croissant = l'index
+#   <root>/<SYMBOL>/<TF>/bars.f8       -> une ligne float64 par bougie (colonnes de meta.json)
+#
+# Lecture d'une plage : recherche dichotomique (np.searchsorted) dans timestamp.i8 mappé en
+# mémoire, puis memmap des seules lignes utiles de bars.f8 -> seules les pages nécessaires
+# sont lues. Ajout : uniquement les bougies postérieures à la dernière stockée, écrites en
+# fin de fichier (l'historique n'est jamais réécrit).
+
+import json
+import os
+from datetime import timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = "data_store"
+DEFAULT_COLUMNS = ["open", "high", "low", "close", "volume"]
+META = "meta.json"
+TS_FILE = "timestamp.i8"
+BARS_FILE = "bars.f8"
+
+def is_series_dir(path):
+    """Vrai si `path` est un dossier <root>/<SYMBOL>/<TF> du store."""
+    return os.path.isfile(os.path.join(path, META)) and os.path.isfile(os.path.join(path, TS_FILE))
+
+def _tz_meta(ts):
+    tz = getattr(ts.dt, "tz", None)
+    if tz is None:
+        return None
+    key = getattr(tz, "key", None) or getattr(tz, "zone", None)
+    if key:
+        return {"name": key}
+    return {"offset_s": tz.utcoffset(None).total_seconds()}
+
+def _tz_from_meta(meta):
+    if meta is None:
+        return None
+    if "name" in meta:
+        return meta["name"]
+    return timezone(timedelta(seconds=meta["offset_s"]))
+
+class OHLCVSeries:
+    """Une série <SYMBOL>/<TF> du store."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META)) as f:
+            self.meta = json.load(f)
+        self.columns = self.meta["columns"]
+
+    def __len__(self):
+        # min() : un ajout interrompu ne laisse jamais de ligne sans timestamp (ou l'inverse)
+        n_ts = os.path.getsize(os.path.join(self.path, TS_FILE)) // 8
+        n_bars = os.path.getsize(os.path.join(self.path, BARS_FILE)) // (8 * len(self.columns))
+        return min(n_ts, n_bars)
+
+    def _timestamps(self, n):
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.memmap(os.path.join(self.path, TS_FILE), dtype=np.int64, mode="r", shape=(n,))
+
+    def last_timestamp(self):
+        """Dernier timestamp stocké (pd.Timestamp UTC) ou None."""
+        n = len(self)
+        if n == 0:
+            return None
+        return pd.Timestamp(int(self._timestamps(n)[-1]), unit="ns", tz="UTC")
+
+    def read(self, start=None, end=None):
+        """Bougies avec start <= timestamp <= end (bornes incluses, None = ouvert)."""
+        n = len(self)
+        ts = self._timestamps(n)
+        lo = 0 if start is None else int(np.searchsorted(ts, _to_epoch_ns(start), side="left"))
+        hi = n if end is None else int(np.searchsorted(ts, _to_epoch_ns(end), side="right"))
+        hi = max(hi, lo)
+
+        ncols = len(self.columns)
+        if hi > lo:
+            bars = np.memmap(os.path.join(self.path, BARS_FILE), dtype=np.float64, mode="r",
+                             offset=lo * ncols * 8, shape=(hi - lo, ncols))
+            bars = np.array(bars)
+            epoch = np.array(ts[lo:hi])
+        else:
+            bars = np.empty((0, ncols))
+            epoch = np.empty(0, dtype=np.int64)
+
+        stamps = pd.Series(epoch.view("M8[ns]"))
+        tz = _tz_from_meta(self.meta.get("tz"))
+        if tz is not None:
+            stamps = stamps.dt.tz_localize("UTC").dt.tz_convert(tz)
+        df = pd.DataFrame(bars, columns=self.columns)
+        df.insert(0, "timestamp", stamps)
+        return df
+
+    def append(self, df):
+        """
+        Ajoute les bougies de `df` (colonne timestamp + colonnes de la série) postérieures à la
+        dernière stockée. Retourne le nombre de bougies ajoutées.
+        """
+        n = len(self)
+        self._truncate(n)  # répare un éventuel ajout interrompu
+        epoch = _epoch_ns(df["timestamp"])
+        order = np.argsort(epoch, kind="stable")
+        epoch = epoch[order]
+        bars = df[self.columns].to_numpy(dtype=np.float64)[order]
+
+        last = int(self._timestamps(n)[-1]) if n else None
+        keep = np.r_[True, epoch[1:] != epoch[:-1]]  # doublons internes : 1ère occurrence
+        if last is not None:
+            keep &= epoch > last
+        epoch, bars = epoch[keep], np.ascontiguousarray(bars[keep])
+        if len(epoch) == 0:
+            return 0
+
+        # Lignes d'abord, index ensuite : l'index ne pointe jamais vers une ligne absente
+        with open(os.path.join(self.path, BARS_FILE), "ab") as f:
+            f.write(bars.tobytes())
+        with open(os.path.join(self.path, TS_FILE), "ab") as f:
+            f.write(epoch.astype(np.int64).tobytes())
+        return len(epoch)
+
+    def _truncate(self, n):
+        for name, row_bytes in ((TS_FILE, 8), (BARS_FILE, 8 * len(self.columns))):
+            p = os.path.join(self.path, name)
+            if os.path.getsize(p) != n * row_bytes:
+                os.truncate(p, n * row_bytes)
+
+class OHLCVStore:
+    """Racine du store : une OHLCVSeries par (symbole, timeframe)."""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+
+    def series_path(self, symbol, timeframe):
+        return os.path.join(self.root, symbol, timeframe)
+
+    def series(self, symbol, timeframe, columns=None, tz=None):
+        """Ouvre (ou crée avec `columns` / `tz`) la série symbol/timeframe."""
+        path = self.series_path(symbol, timeframe)
+        if not is_series_dir(path):
+            os.makedirs(path, exist_ok=True)
+            for name in (TS_FILE, BARS_FILE):
+                open(os.path.join(path, name), "ab").close()
+            meta = {"symbol": symbol, "timeframe": timeframe,
+                    "columns": list(columns or DEFAULT_COLUMNS), "tz": tz}
+            with open(os.path.join(path, META), "w") as f:
+                json.dump(meta, f)
+        return OHLCVSeries(path)
+
+    def append(self, symbol, timeframe, df, columns=None):
+        """Ajoute un DataFrame (timestamp + OHLCV). Crée la série au 1er appel."""
+        cols = columns or [c for c in DEFAULT_COLUMNS if c in df.columns]
+        return self.series(symbol, timeframe, cols, _tz_meta(df["timestamp"])).append(df)
+
+    def read(self, symbol, timeframe, start=None, end=None):
+        return OHLCVSeries(self.series_path(symbol, timeframe)).read(start, end)
+
+    def last_timestamp(self, symbol, timeframe):
+        path = self.series_path(symbol, timeframe)
+        return OHLCVSeries(path).last_timestamp() if is_series_dir(path) else None
+
+def _to_epoch_ns(value):
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")  # bornes naïves = UTC, comme les données naïves
+    return ts.tz_convert("UTC").as_unit("ns").value
+
+def _epoch_ns(timestamps):
+    ts = pd.to_datetime(timestamps, utc=True)
+    return ts.dt.tz_localize(None).astype("M8[ns]").to_numpy().view(np.int64)
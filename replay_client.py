@@ -0,0 +1,93 @@
+# replay_client.py
+# Client async de replay : un pool de connexions keep-alive (httpx), N requêtes en vol,
+# résultats rendus dans l'ordre des bougies, retry avec backoff, cadence max optionnelle.
+#
+#   from replay_client import replay
+#   for i, resp in replay(url, payloads, concurrency=16, max_rate=None):  # None = vitesse serveur
+#       ...  # resp : httpx.Response, ou l'exception après épuisement des retries
+
+import asyncio
+import random
+import time
+
+import httpx
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+class RateLimiter:
+    """
+    Créneaux espacés de 1 / rate sur une échéance absolue (pas de dérive due au temps de
+    requête) ; en cas de retard, pas de rafale de rattrapage.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next = None
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = now if self.next is None else max(self.next, now)
+        self.next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class ReplayClient:
+    def __init__(self, url, concurrency=8, max_rate=None, retries=3, backoff=0.2, timeout=10.0):
+        self.url = url
+        self.concurrency = max(1, concurrency)
+        self.limiter = RateLimiter(max_rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+    async def _post(self, http, payload):
+        for attempt in range(self.retries + 1):
+            await self.limiter.wait()
+            try:
+                resp = await http.post(self.url, json=payload)
+                if resp.status_code not in RETRY_STATUS or attempt == self.retries:
+                    return resp
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    return e
+            # backoff exponentiel + jitter
+            await asyncio.sleep(self.backoff * 2 ** attempt * (0.5 + random.random()))
+
+    async def run(self, payloads, on_result=None):
+        """
+        POST de chaque payload ; on_result(i, réponse) est appelé dans l'ordre des payloads.
+        Retourne la liste des réponses (même ordre).
+        """
+        payloads = list(payloads)
+        results = [None] * len(payloads)
+        done = [False] * len(payloads)
+        next_out = 0
+        todo = iter(range(len(payloads)))
+        limits = httpx.Limits(max_connections=self.concurrency,
+                              max_keepalive_connections=self.concurrency)
+
+        async def worker(http):
+            nonlocal next_out
+            for i in todo:  # itérateur partagé : chaque index n'est pris qu'une fois
+                results[i] = await self._post(http, payloads[i])
+                done[i] = True
+                # émission ordonnée : tout ce qui est prêt depuis le dernier index émis
+                while next_out < len(payloads) and done[next_out]:
+                    if on_result is not None:
+                        on_result(next_out, results[next_out])
+                    next_out += 1
+
+        async with httpx.AsyncClient(limits=limits, timeout=self.timeout) as http:
+            await asyncio.gather(*(worker(http) for _ in range(self.concurrency)))
+        return results
+
+def replay(url, payloads, concurrency=8, max_rate=None, retries=3, backoff=0.2, timeout=10.0):
+    """Version synchrone : liste de (index, réponse) dans l'ordre des payloads."""
+    client = ReplayClient(url, concurrency, max_rate, retries, backoff, timeout)
+    return list(enumerate(asyncio.run(client.run(payloads))))
+
+def run(url, payloads, on_result, **kwargs):
+    """Version synchrone avec callback ordonné (affichage au fil de l'eau)."""
+    return asyncio.run(ReplayClient(url, **kwargs).run(payloads, on_result))
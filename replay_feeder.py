@@ -2,6 +2,7 @@ import argparse, time, json, math
 from datetime import datetime
 import pandas as pd
 import requests
+from market_data import load_ohlcv
 
 BACKEND_URL = "https://backend-1055832982794.europe-west1.run.app/bot/strategy"
 
@@ -13,7 +14,8 @@ def rsi(series, period=14):
     return 100 - (100 / (1 + rs))
 
 def load_data(path, start=None, end=None):
-    df = pd.read_csv(path)
+    # CSV (cache colonnaire) ou série du store : la plage y est lue directement
+    df = load_ohlcv(path, utc=True, start=start, end=end)
     cols = {c.lower(): c for c in df.columns}
     need = ["timestamp","open","high","low","close","volume"]
     for n in need:
@@ -23,10 +25,6 @@ def load_data(path, start=None, end=None):
     df = df.rename(columns={cols["open"]:"open", cols["high"]:"high",
                             cols["low"]:"low", cols["close"]:"close",
                             cols["volume"]:"volume"})
-    if start:
-        df = df[df["timestamp"] >= pd.to_datetime(start, utc=True)]
-    if end:
-        df = df[df["timestamp"] <= pd.to_datetime(end, utc=True)]
     df = df.sort_values("timestamp").reset_index(drop=True)
     return df
 
@@ -38,11 +36,155 @@ def compute_indicators(df, short=10, long=30, rsi_len=14):
     df["resistance"]= df["high"].rolling(long).max()
     return df
 
-def run_replay(csv_path, speed, sleep_sec, start=None, end=None):
+FIELDS = ["price", "resistance", "support", "short_ma", "long_ma", "rsi"]
+
+def run_replay_batch(df, speed, sleep_sec, batch_size):
+    """Envoie les bougies par lots de batch_size sur /bot/strategy/batch (format colonnes)."""
+    df = df.dropna(subset=["short_ma", "long_ma", "rsi"]).rename(columns={"close": "price"})
+    sent = 0
+    session = requests.Session()
+    for i in range(0, len(df), batch_size):
+        batch = df.iloc[i:i + batch_size]
+        payload = {f: batch[f].astype(float).tolist() for f in FIELDS}
+        try:
+            resp = session.post(BACKEND_URL + "/batch", json=payload, timeout=30)
+            resp.raise_for_status()
+            decisions = resp.json()["decisions"]
+            for ts, decision in zip(batch["timestamp"], decisions):
+                print(f"[{ts}] sent -> decision={{'decision': '{decision}'}}")
+        except Exception as e:
+            print(f"POST error: {e}")
+
+        # même cadence moyenne qu'en mode bougie par bougie
+        time.sleep(sleep_sec * len(batch) / max(speed, 1))
+        sent += len(batch)
+
+    print(f"Replay terminé. Bougies envoyées: {sent}")
+
+def stream_url():
+    # https://.../bot/strategy -> wss://.../bot/stream
+    return BACKEND_URL.replace("http", "ws", 1).rsplit("/", 1)[0] + "/stream"
+
+def run_replay_ws(df, ws_url, speed, sleep_sec, batch_size=1):
+    """Envoie les bougies brutes sur le WebSocket /bot/stream : indicateurs calculés côté serveur."""
+    from websockets.sync.client import connect
+
+    sent = 0
+    with connect(ws_url) as ws:
+        for i in range(0, len(df), batch_size):
+            batch = df.iloc[i:i + batch_size]
+            bars = [{"timestamp": ts.isoformat(), "open": float(o), "high": float(h),
+                     "low": float(l), "close": float(c), "volume": float(v)}
+                    for ts, o, h, l, c, v in zip(batch["timestamp"], batch["open"], batch["high"],
+                                                 batch["low"], batch["close"], batch["volume"])]
+            ws.send(json.dumps(bars if batch_size > 1 else bars[0]))
+            replies = json.loads(ws.recv())
+            for reply in (replies if batch_size > 1 else [replies]):
+                if reply.get("ready"):  # warm-up : rien n'est envoyé en mode HTTP non plus
+                    print(f"[{reply['timestamp']}] sent -> decision={reply['decision']}")
+                    sent += 1
+                elif "error" in reply:
+                    print(f"WS error: {reply['error']}")
+
+            time.sleep(sleep_sec * len(batch) / max(speed, 1))
+
+    print(f"Replay terminé. Bougies envoyées: {sent}")
+
+def run_replay_async(df, batch_size=1, concurrency=8, max_rate=None):
+    """
+    Replay via replay_client : connexions keep-alive, `concurrency` requêtes en vol, sorties
+    dans l'ordre des bougies. Cadence : max_rate req/s, sinon vitesse du serveur
+    (--speed / --sleep ne s'appliquent qu'au mode séquentiel).
+    """
+    import replay_client
+
+    df = df.dropna(subset=["short_ma", "long_ma", "rsi"]).rename(columns={"close": "price"})
+    stamps = df["timestamp"].tolist()
+    if batch_size > 1:
+        url = BACKEND_URL + "/batch"
+        payloads = [{f: df[f].iloc[i:i + batch_size].astype(float).tolist() for f in FIELDS}
+                    for i in range(0, len(df), batch_size)]
+    else:
+        url = BACKEND_URL
+        payloads = [dict({f: float(v) for f, v in zip(FIELDS, row)}, timestamp=ts.isoformat())
+                    for row, ts in zip(df[FIELDS].itertuples(index=False), stamps)]
+    sent = 0
+
+    def on_result(i, resp):
+        nonlocal sent
+        batch_stamps = stamps[i * batch_size:(i + 1) * batch_size]
+        try:
+            if isinstance(resp, Exception):
+                raise resp
+            resp.raise_for_status()
+            body = resp.json()
+        except Exception as e:
+            print(f"POST error: {e}")
+            return
+        if batch_size > 1:
+            for ts, decision in zip(batch_stamps, body["decisions"]):
+                print(f"[{ts}] sent -> decision={{'decision': '{decision}'}}")
+        else:
+            print(f"[{batch_stamps[0]}] sent -> decision={body}")
+        sent += len(batch_stamps)
+
+    t0 = time.perf_counter()
+    replay_client.run(url, payloads, on_result, concurrency=concurrency, max_rate=max_rate)
+    elapsed = time.perf_counter() - t0
+    print(f"Replay terminé. Bougies envoyées: {sent} ({sent / max(elapsed, 1e-9):.0f} bougies/s)")
+
+def run_replay_merged(sources, speed, sleep_sec, start=None, end=None, local=None, realtime=False):
+    """
+    Plusieurs CSV (ES, BTC...) fusionnés sur une timeline UTC (market_merge) : une bougie en
+    mémoire par source, indicateurs incrémentaux par symbole, payload avec "symbol".
+    local : en mémoire via replay_local (horloge virtuelle, --realtime, stats).
+    """
+    import market_merge
+
+    merged = market_merge.merged_payloads(sources, start=start, end=end)
+    if local:
+        import replay_local
+        return replay_local.run_payloads(((bar.timestamp, payload) for bar, payload in merged),
+                                         replay_local.load_strategy(local), speed=speed,
+                                         realtime=realtime)
+    session = requests.Session()  # keep-alive : une connexion pour tout le replay
+    sent = 0
+    for bar, market_data in merged:
+        try:
+            resp = session.post(BACKEND_URL, json=market_data, timeout=10)
+            resp.raise_for_status()
+            decision = resp.json()
+            print(f"[{bar.timestamp}] {bar.symbol} sent -> decision={decision}")
+        except Exception as e:
+            print(f"POST error: {e}")
+
+        time.sleep(sleep_sec / max(speed, 1))
+        sent += 1
+
+    print(f"Replay terminé. Bougies envoyées: {sent}")
+
+def run_replay(csv_path, speed, sleep_sec, start=None, end=None, batch_size=1, ws_url=None,
+               concurrency=1, max_rate=None, local=None, realtime=False):
+    if isinstance(csv_path, (list, tuple)):
+        if len(csv_path) > 1:
+            return run_replay_merged(csv_path, speed, sleep_sec, start, end, local, realtime)
+        csv_path = csv_path[0]
     df = load_data(csv_path, start, end)
+    if local:
+        # en mémoire, sans HTTP : local = "module:fonction" de la stratégie
+        import replay_local
+        return replay_local.run_local(compute_indicators(df), replay_local.load_strategy(local),
+                                      speed=speed, realtime=realtime)
+    if ws_url:
+        return run_replay_ws(df, ws_url, speed, sleep_sec, batch_size)
     df = compute_indicators(df)
+    if concurrency > 1 or max_rate is not None:
+        return run_replay_async(df, batch_size, concurrency, max_rate)
+    if batch_size > 1:
+        return run_replay_batch(df, speed, sleep_sec, batch_size)
 
     sent = 0
+    session = requests.Session()  # keep-alive : une connexion pour tout le replay
     for _, row in df.iterrows():
         if math.isnan(row["short_ma"]) or math.isnan(row["long_ma"]) or math.isnan(row["rsi"]):
             continue
@@ -56,7 +198,7 @@ def run_replay(csv_path, speed, sleep_sec, start=None, end=None):
             "timestamp": row["timestamp"].isoformat(),
         }
         try:
-            resp = requests.post(BACKEND_URL, json=market_data, timeout=10)
+            resp = session.post(BACKEND_URL, json=market_data, timeout=10)
             resp.raise_for_status()
             decision = resp.json()
             print(f"[{row['timestamp']}] sent -> decision={decision}")
@@ -70,11 +212,29 @@ def run_replay(csv_path, speed, sleep_sec, start=None, end=None):
 
 if __name__ == "__main__":
     p = argparse.ArgumentParser(description="Replay feeder -> backend")
-    p.add_argument("--file", required=True, help="Chemin CSV OHLCV")
+    p.add_argument("--file", required=True, nargs="+",
+                   help="Chemin CSV OHLCV ou série du store (data_store/<SYMBOL>/<TF>) ; "
+                        "plusieurs CSV (SYMBOLE=chemin possible) = flux fusionné par timestamp UTC")
     p.add_argument("--speed", type=float, default=1.0, help=">1 = plus rapide")
     p.add_argument("--sleep", type=float, default=1.0, help="secondes entre bougies (avant speed)")
     p.add_argument("--start", type=str, default=None, help="ISO start (ex: 2024-03-01T14:30:00Z)")
     p.add_argument("--end", type=str, default=None, help="ISO end")
+    p.add_argument("--batch-size", type=int, default=1,
+                   help="bougies par requête (>1 = POST /bot/strategy/batch)")
+    p.add_argument("--ws", nargs="?", const=stream_url(), default=None, metavar="URL",
+                   help="bougies brutes via le WebSocket /bot/stream (indicateurs côté serveur)")
+    p.add_argument("--concurrency", type=int, default=1,
+                   help="requêtes HTTP en vol (>1 = client async keep-alive, résultats ordonnés ; "
+                        "--sleep ignoré, voir --max-rate)")
+    p.add_argument("--max-rate", type=float, default=None,
+                   help="requêtes/s max du client async (défaut : pas de limite, vitesse du serveur)")
+    p.add_argument("--local", nargs="?", const="services.strategy_service:evaluate_strategy",
+                   default=None, metavar="MODULE:FONCTION",
+                   help="replay en mémoire sans HTTP (stratégie appelée directement)")
+    p.add_argument("--realtime", action="store_true",
+                   help="avec --local : cadence sur les timestamps des bougies / speed (échéances absolues)")
     args = p.parse_args()
 
-    run_replay(args.file, args.speed, args.sleep, start=args.start, end=args.end)
+    run_replay(args.file, args.speed, args.sleep, start=args.start, end=args.end,
+               batch_size=args.batch_size, ws_url=args.ws, concurrency=args.concurrency,
+               max_rate=args.max_rate, local=args.local, realtime=args.realtime)
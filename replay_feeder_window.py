@@ -1,26 +1,29 @@
 # replay_feeder_window.py
-import csv, json, time, requests
-from datetime import datetime, time as dtime, timezone
+import csv
+import pandas as pd
+import replay_client
+import session_calendar
 
 BACKEND_URL = "https://backend-1055832982794.europe-west1.run.app/bot/strategy"
 CSV_PATH = "data/mes_2m_2024.csv"  # <-- ton fichier (mets le bon chemin)
+CONCURRENCY = 8     # requêtes en vol (connexions keep-alive réutilisées)
+MAX_RATE = 5.0      # cadence max en req/s (~ l'ancien sleep(0.2)) ; None = vitesse du serveur
 
-# Fenêtre heure FR (16:00 -> 17:30)
-START_FR = dtime(16, 0)
-END_FR   = dtime(17, 30)
+# Fenêtre heure FR (16:00 -> 17:30), heure de Paris été / hiver
+START_FR = "16:00"
+END_FR   = "17:30"
 
 def in_window_utc(ts_iso: str) -> bool:
     """
-    Attend un timestamp ISO en UTC, ex: 2024-06-12T16:02:00Z
-    (Si ton CSV est déjà en heure FR, retire la conversion ou adapte.)
+    Attend un timestamp ISO en UTC, ex: 2024-06-12T16:02:00Z (naïf = UTC).
+    Converti en heure de Paris (heure d'été / d'hiver) avant la comparaison.
     """
-    # Convertit la chaîne ISO 'Z' en objet datetime UTC
-    dt_utc = datetime.fromisoformat(ts_iso.replace("Z", "+00:00")).astimezone(timezone.utc)
-    # ⚠️ Simplification: on compare l'heure UTC à la fenêtre FR.
-    # Pour être ultra exact avec les décalages saisonniers, remplace par un champ heure FR dans le CSV,
-    # ou utilise zoneinfo("Europe/Paris") pour convertir.
-    t = dt_utc.time()
-    return START_FR <= t <= END_FR
+    return bool(in_window(pd.Series([ts_iso]))[0])
+
+def in_window(stamps):
+    """Version vectorisée : masque des timestamps (UTC) dans la fenêtre 16:00-17:30 FR."""
+    minutes = session_calendar.minute_of_day(pd.to_datetime(stamps, utc=True, format="ISO8601"))
+    return session_calendar.window_mask(minutes, (START_FR, END_FR))
 
 def row_to_payload(row: dict) -> dict:
     """
@@ -44,24 +47,31 @@ def row_to_payload(row: dict) -> dict:
     }
 
 def main():
-    sent = 0
+    rows = []
     with open(CSV_PATH, newline="") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            ts = row.get("timestamp")  # ex: "2024-06-12T16:02:00Z"
-            if not ts:
-                continue
-            if not in_window_utc(ts):
-                continue
+            if row.get("timestamp"):  # ex: "2024-06-12T16:02:00Z"
+                rows.append(row)
+
+    # fenêtre calculée d'un coup sur toute la colonne (pas de parse ligne à ligne)
+    mask = in_window([row["timestamp"] for row in rows]) if rows else []
+    stamps = [row["timestamp"] for row, keep in zip(rows, mask) if keep]
+    payloads = [row_to_payload(row) for row, keep in zip(rows, mask) if keep]
+
+    sent = 0
+
+    def on_result(i, resp):
+        nonlocal sent
+        if isinstance(resp, Exception):
+            print("ERR", resp)
+            return
+        print(stamps[i], resp.status_code, resp.text)
+        sent += 1
 
-            payload = row_to_payload(row)
-            try:
-                resp = requests.post(BACKEND_URL, json=payload, timeout=5)
-                print(ts, resp.status_code, resp.text)
-                sent += 1
-                time.sleep(0.2)  # cadence (~5 req/s); ajuste si besoin
-            except Exception as e:
-                print("ERR", e)
+    # réponses affichées dans l'ordre des bougies, même si plusieurs requêtes sont en vol
+    replay_client.run(BACKEND_URL, payloads, on_result, concurrency=CONCURRENCY,
+                      max_rate=MAX_RATE, timeout=5)
     print("Envoyé:", sent, "bougies dans la fenêtre 16:00–17:30 FR")
 
 if __name__ == "__main__":
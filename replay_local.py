@@ -0,0 +1,103 @@
+# replay_local.py
+# Replay en mémoire, sans HTTP : la stratégie (services.strategy_service.evaluate_strategy par
+# défaut, ou "module:fonction") est appelée directement sur chaque bougie.
+#
+# Horloge virtuelle : le temps du replay est celui de la bougie courante.
+#   - mode rapide (défaut) : aucune attente, on mesure le débit brut de la stratégie ;
+#   - mode temps réel : la bougie k est traitée à l'échéance absolue
+#     t0 + (ts_k - ts_0) / speed -> le temps de calcul ne s'ajoute pas à la cadence (pas de dérive).
+# Rapport : bougies/s, latence de la stratégie (p50 / p99), retard max sur l'échéance.
+
+import importlib
+import time
+
+import numpy as np
+
+FIELDS = ["price", "resistance", "support", "short_ma", "long_ma", "rsi"]
+DEFAULT_STRATEGY = "services.strategy_service:evaluate_strategy"
+
+def load_strategy(spec=DEFAULT_STRATEGY):
+    """"module:fonction" -> fonction(dict) -> "BUY" / "SELL" / "HOLD"."""
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name or "evaluate_strategy")
+
+class VirtualClock:
+    def __init__(self, speed=1.0, realtime=False):
+        self.speed = max(speed, 1e-9)
+        self.realtime = realtime
+        self.start_wall = None
+        self.start_bar = None
+        self.now = None  # timestamp de la bougie courante (temps simulé)
+
+    def advance(self, ts):
+        """Passe à la bougie `ts` ; en temps réel, attend son échéance. Retourne le retard (s)."""
+        self.now = ts
+        if not self.realtime:
+            return 0.0
+        if self.start_wall is None:
+            self.start_wall, self.start_bar = time.perf_counter(), ts
+        deadline = self.start_wall + (ts - self.start_bar).total_seconds() / self.speed
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+            return 0.0
+        return -delay
+
+def run_local(df, strategy=None, speed=1.0, realtime=False, verbose=None):
+    """
+    Rejoue df (sortie de replay_feeder.compute_indicators) bougie par bougie en appelant
+    strategy(payload). Retourne les stats (bougies, bougies/s, latences, décisions).
+    """
+    df = df.dropna(subset=["short_ma", "long_ma", "rsi"]).rename(columns={"close": "price"})
+    stamps = df["timestamp"].tolist()
+    rows = df[FIELDS].to_numpy(dtype=np.float64).tolist()
+    payloads = (dict(zip(FIELDS, row)) for row in rows)
+    return run_payloads(zip(stamps, payloads), strategy, speed, realtime, verbose)
+
+def run_payloads(items, strategy=None, speed=1.0, realtime=False, verbose=None):
+    """
+    Rejoue un flux de (timestamp, payload) (ex. market_merge.merged_payloads, plusieurs
+    symboles) sur l'horloge virtuelle en appelant strategy(payload). Mêmes stats que run_local.
+    """
+    strategy = strategy or load_strategy()
+    verbose = realtime if verbose is None else verbose
+    clock = VirtualClock(speed, realtime)
+
+    latencies = []
+    counts = {}
+    max_lag = 0.0
+    t0 = time.perf_counter()
+    for ts, payload in items:
+        max_lag = max(max_lag, clock.advance(ts))
+        t = time.perf_counter()
+        decision = strategy(payload)
+        latencies.append(time.perf_counter() - t)
+        counts[decision] = counts.get(decision, 0) + 1
+        if verbose:
+            symbol = f" {payload['symbol']}" if "symbol" in payload else ""
+            print(f"[{ts}]{symbol} -> decision={decision}")
+    elapsed = time.perf_counter() - t0
+
+    lat_us = np.array(latencies) * 1e6
+    n = len(latencies)
+    stats = {
+        "bars": n,
+        "elapsed_s": elapsed,
+        "bars_per_s": n / elapsed if elapsed > 0 else float("inf"),
+        "strategy_p50_us": float(np.percentile(lat_us, 50)) if n else 0.0,
+        "strategy_p99_us": float(np.percentile(lat_us, 99)) if n else 0.0,
+        "strategy_share": float(sum(latencies) / elapsed) if elapsed > 0 else 0.0,
+        "max_lag_s": max_lag,
+        "decisions": counts,
+    }
+    report(stats, realtime)
+    return stats
+
+def report(stats, realtime=False):
+    print(f"📼 Replay local terminé : {stats['bars']} bougies en {stats['elapsed_s']:.3f}s "
+          f"({stats['bars_per_s']:.0f} bougies/s)")
+    print(f"⏱️ Stratégie : p50={stats['strategy_p50_us']:.1f} µs | p99={stats['strategy_p99_us']:.1f} µs "
+          f"| {100 * stats['strategy_share']:.0f}% du temps total")
+    if realtime:
+        print(f"🕒 Retard max sur l'échéance : {1000 * stats['max_lag_s']:.2f} ms")
+    print("📊 " + " | ".join(f"{d}: {n}" for d, n in sorted(stats["decisions"].items())))
@@ -0,0 +1,175 @@
+# resampler.py
+# Bougies 5m / 15m / 1h / 4h / 1d dérivées de la série la plus fine (1m), au lieu d'un
+# téléchargement Yahoo par timeframe.
+#
+# Seaux alignés sur la séance : ancrés sur l'ouverture (ES : 17:00 America/Chicago, CME Globex),
+# jamais à cheval sur deux séances (le dernier seau avant l'ouverture suivante est tronqué si
+# la durée de la séance n'est pas un multiple du timeframe). Calcul vectorisé : minute du jour
+# en heure de séance (session_calendar), clé de seau = minute - (minutes depuis l'ouverture
+# modulo timeframe), puis reduceat sur les groupes contigus. Timestamp d'une bougie = début du seau.
+#
+# Cache :
+#   - CSV : résultat gardé en mémoire par (fichier, timeframe), invalidé sur mtime / taille ;
+#   - store OHLCV : les seaux clos sont écrits dans <root>/<SYMBOL>/<TF> ; update_store() ne
+#     relit que les bougies 1m postérieures au dernier seau stocké et ne recalcule que les seaux
+#     de queue (le dernier, encore ouvert, est recalculé à chaque lecture, jamais stocké).
+#
+#   python resampler.py ES_F_1m_7jours.csv --tf 5m 15m 1h
+#   python resampler.py --store data_store --symbol ES_F --tf 5m 1h
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import session_calendar
+from market_data import FileCache, _find_ts_col, file_stamp, load_ohlcv
+from ohlcv_store import OHLCVSeries, OHLCVStore, _epoch_ns, _to_epoch_ns, _tz_from_meta, is_series_dir
+
+SESSION_TZ = "America/Chicago"
+SESSION_OPEN = "17:00"  # ouverture CME Globex (00:00 heure de Paris la plupart du temps)
+SOURCE_TF = "1m"
+NS_PER_MIN = 60_000_000_000
+CACHE_SIZE = 32
+
+_cache = FileCache(CACHE_SIZE)  # (chemin, tf, tz, ouverture) -> DataFrame
+
+def tf_minutes(timeframe):
+    """"5m" / "15m" / "1h" / "4h" / "1d" -> minutes."""
+    unit = {"m": 1, "h": 60, "d": 1440}[timeframe[-1].lower()]
+    minutes = int(timeframe[:-1]) * unit
+    if not 0 < minutes <= session_calendar.MINUTES_PER_DAY:
+        raise ValueError(f"Timeframe non supporté: {timeframe}")
+    return minutes
+
+def bucket_keys(epoch_ns, timeframe, tz=SESSION_TZ, session_open=SESSION_OPEN):
+    """Début du seau (epoch ns UTC) de chaque timestamp (epoch ns UTC)."""
+    minute = np.asarray(epoch_ns, dtype=np.int64) // NS_PER_MIN
+    local = session_calendar.minute_of_day(minute.view("M8[m]"), tz).astype(np.int64)
+    since_open = (local - session_calendar.to_minute(session_open)) % session_calendar.MINUTES_PER_DAY
+    return (minute - since_open % tf_minutes(timeframe)) * NS_PER_MIN
+
+def _aggregate(epoch, bars, columns, keys):
+    """Groupes contigus de même clé -> (clés, lignes agrégées)."""
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+    out = np.empty((len(starts), len(columns)))
+    for j, c in enumerate(columns):
+        col = bars[:, j]
+        if c == "open":
+            out[:, j] = col[starts]
+        elif c == "close":
+            out[:, j] = col[ends]
+        elif c == "high":
+            out[:, j] = np.maximum.reduceat(col, starts)
+        elif c == "low":
+            out[:, j] = np.minimum.reduceat(col, starts)
+        elif c == "volume":
+            out[:, j] = np.add.reduceat(col, starts)
+        else:
+            out[:, j] = col[ends]  # autre colonne : dernière valeur du seau
+    return keys[starts], out
+
+def _frame(keys, out, columns, tz):
+    stamps = pd.Series(keys.view("M8[ns]"))
+    if tz is not None:
+        stamps = stamps.dt.tz_localize("UTC").dt.tz_convert(tz)
+    df = pd.DataFrame(out, columns=columns)
+    df.insert(0, "timestamp", stamps)
+    return df
+
+def resample(df, timeframe, tz=SESSION_TZ, session_open=SESSION_OPEN):
+    """
+    DataFrame OHLCV (timestamp + open/high/low/close/volume) -> bougies `timeframe`.
+    Les timestamps gardent le fuseau d'entrée (naïfs = UTC, offsets mixtes -> UTC).
+    """
+    ts_col = _find_ts_col(df.columns)
+    df = df.rename(columns={ts_col: "timestamp"})
+    columns = [c for c in df.columns if c != "timestamp"]
+    epoch = _epoch_ns(df["timestamp"])
+    order = np.argsort(epoch, kind="stable")
+    epoch = epoch[order]
+    bars = df[columns].to_numpy(dtype=np.float64)[order]
+    if len(epoch) == 0:
+        return df.iloc[:0]
+    keys, out = _aggregate(epoch, bars, columns, bucket_keys(epoch, timeframe, tz, session_open))
+    out_tz = getattr(pd.to_datetime(df["timestamp"]).dt, "tz", None)
+    return _frame(keys, out, columns, out_tz)
+
+def resample_file(path, timeframe, tz=SESSION_TZ, session_open=SESSION_OPEN):
+    """resample(load_ohlcv(path)), en cache mémoire (invalidé quand le CSV change)."""
+    if is_series_dir(path):
+        return resample(load_ohlcv(path), timeframe, tz, session_open)
+    return _cache.get((os.path.abspath(path), timeframe, tz, session_open), file_stamp(path),
+                      lambda: resample(load_ohlcv(path), timeframe, tz, session_open))
+
+def _pending(store, symbol, timeframe, source_tf, tz, session_open):
+    """Seaux non stockés : (série cible, clés, lignes agrégées) à partir des 1m de queue."""
+    source = OHLCVSeries(store.series_path(symbol, source_tf))
+    last = store.last_timestamp(symbol, timeframe)
+    # bougies 1m du dernier seau stocké déjà agrégées : on repart juste après son début
+    # et on écarte celles qui ont encore sa clé
+    start = None if last is None else last + pd.Timedelta(1, "ns")
+    df = source.read(start)
+    epoch = _epoch_ns(df["timestamp"])
+    bars = df[source.columns].to_numpy(dtype=np.float64)
+    keys = bucket_keys(epoch, timeframe, tz, session_open)
+    if last is not None:
+        fresh = keys > last.value
+        epoch, bars, keys = epoch[fresh], bars[fresh], keys[fresh]
+    target = store.series(symbol, timeframe, source.columns, source.meta.get("tz"))
+    if len(keys) == 0:
+        return target, keys, np.empty((0, len(source.columns)))
+    keys, out = _aggregate(epoch, bars, source.columns, keys)
+    return target, keys, out
+
+def update_store(store, symbol, timeframe, source_tf=SOURCE_TF, tz=SESSION_TZ,
+                 session_open=SESSION_OPEN):
+    """
+    Ajoute à <SYMBOL>/<timeframe> les seaux clos depuis le dernier stocké. Le dernier seau
+    (peut-être encore incomplet) n'est pas écrit. Retourne le nombre de bougies ajoutées.
+    """
+    store = store if isinstance(store, OHLCVStore) else OHLCVStore(store)
+    target, keys, out = _pending(store, symbol, timeframe, source_tf, tz, session_open)
+    if len(keys) < 2:
+        return 0
+    closed = _frame(keys[:-1], out[:-1], target.columns, None)
+    return target.append(closed)
+
+def read_store(store, symbol, timeframe, start=None, end=None, source_tf=SOURCE_TF,
+               tz=SESSION_TZ, session_open=SESSION_OPEN):
+    """Seaux stockés (après update_store) + seau de queue recalculé depuis les 1m."""
+    store = store if isinstance(store, OHLCVStore) else OHLCVStore(store)
+    update_store(store, symbol, timeframe, source_tf, tz, session_open)
+    target, keys, out = _pending(store, symbol, timeframe, source_tf, tz, session_open)
+    tail = _frame(keys, out, target.columns, _tz_from_meta(target.meta.get("tz")))
+    if len(keys):
+        keep = np.ones(len(keys), dtype=bool)
+        if start is not None:
+            keep &= keys >= _to_epoch_ns(start)
+        if end is not None:
+            keep &= keys <= _to_epoch_ns(end)
+        tail = tail[keep]
+    return pd.concat([target.read(start, end), tail], ignore_index=True)
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Bougies 5m/15m/1h... dérivées des bougies 1m")
+    p.add_argument("csv", nargs="?", help="CSV 1m (sinon --store / --symbol)")
+    p.add_argument("--tf", nargs="+", default=["5m", "15m", "1h"])
+    p.add_argument("--tz", default=SESSION_TZ, help="fuseau de la séance")
+    p.add_argument("--open", default=SESSION_OPEN, help="heure d'ouverture de séance (fuseau --tz)")
+    p.add_argument("--store", default=None, help="racine du store OHLCV (mise à jour incrémentale)")
+    p.add_argument("--symbol", default="ES_F")
+    args = p.parse_args()
+
+    for tf in args.tf:
+        if args.store:
+            added = update_store(args.store, args.symbol, tf, tz=args.tz, session_open=args.open)
+            print(f"✅ Store: +{added} bougies {tf} -> {args.store}/{args.symbol}/{tf}")
+        else:
+            out = resample_file(args.csv, tf, args.tz, args.open)
+            base = os.path.splitext(os.path.basename(args.csv))[0]
+            out_csv = f"{base}_to_{tf}.csv"
+            out.to_csv(out_csv, index=False)
+            print(f"✅ Enregistré {len(out)} bougies {tf} -> {out_csv}")
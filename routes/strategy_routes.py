@@ -1,10 +1,15 @@
 # routes/strategy_routes.py
 
-from fastapi import APIRouter
+from typing import List, Union
+
+import numpy as np
+
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from services.strategy_service import evaluate_strategy
+from services.metrics import MetricsRoute, count_decisions
+from services.strategy_service import FIELDS, decision_names, evaluate_strategy, evaluate_strategy_batch
 
-router = APIRouter(prefix="/bot", tags=["Trading Bot"])
+router = APIRouter(prefix="/bot", tags=["Trading Bot"], route_class=MetricsRoute)
 
 class StrategyInput(BaseModel):
     price: float
@@ -14,8 +19,31 @@ class StrategyInput(BaseModel):
     long_ma: float
     rsi: float
 
+class StrategyColumns(BaseModel):
+    """Lot en colonnes : une liste par champ, toutes de même longueur."""
+    price: List[float]
+    resistance: List[float]
+    support: List[float]
+    short_ma: List[float]
+    long_ma: List[float]
+    rsi: List[float]
+
 @router.post("/strategy")
 def strategy_endpoint(data: StrategyInput):
     decision = evaluate_strategy(data.dict())
+    count_decisions(decision)
     return {"decision": decision}
 
+@router.post("/strategy/batch")
+def strategy_batch_endpoint(data: Union[List[StrategyInput], StrategyColumns]):
+    # Lignes [{price, ...}, ...] ou colonnes {price: [...], ...} -> décisions dans l'ordre
+    if isinstance(data, list):
+        columns = {f: [getattr(row, f) for row in data] for f in FIELDS}
+    else:
+        columns = {f: getattr(data, f) for f in FIELDS}
+        if len({len(v) for v in columns.values()}) > 1:
+            raise HTTPException(status_code=422, detail="Colonnes de longueurs différentes")
+    codes = evaluate_strategy_batch(columns)
+    sell, hold, buy = np.bincount(codes + 1, minlength=3)
+    count_decisions({"BUY": int(buy), "SELL": int(sell), "HOLD": int(hold)})
+    return {"decisions": decision_names(codes)}
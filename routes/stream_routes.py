@@ -0,0 +1,52 @@
+# routes/stream_routes.py
+# WebSocket /bot/stream : le client n'envoie que les bougies brutes (OHLCV), le serveur tient
+# les indicateurs à jour pour la connexion (streaming_indicators) et renvoie la décision.
+#
+#   -> {"timestamp": "...", "open": .., "high": .., "low": .., "close": .., "volume": ..}
+#   <- {"timestamp": "...", "ready": true, "decision": "BUY", "short_ma": .., ...}
+# Un message peut aussi être une liste de bougies : la réponse est alors une liste.
+# Pendant le warm-up des indicateurs : {"ready": false, "decision": "HOLD"}.
+
+import json
+import math
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from services.metrics import count_decisions
+from services.strategy_service import evaluate_strategy
+from streaming_indicators import StreamingIndicators
+
+router = APIRouter(prefix="/bot", tags=["Trading Bot"])
+
+def on_bar(indicators, bar):
+    try:
+        high, low, close = (float(bar[k]) for k in ("high", "low", "close"))
+        # NaN / inf : rejetés avant update(), sinon l'état de la connexion resterait à NaN
+        if not all(math.isfinite(x) for x in (high, low, close)):
+            raise ValueError(bar)
+    except (KeyError, TypeError, ValueError):
+        return {"timestamp": bar.get("timestamp") if isinstance(bar, dict) else None,
+                "error": "bougie invalide (high, low, close requis)"}
+    values = indicators.update(high, low, close)
+    if not StreamingIndicators.ready(values):
+        return {"timestamp": bar.get("timestamp"), "ready": False, "decision": "HOLD"}
+    decision = evaluate_strategy(values)
+    count_decisions(decision)
+    return {"timestamp": bar.get("timestamp"), "ready": True, "decision": decision, **values}
+
+@router.websocket("/stream")
+async def stream_endpoint(ws: WebSocket, short: int = 10, long: int = 30, rsi_len: int = 14):
+    await ws.accept()
+    indicators = StreamingIndicators(short, long, rsi_len)  # état propre à la connexion
+    try:
+        while True:
+            try:
+                msg = json.loads(await ws.receive_text())
+            except ValueError:
+                await ws.send_json({"error": "message JSON invalide"})
+                continue
+            if isinstance(msg, list):
+                await ws.send_json([on_bar(indicators, bar) for bar in msg])
+            else:
+                await ws.send_json(on_bar(indicators, msg))
+    except WebSocketDisconnect:
+        pass
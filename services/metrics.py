@@ -0,0 +1,181 @@
+# services/metrics.py
+# Métriques au format Prometheus (texte) pour /metrics : compteurs, jauges, histogrammes.
+#
+# Chemin chaud sans verrou : chaque thread (pool de FastAPI pour les routes sync, boucle
+# asyncio) écrit dans son propre shard ; /metrics additionne les shards à la lecture.
+# Le verrou ne sert qu'à l'enregistrement d'un nouveau thread.
+# Branchement : MetricsMiddleware sur l'app, route_class=MetricsRoute sur les routers.
+
+import threading
+import time
+from bisect import bisect_left
+
+from fastapi.routing import APIRoute
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class _Shards:
+    """Un dict par thread ; values() parcourt tous les shards."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._all.append(shard)
+            return shard
+
+    def values(self):
+        with self._lock:
+            shards = list(self._all)
+        return shards
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels, self.kind = name, help, labels, "counter"
+        self._shards = _Shards()
+
+    def inc(self, *labelvalues, n=1):
+        shard = self._shards.get()
+        shard[labelvalues] = shard.get(labelvalues, 0) + n
+
+    def collect(self):
+        totals = {}
+        for shard in self._shards.values():
+            for key, v in list(shard.items()):
+                totals[key] = totals.get(key, 0) + v
+        return totals
+
+    def render(self):
+        yield from _header(self)
+        for key, v in sorted(self.collect().items()):
+            yield f"{self.name}{_labels(self.labels, key)} {v}"
+
+class Gauge(Counter):
+    """Jauge montée / descendue par le même thread (ex. requêtes en cours) : somme des shards."""
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self.kind = "gauge"
+
+    def dec(self, *labelvalues, n=1):
+        self.inc(*labelvalues, n=-n)
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.kind = name, help, labels, "histogram"
+        self.buckets = tuple(buckets)
+        self._shards = _Shards()
+
+    def observe(self, value, *labelvalues):
+        shard = self._shards.get()
+        h = shard.get(labelvalues)
+        if h is None:
+            h = shard[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        h[0][bisect_left(self.buckets, value)] += 1
+        h[1] += value
+
+    def collect(self):
+        totals = {}
+        for shard in self._shards.values():
+            for key, (counts, total) in list(shard.items()):
+                acc = totals.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+                acc[0] = [a + b for a, b in zip(acc[0], counts)]
+                acc[1] += total
+        return totals
+
+    def render(self):
+        yield from _header(self)
+        for key, (counts, total) in sorted(self.collect().items()):
+            cum = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                cum += n
+                yield f"{self.name}_bucket{_labels(self.labels + ('le',), key + (str(bound),))} {cum}"
+            yield f"{self.name}_sum{_labels(self.labels, key)} {total}"
+            yield f"{self.name}_count{_labels(self.labels, key)} {cum}"
+
+def _header(metric):
+    yield f"# HELP {metric.name} {metric.help}"
+    yield f"# TYPE {metric.name} {metric.kind}"
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# --- Métriques du backend ---
+
+REQUESTS = Counter("http_requests_total", "Requêtes HTTP par route", ("method", "route", "status"))
+LATENCY = Histogram("http_request_duration_seconds", "Durée des requêtes HTTP", ("method", "route"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requêtes HTTP en cours", ("route",))
+DECISIONS = Counter("strategy_decisions_total", "Décisions de evaluate_strategy", ("decision",))
+
+REGISTRY = [REQUESTS, LATENCY, IN_FLIGHT, DECISIONS]
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def count_decisions(decisions):
+    """Ajoute des décisions : un nom ("BUY") ou un dict nom -> nombre."""
+    if isinstance(decisions, str):
+        DECISIONS.inc(decisions)
+    else:
+        for name, n in decisions.items():
+            if n:
+                DECISIONS.inc(name, n=n)
+
+class MetricsRoute(APIRoute):
+    """route_class des routers : jauge des requêtes en cours, par gabarit de route."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        route = self.path
+
+        async def instrumented(request):
+            IN_FLIGHT.inc(route)
+            try:
+                return await handler(request)
+            finally:
+                IN_FLIGHT.dec(route)
+
+        return instrumented
+
+class MetricsMiddleware:
+    """Middleware ASGI : compteur et histogramme de latence par route (404 -> "unmatched")."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # gabarit de la route (ex. /bot/strategy), posé dans le scope par le routage
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            LATENCY.observe(time.perf_counter() - t0, method, route)
+            REQUESTS.inc(method, route, str(status[0]))
@@ -1,5 +1,11 @@
 # services/strategy_service.py
 
+import numpy as np
+
+FIELDS = ("price", "resistance", "support", "short_ma", "long_ma", "rsi")
+HOLD, BUY, SELL = 0, 1, -1
+DECISION_NAMES = np.array(["SELL", "HOLD", "BUY"], dtype=object)  # indexé par code + 1
+
 def evaluate_strategy(data):
     price = data["price"]
     resistance = data["resistance"]
@@ -15,4 +21,27 @@ def evaluate_strategy(data):
     else:
         return "HOLD"
 
+def evaluate_strategy_batch(columns):
+    """
+    Même règle que evaluate_strategy() sur des colonnes entières (dict / DataFrame champ -> tableau),
+    en une passe numpy. Retourne un tableau int8 de codes (BUY=1, SELL=-1, HOLD=0), dans l'ordre.
+    Identique à la version scalaire sur des float64, NaN / inf compris (toute comparaison avec
+    NaN est fausse -> HOLD, comme en Python).
+    """
+    price, resistance, support, short_ma, long_ma, rsi = (
+        np.asarray(columns[f], dtype=np.float64) for f in FIELDS
+    )
+    # a > b > c en Python == (a > b) and (b > c) ; BUY et SELL s'excluent (price > / < short_ma)
+    buy = price > short_ma
+    buy &= short_ma > long_ma
+    buy &= rsi < 30
+    buy &= price < resistance
+    sell = price < short_ma
+    sell &= short_ma < long_ma
+    sell &= rsi > 70
+    sell &= price > support
+    return buy.view(np.int8) - sell.view(np.int8)
 
+def decision_names(codes):
+    """Codes de evaluate_strategy_batch() -> ["BUY", "SELL", "HOLD", ...]."""
+    return DECISION_NAMES[np.asarray(codes) + 1].tolist()
@@ -0,0 +1,119 @@
+# session_calendar.py
+# Calendrier de séance partagé : minute du jour en heure locale (Europe/Paris par défaut)
+# sous forme de tableau d'entiers, et masque de fenêtres horaires (16:00-17:30, ou plusieurs).
+#
+# La conversion UTC -> Paris passe par tz_convert (transitions été / hiver vectorisées), une
+# seule fois par fichier : le tableau des minutes est gardé en mémoire et à côté du cache
+# colonnaire de market_data (.ohlcv_cache/<csv>/session_<tz>.npz), invalidé sur mtime / taille.
+# Le masque est une table de 1440 booléens indexée par la minute : une seule opération numpy,
+# quel que soit le nombre de fenêtres (une fenêtre qui passe minuit, ex. 22:00-02:00, marche aussi).
+#
+#   minutes = session_calendar.file_minutes("ES_F_1m_12mo.csv")
+#   df = df[session_calendar.window_mask(minutes, "16:00-17:30")]
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from market_data import FileCache, _find_ts_col, cache_path, file_stamp, load_ohlcv
+from ohlcv_store import is_series_dir
+
+SESSION_TZ = "Europe/Paris"
+DEFAULT_WINDOWS = "16:00-17:30"
+MINUTES_PER_DAY = 24 * 60
+CACHE_SIZE = 32
+
+_cache = FileCache(CACHE_SIZE)  # (chemin, tz) -> minutes
+
+def to_minute(text):
+    """"16:00" / "16:00:00" -> 960."""
+    parts = str(text).strip().split(":")
+    return int(parts[0]) * 60 + int(parts[1])
+
+def parse_windows(windows=DEFAULT_WINDOWS):
+    """
+    "16:00-17:30", "16:00-17:30,20:00-21:00", ("16:00", "17:30") ou liste de couples
+    -> liste de (début, fin) en minutes, bornes incluses.
+    """
+    if isinstance(windows, str):
+        windows = [w.split("-") for w in windows.split(",") if w.strip()]
+    elif len(windows) == 2 and isinstance(windows[0], (str, int)):
+        windows = [windows]
+    return [(to_minute(a) if isinstance(a, str) else int(a),
+             to_minute(b) if isinstance(b, str) else int(b)) for a, b in windows]
+
+def window_table(windows=DEFAULT_WINDOWS):
+    """Table de 1440 booléens : True pour chaque minute du jour dans une des fenêtres."""
+    table = np.zeros(MINUTES_PER_DAY, dtype=bool)
+    for start, end in parse_windows(windows):
+        if start <= end:
+            table[start:end + 1] = True
+        else:  # fenêtre à cheval sur minuit
+            table[start:] = True
+            table[:end + 1] = True
+    return table
+
+def minute_of_day(timestamps, tz=SESSION_TZ):
+    """
+    Timestamps (Series / DatetimeIndex / tableau ; naïfs = UTC, tz-aware convertis) ->
+    minute du jour en heure `tz`, int16.
+    """
+    idx = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True)).tz_convert(tz)
+    # heure murale locale en ns depuis l'epoch -> minute du jour (division entière)
+    local = idx.tz_localize(None).as_unit("ns").asi8
+    return ((local // 60_000_000_000) % MINUTES_PER_DAY).astype(np.int16)
+
+def window_mask(minutes, windows=DEFAULT_WINDOWS):
+    """Masque booléen (minute dans une des fenêtres) en une opération vectorisée."""
+    return window_table(windows)[np.asarray(minutes)]
+
+def _disk_path(path, tz):
+    return os.path.join(cache_path(path), f"session_{tz.replace('/', '_')}.npz")
+
+def _read_disk(path, tz, stamp):
+    try:
+        with np.load(_disk_path(path, tz)) as z:
+            if tuple(z["stamp"]) == stamp:
+                return z["minutes"]
+    except (OSError, KeyError, ValueError):
+        pass
+    return None
+
+def _write_disk(path, tz, stamp, minutes):
+    target = _disk_path(path, tz)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = target + ".tmp.npz"
+        np.savez(tmp, stamp=np.array(stamp, dtype=np.int64), minutes=minutes)
+        os.replace(tmp, target)
+    except OSError:
+        pass  # cache optionnel
+
+def file_minutes(path, tz=SESSION_TZ):
+    """
+    Minute du jour (heure `tz`) de chaque ligne du fichier, dans l'ordre de load_ohlcv(path).
+    Calculé une fois par fichier ; cache mémoire puis disque, invalidé sur mtime / taille.
+    """
+    if is_series_dir(path):
+        df = load_ohlcv(path)  # série du store : pas de mtime fiable, calcul direct
+        return minute_of_day(df[_find_ts_col(df.columns)], tz)
+    stamp = file_stamp(path)
+
+    def compute():
+        minutes = _read_disk(path, tz, stamp)
+        if minutes is None:
+            df = load_ohlcv(path)
+            minutes = minute_of_day(df[_find_ts_col(df.columns)], tz)
+            _write_disk(path, tz, stamp, minutes)
+        return minutes
+
+    return _cache.get((os.path.abspath(path), tz), stamp, compute)
+
+def file_window_mask(path, windows=DEFAULT_WINDOWS, tz=SESSION_TZ):
+    """Masque des lignes de load_ohlcv(path) dans les fenêtres (heure `tz`)."""
+    return window_mask(file_minutes(path, tz), windows)
+
+def filter_window(df, windows=DEFAULT_WINDOWS, tz=SESSION_TZ, ts_col="timestamp"):
+    """Lignes de df dont le timestamp tombe dans les fenêtres (heure `tz`)."""
+    return df[window_mask(minute_of_day(df[ts_col], tz), windows)]
@@ -0,0 +1,271 @@
+# streaming_indicators.py
+# Indicateurs incrémentaux pour le live / replay : une bougie à la fois, O(1) par bougie
+# (pas de recalcul sur tout l'historique comme replay_feeder.compute_indicators()).
+#
+#   SMA          -> somme compensée glissante (rolling().mean() de pandas)
+#   EMA          -> récurrence ewm(adjust=False) de pandas
+#   RSI          -> moyenne glissante des hausses / baisses (rsi de replay_feeder)
+#   WilderRSI    -> récurrence de Wilder (rsi de backtest_es_csv)
+#   ATR          -> true range lissé façon Wilder (atr de backtest_es_csv_risk)
+#   RollingMax / RollingMin -> deque monotone
+#
+# Mêmes algorithmes que pandas : résultats identiques bit à bit au calcul en mémoire.
+# update_many() traite un bloc d'un coup (mode --chunksize de backtest_es_csv).
+#
+# StreamingIndicators produit les champs du payload /bot/strategy
+# (short_ma, long_ma, rsi, support, resistance), mêmes définitions que compute_indicators().
+# Vérification contre pandas : python streaming_indicators.py <csv>
+
+import math
+from collections import deque
+
+import numpy as np
+
+NAN = float("nan")
+
+class Indicator:
+    """update(x) : une valeur ; update_many(values) : un bloc -> tableau NumPy (état porté)."""
+
+    def update_many(self, values):
+        update = self.update
+        return np.array([update(x) for x in np.asarray(values, dtype=np.float64).tolist()],
+                        dtype=np.float64)
+
+class SMA(Indicator):
+    """
+    Series.rolling(window).mean() : somme compensée (Kahan) glissante, même algorithme que
+    pandas (NaN ignorés, NaN tant qu'il manque des valeurs) -> résultats identiques bit à bit.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.nobs = self.neg_ct = 0
+        self.sum_x = self.comp_add = self.comp_remove = 0.0
+        self.same = 0             # nb de valeurs identiques consécutives (série constante)
+        self.prev = None
+
+    def update(self, x):
+        values = self.values
+        values.append(x)
+        if len(values) > self.window:
+            old = values.popleft()
+            if old == old:
+                self.nobs -= 1
+                y = -old - self.comp_remove
+                t = self.sum_x + y
+                self.comp_remove = t - self.sum_x - y
+                self.sum_x = t
+                if math.copysign(1.0, old) < 0:
+                    self.neg_ct -= 1
+        if x == x:
+            self.nobs += 1
+            y = x - self.comp_add
+            t = self.sum_x + y
+            self.comp_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, x) < 0:
+                self.neg_ct += 1
+            self.same = self.same + 1 if x == self.prev or self.prev is None else 1
+            self.prev = x
+        nobs = self.nobs
+        if nobs < self.window or nobs == 0:
+            return NAN
+        if self.same >= nobs:
+            return self.prev
+        mean = self.sum_x / nobs
+        if (self.neg_ct == 0 and mean < 0) or (self.neg_ct == nobs and mean > 0):
+            return 0.0
+        return mean
+
+class EMA(Indicator):
+    """
+    Series.ewm(span=... | alpha=..., min_periods=..., adjust=False).mean(), récurrence de
+    pandas (NaN : poids décroissant, valeur gardée) -> résultats identiques bit à bit.
+    """
+
+    def __init__(self, span=None, alpha=None, min_periods=0):
+        com = (span - 1) / 2.0 if span is not None else (1.0 - alpha) / alpha
+        self.alpha = 1.0 / (1.0 + com)  # pandas repasse par le centre de masse
+        self.factor = 1.0 - self.alpha
+        self.min_periods = max(min_periods, 1)
+        self.value = None
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, x):
+        is_obs = x == x
+        if self.value is None:  # toute 1re valeur, même NaN
+            self.value = x
+        else:
+            value = self.value
+            if value == value:
+                self.old_wt *= self.factor
+                if is_obs:
+                    if value != x:
+                        value = self.old_wt * value + self.alpha * x
+                        self.value = value / (self.old_wt + self.alpha)
+                    self.old_wt = 1.0
+            elif is_obs:
+                self.value = x
+        self.nobs += is_obs
+        return self.value if self.nobs >= self.min_periods else NAN
+
+class RSI(Indicator):
+    """RSI sur moyennes glissantes des hausses / baisses (rsi() de replay_feeder)."""
+
+    def __init__(self, period=14):
+        self.up = SMA(period)
+        self.down = SMA(period)
+        self.prev = None
+
+    def update(self, close):
+        prev, self.prev = self.prev, close
+        if prev is None:
+            return NAN
+        delta = close - prev
+        up = self.up.update(max(delta, 0.0))
+        down = self.down.update(max(-delta, 0.0))
+        if math.isnan(up):
+            return NAN
+        return 100 - (100 / (1 + up / (down or 1e-9)))
+
+class WilderRSI(Indicator):
+    """RSI de Wilder : ewm(alpha=1/period, adjust=False) des hausses / baisses (rsi() de backtest_es_csv)."""
+
+    def __init__(self, period=14, zero=1e-12):
+        self.up = EMA(alpha=1.0 / period, min_periods=period)
+        self.down = EMA(alpha=1.0 / period, min_periods=period)
+        self.zero = zero
+        self.prev = None
+
+    def update(self, close):
+        prev, self.prev = self.prev, close
+        if prev is None:
+            return NAN
+        delta = close - prev
+        up = self.up.update(max(delta, 0.0))
+        down = self.down.update(max(-delta, 0.0))
+        if math.isnan(up):
+            return NAN
+        return 100 - (100 / (1 + up / (down or self.zero)))
+
+class ATR:
+    """True range lissé ewm(alpha=1/period, adjust=False) (atr() de backtest_es_csv_risk)."""
+
+    def __init__(self, period=14):
+        self.ema = EMA(alpha=1.0 / period)
+        self.prev_close = None
+
+    def update(self, high, low, close):
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        return self.ema.update(tr)
+
+class RollingMax(Indicator):
+    """
+    Series.rolling(window).max() : deque monotone (index, valeur), O(1) amorti.
+    Un NaN dans la fenêtre donne NaN, comme pandas.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.items = deque()
+        self.count = 0
+        self.last_nan = -window
+
+    def _better(self, a, b):
+        return a >= b
+
+    def update(self, x):
+        if x == x:
+            while self.items and self._better(x, self.items[-1][1]):
+                self.items.pop()
+            self.items.append((self.count, x))
+        else:
+            self.last_nan = self.count
+        if self.items and self.items[0][0] <= self.count - self.window:
+            self.items.popleft()
+        self.count += 1
+        if self.count < self.window or self.last_nan > self.count - 1 - self.window:
+            return NAN
+        return self.items[0][1]
+
+class RollingMin(RollingMax):
+    """Min glissant sur `window` valeurs."""
+
+    def _better(self, a, b):
+        return a <= b
+
+class StreamingIndicators:
+    """
+    Champs du payload /bot/strategy, bougie par bougie, mêmes définitions que
+    replay_feeder.compute_indicators() : update() -> dict (NaN pendant le warm-up).
+    """
+
+    def __init__(self, short=10, long=30, rsi_len=14):
+        self.short_ma = SMA(short)
+        self.long_ma = SMA(long)
+        self.rsi = RSI(rsi_len)
+        self.support = RollingMin(long)
+        self.resistance = RollingMax(long)
+
+    def update(self, high, low, close):
+        return {
+            "price": close,
+            "resistance": self.resistance.update(high),
+            "support": self.support.update(low),
+            "short_ma": self.short_ma.update(close),
+            "long_ma": self.long_ma.update(close),
+            "rsi": self.rsi.update(close),
+        }
+
+    @staticmethod
+    def ready(values):
+        return not any(math.isnan(v) for v in values.values())
+
+def compare(csv_path):
+    """Compare chaque indicateur à sa version pandas ; retourne l'écart absolu max par champ."""
+    import numpy as np
+    import pandas as pd
+
+    from backtest_es_csv import rsi as wilder_rsi
+    from backtest_es_csv_risk import atr
+    from market_data import load_ohlcv
+    from replay_feeder import compute_indicators
+
+    df = load_ohlcv(csv_path)
+    df.columns = [c.lower() for c in df.columns]
+    ref = compute_indicators(df.copy())
+    ref["ema"] = df["close"].ewm(span=21, adjust=False).mean()
+    ref["wilder_rsi"] = wilder_rsi(df["close"], 14)
+    ref["atr"] = atr(df, 14)
+
+    ind, ema, wrsi, atr14 = StreamingIndicators(), EMA(span=21), WilderRSI(14), ATR(14)
+    rows = []
+    for h, l, c in zip(df["high"].tolist(), df["low"].tolist(), df["close"].tolist()):
+        row = ind.update(h, l, c)
+        row["ema"] = ema.update(c)
+        row["wilder_rsi"] = wrsi.update(c)
+        row["atr"] = atr14.update(h, l, c)
+        rows.append(row)
+    out = pd.DataFrame(rows)
+
+    errors = {}
+    for col in ("short_ma", "long_ma", "rsi", "support", "resistance", "ema", "wilder_rsi", "atr"):
+        a, b = out[col].to_numpy(), ref[col].to_numpy()
+        if not np.array_equal(np.isnan(a), np.isnan(b)):
+            errors[col] = math.inf  # warm-up différent
+        else:
+            diff = np.abs(a - b)[~np.isnan(b)]
+            errors[col] = float(diff.max()) if len(diff) else 0.0
+    return errors
+
+if __name__ == "__main__":
+    import sys
+    path = sys.argv[1] if len(sys.argv) > 1 else "ES_F_1m_7jours.csv"
+    errors = compare(path)
+    for col, err in errors.items():
+        print(f"{'✅' if err < 1e-6 else '❌'} {col:<11} écart max = {err:.3g}")
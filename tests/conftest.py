@@ -0,0 +1,7 @@
+# Les modules du bot sont des scripts à la racine du dépôt : on la met sur le chemin d'import.
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,46 @@
+# Le noyau tableau (simulate / run_grid, tous moteurs) doit reproduire la référence pandas
+# sur les CSV ES_F_* livrés avec le dépôt.
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+import backtest_es_csv_alt as alt
+from conftest import ROOT
+
+CSV_FILES = sorted(f for f in glob.glob(os.path.join(ROOT, "ES_F_*.csv"))
+                   if "_alt_" not in os.path.basename(f))
+ENGINES = [(1, "scalar"), (1, "batch"), (3, "scalar"), (3, "batch")]
+SUMMARY_KEYS = ("ema_fast", "ema_slow", "brk_look", "atr_mult", "rr", "trail_mult", "eq", "winrate", "trades")
+
+def signals(df, f=8, s=21, lb=15):
+    return pd.concat([alt.strategy_ema_crossover(df, f, s), alt.strategy_breakout_range(df, lb),
+                      alt.strategy_pullback(df)], axis=1)
+
+@pytest.fixture(scope="module", params=CSV_FILES, ids=os.path.basename)
+def frame(request):
+    return alt.load_frame(request.param)
+
+def test_bundled_csvs_found():
+    assert len(CSV_FILES) >= 10
+
+@pytest.mark.parametrize("risk", [(1.5, 1.5, 1.0), (1.2, 2.0, 0.5)])
+def test_simulate_matches_pandas(frame, risk):
+    am, rr, tr = risk
+    sig = signals(frame)
+    eq, wr, n, trades, equity = alt.simulate(frame, sig, am, rr, tr)
+    ref_eq, ref_wr, ref_n, ref_trades, ref_equity = alt.simulate_pandas(frame, sig, am, rr, tr)
+    assert (eq, wr, n) == pytest.approx((ref_eq, ref_wr, ref_n))
+    pd.testing.assert_frame_equal(trades.reset_index(drop=True), ref_trades.reset_index(drop=True),
+                                  check_dtype=False)
+    pd.testing.assert_frame_equal(equity.reset_index(drop=True), ref_equity.reset_index(drop=True),
+                                  check_dtype=False)
+
+def test_run_grid_same_best_cell_for_every_engine(frame):
+    results = [alt.run_grid(frame, contracts=5, symbol="MES", workers=w, engine=e) for w, e in ENGINES]
+    ref = {k: results[0][k] for k in SUMMARY_KEYS}
+    for (w, e), best in zip(ENGINES[1:], results[1:]):
+        assert {k: best[k] for k in SUMMARY_KEYS} == pytest.approx(ref), f"workers={w} engine={e}"
+        pd.testing.assert_frame_equal(best["trades_df"], results[0]["trades_df"])
+        pd.testing.assert_frame_equal(best["equity_df"], results[0]["equity_df"])
@@ -0,0 +1,35 @@
+# backtest_es_csv : le mode par blocs (--chunksize) doit écrire les mêmes CSV que main().
+import os
+
+import pytest
+
+import backtest_es_csv as bt
+from conftest import ROOT
+
+FILES = ["ES_F_1m_7jours_16h_17h30_FR.csv", "ES_F_5m_30d.csv", "ES_F_1h_12mo.csv",
+         "BTCUSDT_1m_2025-08-01_to_2025-08-08.csv"]
+
+def outputs(run, tmp_path, name):
+    out = tmp_path / name
+    out.mkdir()
+    cwd = os.getcwd()
+    os.chdir(out)
+    try:
+        run()
+    finally:
+        os.chdir(cwd)
+    return (out / bt.TRADES_CSV).read_bytes(), (out / bt.EQUITY_CSV).read_bytes()
+
+@pytest.mark.parametrize("name", FILES)
+def test_chunked_matches_in_memory(name, tmp_path):
+    path = os.path.join(ROOT, name)
+    ref = outputs(lambda: bt.main(path), tmp_path, "ref")
+    assert ref[0].count(b"\n") > 1  # au moins un trade
+    for chunksize in (50, 97, 5000):
+        got = outputs(lambda: bt.main_chunked(path, chunksize), tmp_path, f"c{chunksize}")
+        assert got == ref, chunksize
+
+def test_chunked_rejects_store_dir(tmp_path, capsys):
+    bt.main_chunked(str(tmp_path), 100)
+    assert "CSV uniquement" in capsys.readouterr().out
+    assert not os.path.exists(tmp_path / bt.TRADES_CSV)
@@ -0,0 +1,20 @@
+# backtest_es_csv_risk.load_window : fenêtre START-END sur l'heure écrite (naïf) ou de Paris.
+import os
+
+import pandas as pd
+import pytest
+
+import backtest_es_csv_risk as risk
+from conftest import ROOT
+
+@pytest.mark.parametrize("name", ["BTCUSDT_1m_2025-08-01_to_2025-08-08.csv", "ES_F_5m_30d.csv"])
+def test_window_on_file_wall_clock(name):
+    path = os.path.join(ROOT, name)
+    ref = pd.read_csv(path)
+    ref["timestamp"] = pd.to_datetime(ref["timestamp"])
+    t = ref["timestamp"].dt.time
+    ref = ref[(t >= pd.to_datetime(risk.START).time()) & (t <= pd.to_datetime(risk.END).time())]
+
+    got = risk.load_window(path)
+    assert len(got) == len(ref) > 0
+    assert got["timestamp"].astype(str).tolist() == ref["timestamp"].astype(str).tolist()
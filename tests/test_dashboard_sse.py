@@ -0,0 +1,82 @@
+# /events (SSE) : rattrapage Last-Event-ID sans trou ni doublon, un seul tail pour tous les clients.
+import asyncio
+import json
+
+import pytest
+from starlette.requests import Request
+
+import web_dashboard
+from decision_index import DecisionIndex
+from logger import format_line
+
+DECISIONS = ["BUY", "SELL", "HOLD"]
+
+def write(path, first, n):
+    with open(path, "a", encoding="utf-8") as f:
+        for k in range(first, first + n):
+            f.write(format_line(1_754_000_000 + k, {"k": k}, DECISIONS[k % 3]))
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    path = tmp_path / "trading.log"
+    write(path, 0, 30)
+    monkeypatch.setattr(web_dashboard, "index", DecisionIndex(str(path), str(tmp_path / "i.sqlite")))
+    monkeypatch.setattr(web_dashboard, "feed", web_dashboard.DecisionFeed())
+    monkeypatch.setattr(web_dashboard, "POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(web_dashboard, "CATCHUP_PAGE", 7)
+    return path
+
+async def stream(last_event_id=None, decision=None):
+    headers = [(b"last-event-id", str(last_event_id).encode())] if last_event_id else []
+    request = Request({"type": "http", "method": "GET", "path": "/events", "headers": headers,
+                       "query_string": b""})
+    response = await web_dashboard.decision_events(request, decision)
+    return response.body_iterator
+
+async def collect(body, n):
+    """Décisions reçues (dict) jusqu'à en avoir n."""
+    rows = []
+    async for chunk in body:
+        if chunk.startswith("id: "):
+            rows.append(json.loads(chunk.split("data: ", 1)[1]))
+            if len(rows) == n:
+                return rows
+    return rows
+
+def test_last_event_id_catch_up_then_live(log):
+    async def run():
+        web_dashboard.index.sync()
+        body = await stream(last_event_id=5)
+        task = asyncio.create_task(collect(body, 30))
+        await asyncio.sleep(0.1)
+        write(log, 30, 5)  # arrivent par le tail, pendant / après le rattrapage
+        rows = await asyncio.wait_for(task, 5)
+        await body.aclose()
+        return rows
+
+    rows = asyncio.run(run())
+    assert [r["id"] for r in rows] == list(range(6, 36))
+    assert not web_dashboard.feed.clients  # désabonné à la fermeture du flux
+
+def test_one_tail_for_all_clients(log):
+    async def run():
+        everything = await stream()
+        buys = await stream(decision="BUY")
+        tasks = [asyncio.create_task(collect(everything, 9)), asyncio.create_task(collect(buys, 3))]
+        await asyncio.sleep(0.1)
+        feed = web_dashboard.feed
+        assert len(feed.clients) == 2
+        tail = feed.task
+        write(log, 30, 9)
+        rows = await asyncio.wait_for(asyncio.gather(*tasks), 5)
+        assert feed.task is tail and not tail.done()  # le même tail a servi les deux clients
+        await everything.aclose()
+        await buys.aclose()
+        await asyncio.sleep(0.05)
+        assert not feed.clients and tail.done()  # plus d'abonné : le tail s'arrête
+        return rows
+
+    everything, buys = asyncio.run(run())
+    assert [r["id"] for r in everything] == list(range(31, 40))
+    assert [r["id"] for r in buys] == [31, 34, 37]
+    assert {r["decision"] for r in buys} == {"BUY"}
@@ -0,0 +1,104 @@
+# DecisionIndex : pagination par clé (before_id / after_id) et suivi du journal après rotation.
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from decision_index import DecisionIndex
+from logger import DecisionLogger, format_line
+
+DECISIONS = ["BUY", "SELL", "HOLD"]
+
+def write(path, first, n):
+    with open(path, "a", encoding="utf-8") as f:
+        for k in range(first, first + n):
+            f.write(format_line(1_754_000_000 + k, {"k": k}, DECISIONS[k % 3]))
+
+def ks(rows):
+    return [int(r["input"].split(":")[1].rstrip("}")) for r in rows]
+
+@pytest.fixture
+def index(tmp_path):
+    log = tmp_path / "trading.log"
+    write(log, 0, 25)
+    idx = DecisionIndex(str(log), str(tmp_path / "index.sqlite"))
+    assert idx.sync() == 25
+    return idx
+
+def test_keyset_pages(index):
+    pages, before = [], None
+    while True:
+        rows = index.page(10, before_id=before)
+        if not rows:
+            break
+        pages.append(rows)
+        before = rows[-1]["id"]
+    assert [ks(p) for p in pages] == [list(range(24, 14, -1)), list(range(14, 4, -1)),
+                                      list(range(4, -1, -1))]
+    assert not index.has_rows(before_id=pages[-1][-1]["id"])
+    assert index.has_rows(before_id=pages[-2][-1]["id"])
+
+    # retour en arrière depuis la dernière page : mêmes pages, plus récentes en tête
+    back = index.page(10, after_id=pages[-1][0]["id"])
+    assert back == pages[1]
+    assert index.page(10, after_id=back[0]["id"]) == pages[0]
+    assert not index.has_rows(after_id=pages[0][0]["id"])
+
+def test_keyset_pages_filtered(index):
+    first = index.page(3, "BUY")
+    assert ks(first) == [24, 21, 18]
+    second = index.page(3, "BUY", before_id=first[-1]["id"])
+    assert ks(second) == [15, 12, 9]
+    assert ks(index.page(3, "BUY", after_id=second[0]["id"])) == [24, 21, 18]
+    assert index.count("BUY") == 9 and index.count() == 25
+
+def test_sync_follows_rotation(index, tmp_path):
+    log = tmp_path / "trading.log"
+    write(log, 25, 3)                         # fin de l'ancien fichier, pas encore indexée
+    os.replace(log, f"{log}.1")               # rotation du logger
+    write(log, 28, 2)
+    assert index.sync() == 5
+    assert ks(index.page(100))[::-1] == list(range(30))
+    write(log, 30, 1)
+    assert index.sync() == 1 and index.count() == 31
+
+def test_sync_with_logger_rotation(tmp_path):
+    log = tmp_path / "trading.log"
+    logger = DecisionLogger(str(log), max_bytes=600, backup_count=2)
+    idx = DecisionIndex(str(log), str(tmp_path / "index.sqlite"))
+    expected = []
+    for k in range(40):
+        logger.log({"k": k}, DECISIONS[k % 3])
+        logger.flush()
+        expected.append(k)
+        idx.sync()                            # au plus une rotation entre deux sync
+    logger.close()
+    assert os.path.exists(f"{log}.1")
+    assert ks(idx.page(100))[::-1] == expected
+
+def test_index_reopened_resumes_without_duplicates(index, tmp_path):
+    write(tmp_path / "trading.log", 25, 5)
+    reopened = DecisionIndex(index.log_path, str(tmp_path / "index.sqlite"))
+    assert reopened.sync() == 5
+    assert reopened.sync() == 0
+    assert ks(reopened.page(100))[::-1] == list(range(30))
+
+def test_api_decisions_links(index, monkeypatch):
+    import web_dashboard
+    monkeypatch.setattr(web_dashboard, "index", index)
+    client = TestClient(web_dashboard.app)
+
+    seen, params = [], {"limit": 10}
+    while True:
+        body = client.get("/api/decisions", params=params).json()
+        seen += ks(body["items"])
+        if body["next_before_id"] is None:
+            break
+        params = {"limit": 10, "before_id": body["next_before_id"]}
+    assert seen == list(range(24, -1, -1))
+    assert body["prev_after_id"] is not None and body["total"] == 25
+
+    back = client.get("/api/decisions", params={"limit": 10, "after_id": body["prev_after_id"]}).json()
+    assert ks(back["items"]) == list(range(14, 4, -1))
+    first = client.get("/api/decisions", params={"limit": 10}).json()
+    assert first["prev_after_id"] is None
@@ -0,0 +1,126 @@
+# fetch_binance_btc_1m contre un serveur local qui imite /api/v3/klines : pages plafonnées,
+# 429 avec Retry-After, trou dans les données.
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+import fetch_binance_btc_1m as fb
+from ohlcv_store import OHLCVStore
+
+HOLE = range(fb.to_ms("2025-08-02 12:00"), fb.to_ms("2025-08-02 12:30"), 60_000)
+
+class KlinesServer(ThreadingHTTPServer):
+    """Klines déterministes ; page_cap bougies max par réponse ; 429 sur les requêtes listées."""
+
+    daemon_threads = True
+
+    def __init__(self, page_cap=500, throttle=(), retry_after=0.2, fail_from=None, latency=0.0):
+        super().__init__(("127.0.0.1", 0), KlinesHandler)
+        self.page_cap = page_cap
+        self.throttle = set(throttle)
+        self.retry_after = retry_after
+        self.fail_from = fail_from  # startTime >= fail_from -> 400 (erreur définitive)
+        self.latency = latency
+        self.hits = []  # (time.monotonic(), statut)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+def kline(t):
+    p = 100000 + (t // 60_000) % 977
+    return [t, f"{p:.8f}", f"{p + 5:.8f}", f"{p - 5:.8f}", f"{p + 1:.8f}", "1.00000000",
+            t + 59_999, "10.0", 3, "0.5", "5.0", "0"]
+
+class KlinesHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body=b"", headers=()):
+        self.send_response(status)
+        for k, v in headers:
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        srv = self.server
+        q = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        with srv.lock:
+            n = len(srv.hits) + 1
+            status = 429 if n in srv.throttle else 200
+            start = int(q["startTime"])
+            if srv.fail_from is not None and start >= srv.fail_from:
+                status = 400
+            srv.hits.append((time.monotonic(), status))
+        time.sleep(srv.latency)
+        if status == 429:
+            return self.reply(429, headers=[("Retry-After", str(srv.retry_after))])
+        if status == 400:
+            return self.reply(400, b'{"code": -1100}')
+        end, cap = int(q["endTime"]), min(int(q["limit"]), srv.page_cap)
+        t, rows = -(-start // 60_000) * 60_000, []
+        while t <= end and len(rows) < cap:
+            if t not in HOLE:
+                rows.append(kline(t))
+            t += 60_000
+        self.reply(200, json.dumps(rows).encode(), [("Content-Type", "application/json")])
+
+@pytest.fixture
+def server(request):
+    srv = KlinesServer(**getattr(request, "param", {}))
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+@pytest.mark.parametrize("server", [{"throttle": range(4, 200, 9), "retry_after": 0.05}], indirect=True)
+def test_resumed_fetch_matches_single_run(server, tmp_path):
+    kw = dict(base_url=server.url, concurrency=4, rate=200)
+    ref = tmp_path / "ref.csv"
+    n_ref = fb.fetch(start="2025-08-01", end="2025-08-05", out_csv=str(ref), concurrency=1, rate=200,
+                     base_url=server.url)
+
+    out, store = tmp_path / "out.csv", str(tmp_path / "store")
+    n1 = fb.fetch(start="2025-08-01", end="2025-08-03", out_csv=str(out), store=store, **kw)
+    assert fb.fetch(start="2025-08-01", end="2025-08-03", out_csv=str(out), store=store, **kw) == 0
+    n2 = fb.fetch(start="2025-08-01", end="2025-08-05", out_csv=str(out), store=store, **kw)
+
+    assert n1 + n2 == n_ref == 4 * 1440 - len(HOLE)
+    assert out.read_bytes() == ref.read_bytes()
+    assert len(OHLCVStore(store).read("BTCUSDT", "1m")) == n_ref
+    assert any(status == 429 for _, status in server.hits)
+
+@pytest.mark.parametrize("server", [{"throttle": {3}, "retry_after": 0.5, "latency": 0.02}], indirect=True)
+def test_429_pauses_every_worker(server, tmp_path):
+    fb.fetch(start="2025-08-01", end="2025-08-08", out_csv=str(tmp_path / "b.csv"), concurrency=4,
+             rate=500, base_url=server.url)
+    t429 = next(t for t, status in server.hits if status == 429)
+    # requêtes déjà en vol au moment du 429 mises à part : plus rien pendant Retry-After
+    during = [t for t, _ in server.hits if t429 + 0.1 < t < t429 + 0.5 - 0.05]
+    assert during == []
+
+@pytest.mark.parametrize("server", [{"fail_from": fb.to_ms("2025-08-02"), "latency": 0.05}], indirect=True)
+def test_failed_window_cancels_remaining(server, tmp_path):
+    out = tmp_path / "b.csv"
+    with pytest.raises(requests.HTTPError):
+        fb.fetch(start="2025-08-01", end="2025-09-01", out_csv=str(out), concurrency=2, rate=500,
+                 base_url=server.url)
+    # 45 fenêtres de 1000 bougies : on s'arrête bien avant de toutes les demander
+    assert len(server.hits) < 10
+    # historique contigu jusqu'à la fenêtre en échec, repris au lancement suivant
+    assert fb.last_csv_ms(str(out)) < fb.to_ms("2025-08-02")
+
+def test_token_bucket_block_until():
+    bucket = fb.TokenBucket(rate=1000, capacity=5)
+    bucket.block_until(time.monotonic() + 0.2)
+    t0 = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - t0 >= 0.19
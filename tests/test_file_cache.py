@@ -0,0 +1,24 @@
+# market_data.FileCache : cache LRU partagé (chart_data, session_calendar, resampler).
+import os
+
+from market_data import FileCache, file_stamp
+
+def test_recomputed_when_file_changes(tmp_path):
+    path = tmp_path / "a.csv"
+    path.write_text("x\n1\n")
+    cache, calls = FileCache(4), []
+
+    def get():
+        return cache.get(str(path), file_stamp(path), lambda: calls.append(1) or path.read_text())
+
+    assert get() == get() == "x\n1\n" and len(calls) == 1
+    path.write_text("x\n1\n2\n")
+    os.utime(path, ns=(1, 1))
+    assert get() == "x\n1\n2\n" and len(calls) == 2
+
+def test_least_recently_used_evicted():
+    cache, calls = FileCache(2), []
+    for key in ("a", "b", "a", "c", "a", "b"):
+        cache.get(key, 0, lambda key=key: calls.append(key) or key)
+    assert calls == ["a", "b", "c", "b"]  # "a" relu avant "c" : "b" évincé
+    assert list(cache.entries) == ["a", "b"]
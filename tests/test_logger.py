@@ -0,0 +1,35 @@
+# DecisionLogger : écriture par le thread de fond, puis synchrone après close().
+from logger import DecisionLogger, parse_line
+
+def read_decisions(path):
+    with open(path, encoding="utf-8") as f:
+        return [parse_line(line)[2] for line in f]
+
+def test_log_after_close_is_written(tmp_path):
+    path = tmp_path / "trading.log"
+    logger = DecisionLogger(str(path), flush_interval=60)
+    logger.log({"price": 100}, "BUY")
+    logger.close()
+    assert read_decisions(path) == ["BUY"]
+
+    # requête tardive pendant l'arrêt : plus de thread, écrite tout de suite
+    logger.log({"price": 101}, "SELL")
+    assert read_decisions(path) == ["BUY", "SELL"]
+    assert logger.thread is None
+
+def test_log_after_close_without_thread(tmp_path):
+    path = tmp_path / "trading.log"
+    logger = DecisionLogger(str(path))
+    logger.close()  # jamais démarré (atexit avant le 1er log)
+    logger.log({"price": 100}, "HOLD")
+    assert read_decisions(path) == ["HOLD"]
+    assert logger.thread is None
+
+def test_log_after_close_rotates(tmp_path):
+    path = tmp_path / "trading.log"
+    logger = DecisionLogger(str(path), max_bytes=1, backup_count=2)
+    logger.close()
+    logger.log({"price": 100}, "BUY")
+    logger.log({"price": 101}, "SELL")
+    assert read_decisions(f"{path}.2") == ["BUY"]
+    assert read_decisions(f"{path}.1") == ["SELL"]
@@ -0,0 +1,42 @@
+# Flux fusionné multi-symboles : replay local (horloge virtuelle) et refus dans les backtests.
+import os
+
+import pytest
+
+import market_merge
+import replay_feeder
+import replay_local
+from conftest import ROOT
+from market_data import load_ohlcv
+
+SOURCES = [os.path.join(ROOT, "ES_F_1m_7jours.csv"),
+           "BTC=" + os.path.join(ROOT, "BTCUSDT_1m_2025-08-01_to_2025-08-08.csv")]
+
+def test_merged_local_replay_uses_replay_local():
+    expected = sum(1 for _ in market_merge.merged_payloads(SOURCES))
+    stats = replay_feeder.run_replay(SOURCES, speed=1.0, sleep_sec=1.0,
+                                     local="services.strategy_service:evaluate_strategy")
+    assert stats["bars"] == expected > 0
+    assert sum(stats["decisions"].values()) == expected
+
+def test_merged_realtime_follows_virtual_clock(monkeypatch, capsys):
+    seen = []
+
+    def strategy(payload):
+        seen.append(market_merge.to_utc(payload["timestamp"]))
+        return "HOLD"
+
+    monkeypatch.setattr(replay_local, "load_strategy", lambda spec: strategy)
+    # 1 jour de bougies à speed 4e5 : ~0.2 s d'échéances réellement attendues
+    stats = replay_feeder.run_replay(SOURCES, speed=4e5, sleep_sec=1.0, local="x:y",
+                                     realtime=True, end="2025-08-02")
+    assert stats["bars"] == len(seen) > 0
+    span = (seen[-1] - seen[0]).total_seconds() / 4e5
+    assert span > 0.1 and stats["elapsed_s"] >= 0.9 * span
+    assert "Retard max" in capsys.readouterr().out
+
+def test_merged_csv_refused_by_single_series_loader(tmp_path):
+    out = tmp_path / "merged.csv"
+    market_merge.write_csv(SOURCES, str(out))
+    with pytest.raises(ValueError, match="plusieurs symboles"):
+        load_ohlcv(str(out))
@@ -0,0 +1,81 @@
+# /metrics : format Prometheus, compteurs par route / statut, histogramme cumulatif, décisions.
+# Les métriques sont globales au processus : on compare deux lectures (avant / après).
+import re
+
+from fastapi.testclient import TestClient
+
+from main import app
+from services import metrics
+
+client = TestClient(app)
+
+BUY_ROW = {"price": 101, "resistance": 105, "support": 95, "short_ma": 100, "long_ma": 99, "rsi": 20}
+SELL_ROW = {"price": 98, "resistance": 105, "support": 95, "short_ma": 99, "long_ma": 100, "rsi": 80}
+SAMPLE = re.compile(r'^([a-z_]+)(\{.*\})? (\S+)$')
+
+def scrape():
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    samples = {}
+    for line in res.text.splitlines():
+        if line.startswith("#"):
+            continue
+        m = SAMPLE.match(line)
+        assert m, line
+        samples[m.group(1) + (m.group(2) or "")] = float(m.group(3))
+    return res.text, samples
+
+def delta(before, after, key):
+    return after.get(key, 0) - before.get(key, 0)
+
+def test_headers_for_every_metric():
+    text, _ = scrape()
+    for metric in metrics.REGISTRY:
+        assert f"# HELP {metric.name} {metric.help}" in text
+        assert f"# TYPE {metric.name} {metric.kind}" in text
+
+def test_request_counters_and_decisions():
+    _, before = scrape()
+    for _ in range(3):
+        assert client.post("/bot/strategy", json=BUY_ROW).json() == {"decision": "BUY"}
+    client.post("/bot/strategy", json=SELL_ROW)
+    res = client.post("/bot/strategy/batch", json=[BUY_ROW, SELL_ROW, SELL_ROW])
+    assert res.json()["decisions"] == ["BUY", "SELL", "SELL"]
+    client.post("/bot/strategy", json={"price": "abc"})
+    client.get("/nope")
+    _, after = scrape()
+
+    route = 'http_requests_total{method="POST",route="/bot/strategy",status="%s"}'
+    assert delta(before, after, route % "200") == 4
+    assert delta(before, after, route % "422") == 1
+    assert delta(before, after, 'http_requests_total{method="POST",route="/bot/strategy/batch",status="200"}') == 1
+    assert delta(before, after, 'http_requests_total{method="GET",route="unmatched",status="404"}') == 1
+    # le scrape "before" est compté après sa réponse : il apparaît dans "after"
+    assert delta(before, after, 'http_requests_total{method="GET",route="/metrics",status="200"}') == 1
+    assert delta(before, after, 'strategy_decisions_total{decision="BUY"}') == 4
+    assert delta(before, after, 'strategy_decisions_total{decision="SELL"}') == 3
+
+def test_histogram_cumulative_and_count():
+    client.post("/bot/strategy", json=BUY_ROW)
+    _, samples = scrape()
+    labels = 'method="POST",route="/bot/strategy"'
+    buckets = [samples[f'http_request_duration_seconds_bucket{{{labels},le="{b}"}}']
+               for b in metrics.LATENCY_BUCKETS + ("+Inf",)]
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == samples[f"http_request_duration_seconds_count{{{labels}}}"]
+    total = sum(v for k, v in samples.items()
+                if k.startswith('http_requests_total{method="POST",route="/bot/strategy",'))
+    assert buckets[-1] == total
+    assert samples[f"http_request_duration_seconds_sum{{{labels}}}"] > 0
+
+def test_in_flight_back_to_zero():
+    client.post("/bot/strategy", json=BUY_ROW)
+    _, samples = scrape()
+    assert samples['http_requests_in_flight{route="/bot/strategy"}'] == 0
+    assert samples['http_requests_in_flight{route="/bot/strategy/batch"}'] == 0
+
+def test_label_escaping():
+    counter = metrics.Counter("test_total", "test", ("name",))
+    counter.inc('a"b\\c\nd')
+    assert list(counter.render())[-1] == 'test_total{name="a\\"b\\\\c\\nd"} 1'
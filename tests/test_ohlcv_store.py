@@ -0,0 +1,68 @@
+# OHLCVStore : ajouts avec recouvrement / doublons, réparation d'un ajout interrompu, relecture.
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from market_data import load_ohlcv
+from ohlcv_store import BARS_FILE, TS_FILE, OHLCVSeries, OHLCVStore
+
+@pytest.fixture
+def bars():
+    df = load_ohlcv(os.path.join(ROOT, "ES_F_5m_30d.csv"))
+    df.columns = [c.lower() for c in df.columns]
+    return df[["timestamp", "open", "high", "low", "close", "volume"]]
+
+def assert_same(got, ref):
+    ref = ref.reset_index(drop=True)
+    assert got["timestamp"].astype(str).tolist() == ref["timestamp"].astype(str).tolist()
+    np.testing.assert_array_equal(got.drop(columns="timestamp").to_numpy(),
+                                  ref.drop(columns="timestamp").to_numpy(dtype=np.float64))
+
+def test_append_overlap_and_duplicates(bars, tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    assert store.append("ES", "5m", bars.iloc[:3000]) == 3000
+    # recouvrement + doublons internes + désordre : seules les bougies nouvelles sont gardées
+    chunk = pd.concat([bars.iloc[2500:4000], bars.iloc[3900:4100]]).sample(frac=1, random_state=0)
+    assert store.append("ES", "5m", chunk) == 1100
+    assert store.append("ES", "5m", bars.iloc[:4100]) == 0
+    assert store.append("ES", "5m", bars.iloc[4000:]) == len(bars) - 4100
+    assert_same(store.read("ES", "5m"), bars)
+    assert store.last_timestamp("ES", "5m") == bars["timestamp"].iloc[-1]
+
+def test_read_range(bars, tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.append("ES", "5m", bars)
+    start, end = bars["timestamp"].iloc[1000], bars["timestamp"].iloc[1999]
+    assert_same(store.read("ES", "5m", start, end), bars.iloc[1000:2000])
+    assert_same(store.read("ES", "5m", end=start), bars.iloc[:1001])
+    assert len(store.read("ES", "5m", end, start)) == 0
+    # load_ohlcv accepte aussi la série (même fuseau d'affichage que le CSV)
+    assert_same(load_ohlcv(store.series_path("ES", "5m"), start=start, end=end), bars.iloc[1000:2000])
+
+def test_interrupted_append_repaired(bars, tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.append("ES", "5m", bars.iloc[:100])
+    path = store.series_path("ES", "5m")
+    # ajout interrompu : lignes écrites (dont une partielle), index pas encore
+    with open(os.path.join(path, BARS_FILE), "ab") as f:
+        f.write(np.ones((3, 5)).tobytes() + b"\0" * 12)
+    series = OHLCVSeries(path)
+    assert len(series) == 100
+    assert_same(series.read(), bars.iloc[:100])
+
+    assert series.append(bars.iloc[50:200]) == 100
+    assert os.path.getsize(os.path.join(path, BARS_FILE)) == 200 * 5 * 8
+    assert os.path.getsize(os.path.join(path, TS_FILE)) == 200 * 8
+    assert_same(series.read(), bars.iloc[:200])
+
+def test_naive_series_round_trip(tmp_path):
+    df = load_ohlcv(os.path.join(ROOT, "BTCUSDT_1m_2025-08-01_to_2025-08-08.csv"))
+    df = df[["timestamp", "open", "high", "low", "close", "volume"]]
+    store = OHLCVStore(str(tmp_path))
+    assert store.append("BTC", "1m", df) == len(df)
+    got = store.read("BTC", "1m", "2025-08-02", "2025-08-02 00:59")
+    assert got["timestamp"].dt.tz is None
+    assert_same(got, df[(df["timestamp"] >= "2025-08-02") & (df["timestamp"] <= "2025-08-02 00:59")])
@@ -0,0 +1,66 @@
+# resampler : seaux alignés sur la séance CME, contre une référence pandas, et store incrémental.
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import resampler
+from conftest import ROOT
+from market_data import load_ohlcv
+from ohlcv_store import OHLCVStore, _epoch_ns
+
+AGG = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+
+@pytest.fixture(scope="module")
+def bars():
+    df = load_ohlcv(os.path.join(ROOT, "ES_F_1m_7jours.csv"))
+    df.columns = [c.lower() for c in df.columns]
+    return df[["timestamp", *AGG]]
+
+def reference(df, timeframe):
+    """Seaux en heure murale de Chicago : ouverture 17:00 + k * tf, tronqués à la séance suivante."""
+    tf = resampler.tf_minutes(timeframe)
+    wall = df["timestamp"].dt.tz_convert(resampler.SESSION_TZ).dt.tz_localize(None)
+    since = wall - pd.Timedelta(hours=17)
+    minutes = (since - since.dt.floor("D")) // pd.Timedelta(minutes=1)
+    key = _epoch_ns(df["timestamp"]) - (minutes % tf).to_numpy() * resampler.NS_PER_MIN
+    out = df.drop(columns="timestamp").groupby(key).agg(AGG).reset_index(names="key")
+    return out["key"].to_numpy(), out[list(AGG)].to_numpy(dtype=np.float64)
+
+def check(got, ref):
+    keys, values = ref
+    np.testing.assert_array_equal(_epoch_ns(got["timestamp"]), keys)
+    np.testing.assert_array_equal(got[list(AGG)].to_numpy(), values)
+
+@pytest.mark.parametrize("timeframe", ["5m", "15m", "1h", "4h", "7m", "1d"])
+def test_resample_matches_reference(bars, timeframe):
+    got = resampler.resample(bars, timeframe)
+    check(got, reference(bars, timeframe))
+    assert str(got["timestamp"].dt.tz) == str(bars["timestamp"].dt.tz)  # fuseau d'entrée gardé
+
+def test_resample_shuffled_input(bars):
+    check(resampler.resample(bars.sample(frac=1, random_state=1), "15m"), reference(bars, "15m"))
+
+@pytest.mark.parametrize("timeframe", ["5m", "1h", "7m"])
+def test_update_store_matches_full_resample(bars, tmp_path, timeframe):
+    store = OHLCVStore(str(tmp_path))
+    full = resampler.resample(bars, timeframe)
+    # 1m ajoutées par morceaux (coupures en plein seau), mise à jour incrémentale à chaque fois
+    for lo, hi in [(0, 1000), (1000, 1003), (1003, 4321), (4321, len(bars))]:
+        store.append("ES", "1m", bars.iloc[lo:hi])
+        resampler.update_store(store, "ES", timeframe)
+        got = resampler.read_store(store, "ES", timeframe)
+        check(got, reference(bars.iloc[:hi], timeframe))
+    # seaux clos stockés = tous sauf le dernier, recalculé à la lecture
+    check(store.read("ES", timeframe), (_epoch_ns(full["timestamp"])[:-1],
+                                        full[list(AGG)].to_numpy()[:-1]))
+    assert resampler.update_store(store, "ES", timeframe) == 0
+
+def test_read_store_range(bars, tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.append("ES", "1m", bars)
+    full = resampler.resample(bars, "1h")
+    start, end = full["timestamp"].iloc[10], full["timestamp"].iloc[-1]
+    got = resampler.read_store(store, "ES", "1h", start, end)
+    check(got, (_epoch_ns(full["timestamp"])[10:], full[list(AGG)].to_numpy()[10:]))
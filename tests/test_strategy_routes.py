@@ -0,0 +1,49 @@
+# POST /bot/strategy/batch : lignes ou colonnes, mêmes décisions que /bot/strategy, 422 si colonnes inégales.
+import numpy as np
+from fastapi.testclient import TestClient
+
+from main import app
+from services.strategy_service import FIELDS
+
+client = TestClient(app)
+
+def sample_rows(n=60, seed=3):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        row = {f: round(float(rng.normal(100, 1)), 1) for f in FIELDS if f != "rsi"}
+        row["rsi"] = float(rng.choice([10.0, 29.9, 30.0, 50.0, 70.0, 70.1, 90.0]))
+        rows.append(row)
+    # cas BUY / SELL explicites
+    rows.append({"price": 101, "resistance": 105, "support": 95, "short_ma": 100, "long_ma": 99, "rsi": 20})
+    rows.append({"price": 98, "resistance": 105, "support": 95, "short_ma": 99, "long_ma": 100, "rsi": 80})
+    return rows
+
+def single(rows):
+    return [client.post("/bot/strategy", json=row).json()["decision"] for row in rows]
+
+def test_batch_rows_and_columns_match_single_calls():
+    rows = sample_rows()
+    expected = single(rows)
+    assert {"BUY", "SELL", "HOLD"} <= set(expected)
+
+    by_rows = client.post("/bot/strategy/batch", json=rows)
+    columns = {f: [row[f] for row in rows] for f in FIELDS}
+    by_columns = client.post("/bot/strategy/batch", json=columns)
+    assert by_rows.status_code == by_columns.status_code == 200
+    assert by_rows.json()["decisions"] == by_columns.json()["decisions"] == expected
+
+def test_batch_empty():
+    assert client.post("/bot/strategy/batch", json=[]).json() == {"decisions": []}
+
+def test_batch_ragged_columns_rejected():
+    columns = {f: [100.0, 101.0] for f in FIELDS}
+    columns["rsi"] = [50.0]
+    resp = client.post("/bot/strategy/batch", json=columns)
+    assert resp.status_code == 422
+    assert "longueurs" in resp.json()["detail"]
+
+def test_batch_missing_field_rejected():
+    row = sample_rows(1)[0]
+    del row["rsi"]
+    assert client.post("/bot/strategy/batch", json=[row]).status_code == 422
@@ -0,0 +1,50 @@
+# evaluate_strategy_batch : mêmes décisions que evaluate_strategy, cas limites compris (codes int8).
+import itertools
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from services.strategy_service import (BUY, FIELDS, HOLD, SELL, decision_names,
+                                       evaluate_strategy, evaluate_strategy_batch)
+
+CODES = {"BUY": BUY, "SELL": SELL, "HOLD": HOLD}
+SPECIALS = [np.nan, np.inf, -np.inf, -0.0, 0.0]
+
+def scalar_codes(cols):
+    rows = zip(*(np.asarray(cols[f], dtype=np.float64).tolist() for f in FIELDS))
+    return np.array([CODES[evaluate_strategy(dict(zip(FIELDS, row)))] for row in rows], dtype=np.int8)
+
+def check(cols):
+    codes = evaluate_strategy_batch(cols)
+    assert codes.dtype == np.int8
+    np.testing.assert_array_equal(codes, scalar_codes(cols))
+    assert decision_names(codes) == [evaluate_strategy(dict(zip(FIELDS, row)))
+                                     for row in zip(*(np.asarray(cols[f]).tolist() for f in FIELDS))]
+    return codes
+
+def test_parity_on_threshold_grid():
+    # égalités sur chaque comparaison de la règle + valeurs spéciales
+    values = {"price": [99.0, 100.0, 101.0, np.nan], "short_ma": [99.0, 100.0, 101.0],
+              "long_ma": [99.0, 100.0, 101.0, np.inf], "rsi": [29.9, 30.0, 50.0, 70.0, 70.1, np.nan],
+              "resistance": [100.0, 102.0, -0.0], "support": [98.0, 100.0, -np.inf]}
+    grid = list(itertools.product(*(values[f] for f in FIELDS)))
+    codes = check({f: [row[i] for row in grid] for i, f in enumerate(FIELDS)})
+    assert set(codes.tolist()) == {BUY, SELL, HOLD}
+
+def test_parity_random_with_specials():
+    rng = np.random.default_rng(0)
+    n = 50_000
+    cols = {f: rng.normal(100, 2, n).round(1) for f in FIELDS if f != "rsi"}
+    cols["rsi"] = rng.choice([0.0, 29.9, 30.0, 30.1, 50.0, 69.9, 70.0, 70.1, 100.0], n)
+    for f in FIELDS:
+        mask = rng.random(n) < 0.02
+        cols[f][mask] = rng.choice(SPECIALS, mask.sum())
+    check(cols)
+
+@pytest.mark.parametrize("name", ["ES_F_1m_7jours.csv", "BTCUSDT_1m_2025-08-01_to_2025-08-08.csv"])
+def test_parity_on_replay_indicators(name):
+    from replay_feeder import compute_indicators, load_data
+    df = compute_indicators(load_data(os.path.join(ROOT, name))).rename(columns={"close": "price"})
+    check({f: df[f].to_numpy(dtype=np.float64) for f in FIELDS})  # warm-up NaN compris
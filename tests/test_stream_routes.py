@@ -0,0 +1,31 @@
+# WebSocket /bot/stream : bougies invalides rejetées sans casser l'état ni la connexion.
+import math
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+def bar(i, close=None):
+    c = 100 + (i % 7) - (i % 3)
+    return {"timestamp": f"t{i}", "high": c + 1, "low": c - 1, "close": c if close is None else close}
+
+def test_non_finite_bar_is_rejected_and_state_kept():
+    with TestClient(app).websocket_connect("/bot/stream?short=3&long=5&rsi_len=3") as ws:
+        for i in range(10):
+            ws.send_json(bar(i))
+            assert "error" not in ws.receive_json()
+        for bad in ("nan", "inf", "-inf"):
+            ws.send_json(bar(10, close=bad))
+            assert ws.receive_json()["error"].startswith("bougie invalide")
+        ws.send_json(bar(11))
+        reply = ws.receive_json()
+    assert reply["ready"] is True
+    assert all(math.isfinite(reply[k]) for k in ("short_ma", "long_ma", "rsi"))
+
+def test_invalid_json_keeps_connection():
+    with TestClient(app).websocket_connect("/bot/stream?short=2&long=3&rsi_len=2") as ws:
+        ws.send_text("pas du json")
+        assert "error" in ws.receive_json()
+        ws.send_json([bar(i) for i in range(5)])
+        replies = ws.receive_json()
+    assert len(replies) == 5 and replies[-1]["ready"] is True
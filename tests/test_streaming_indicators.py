@@ -0,0 +1,27 @@
+# Les indicateurs incrémentaux doivent coller aux versions pandas (batch) du replay.
+import os
+
+import numpy as np
+import pytest
+
+import replay_feeder
+from conftest import ROOT
+from market_data import load_ohlcv
+from streaming_indicators import StreamingIndicators
+
+FIELDS = ["short_ma", "long_ma", "rsi", "support", "resistance"]
+
+@pytest.mark.parametrize("name", ["ES_F_1m_7jours.csv", "ES_F_5m_30d.csv",
+                                  "BTCUSDT_1m_2025-08-01_to_2025-08-08.csv"])
+def test_streaming_matches_compute_indicators(name):
+    df = load_ohlcv(os.path.join(ROOT, name))
+    df.columns = [c.lower() for c in df.columns]
+    ref = replay_feeder.compute_indicators(df.copy())
+
+    ind = StreamingIndicators()
+    rows = [ind.update(h, l, c) for h, l, c in
+            zip(df["high"].tolist(), df["low"].tolist(), df["close"].tolist())]
+    for field in FIELDS:
+        got = np.array([r[field] for r in rows])
+        # mêmes algorithmes que pandas : égalité exacte
+        np.testing.assert_array_equal(got, ref[field].to_numpy(dtype=np.float64), err_msg=field)
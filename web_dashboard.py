@@ -1,46 +1,259 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, StreamingResponse
+from typing import Optional
+import asyncio
+import html as html_lib
+import json
 import os
+from urllib.parse import urlencode
+from chart_data import equity_chart, equity_files
+from decision_index import DecisionIndex
+from logger import LOG_FILE
 
 app = FastAPI()
+index = DecisionIndex()  # index SQLite de trading.log, mis à jour à chaque requête (incrémental)
+
+POLL_INTERVAL = 0.5    # période du tail de trading.log (s)
+HEARTBEAT = 15.0       # commentaire SSE pour garder les connexions ouvertes (s)
+CLIENT_QUEUE = 1000    # décisions en attente max par client (au-delà : client lent, on coupe)
+CATCHUP_PAGE = 1000    # lignes lues par requête lors du rattrapage Last-Event-ID
+
+class DecisionFeed:
+    """
+    Un seul tail de trading.log (via l'index) pour tous les navigateurs connectés :
+    chaque nouvelle décision est poussée dans la file asyncio de chaque abonné.
+    La tâche de tail ne tourne que tant qu'il y a au moins un abonné.
+    """
+
+    def __init__(self):
+        self.clients = set()
+        self.task = None
+        self.last_id = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(CLIENT_QUEUE)
+        self.clients.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._tail())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.clients.discard(queue)
+
+    async def _tail(self):
+        if self.last_id is None:
+            await asyncio.to_thread(index.sync)
+            self.last_id = index.last_id()
+        while self.clients:
+            await asyncio.to_thread(index.sync)
+            rows = await asyncio.to_thread(index.since, self.last_id)
+            for row in rows:
+                for queue in list(self.clients):
+                    try:
+                        queue.put_nowait(row)
+                    except asyncio.QueueFull:
+                        # client trop lent : fin de son flux, le navigateur se reconnectera
+                        self.clients.discard(queue)
+                        queue.get_nowait()
+                        queue.put_nowait(None)
+            if rows:
+                self.last_id = rows[-1]["id"]
+            else:
+                await asyncio.sleep(POLL_INTERVAL)
+
+feed = DecisionFeed()
+
+def sse_event(row):
+    return f"id: {row['id']}\nevent: decision\ndata: {json.dumps(row, ensure_ascii=False)}\n\n"
+
+@app.get("/events")
+async def decision_events(request: Request, decision: Optional[str] = None):
+    """Flux SSE des nouvelles décisions (EventSource). Reprise après coupure via Last-Event-ID."""
+    last_event_id = request.headers.get("last-event-id")
+
+    async def stream():
+        # abonnement dans le générateur : désabonné même si la réponse n'est jamais itérée
+        queue = feed.subscribe()
+        try:
+            # dernier id envoyé (ou vu, avec le filtre) : les lignes déjà rattrapées depuis
+            # l'index et aussi poussées dans la file ne sont pas renvoyées
+            last = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+            if last is not None:
+                # rattrapage de ce qui a été manqué pendant la coupure, par pages
+                while True:
+                    rows = await asyncio.to_thread(index.since, last, CATCHUP_PAGE)
+                    for row in rows:
+                        last = row["id"]
+                        if decision in (None, row["decision"]):
+                            yield sse_event(row)
+                    if len(rows) < CATCHUP_PAGE:
+                        break
+            while True:
+                try:
+                    row = await asyncio.wait_for(queue.get(), HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if row is None:
+                    break  # reconnexion avec Last-Event-ID -> rattrapage depuis l'index
+                if last is not None and row["id"] <= last:
+                    continue
+                last = row["id"]
+                if decision in (None, row["decision"]):
+                    yield sse_event(row)
+        finally:
+            feed.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/decisions")
+def api_decisions(limit: int = Query(50, ge=1, le=1000), decision: Optional[str] = None,
+                  before_id: Optional[int] = None, after_id: Optional[int] = None):
+    """Page de décisions (plus récentes d'abord) ; next_before_id / prev_after_id : pages voisines."""
+    index.sync()
+    items = index.page(limit, decision, before_id, after_id)
+    older = bool(items) and index.has_rows(decision, before_id=items[-1]["id"])
+    newer = bool(items) and index.has_rows(decision, after_id=items[0]["id"])
+    return {"limit": limit, "decision": decision, "total": index.count(decision), "items": items,
+            "next_before_id": items[-1]["id"] if older else None,
+            "prev_after_id": items[0]["id"] if newer else None}
+
+def _equity_file(file):
+    # uniquement les CSV d'equity du dossier courant (pas de chemin arbitraire)
+    if file not in equity_files():
+        raise HTTPException(status_code=404, detail=f"Courbe d'equity inconnue: {file}")
+    return file
+
+@app.get("/api/equity")
+def api_equity(file: str = "backtest_es_equity.csv", width: int = Query(1000, ge=3, le=10000)):
+    """Courbe d'equity réduite (LTTB) à `width` points + marqueurs de trades."""
+    return equity_chart(_equity_file(file), width)
+
+@app.get("/equity", response_class=HTMLResponse)
+def equity_page(file: str = "backtest_es_equity.csv", width: int = Query(1000, ge=100, le=4000),
+                height: int = Query(400, ge=100, le=2000)):
+    chart = equity_chart(_equity_file(file), width)
+    links = " | ".join(f'<a href="?{urlencode({"file": f, "width": width})}">{html_lib.escape(f)}</a>'
+                       for f in equity_files())
+    return f"""
+    <html>
+        <head><title>Equity - {html_lib.escape(file)}</title>
+            <style>body {{ font-family: Arial; padding: 20px; background-color: #f7f7f7; }}</style>
+        </head>
+        <body>
+            <h1>📈 {html_lib.escape(file)}</h1>
+            <p>{links}</p>
+            <p>{chart["points"]} points -> {len(chart["x"])} affichés, {len(chart["trades"])} trade(s)</p>
+            {equity_svg(chart, width, height)}
+        </body>
+    </html>
+    """
+
+def equity_svg(chart, width, height, pad=10):
+    """SVG de la courbe réduite : une polyline + un point par trade (vert LONG, rouge SHORT)."""
+    xs, ys = chart["x"], chart["y"]
+    if not xs:
+        return "<p>Courbe vide.</p>"
+    x0, x1 = xs[0], max(xs[-1], xs[0] + 1)
+    y0, y1 = min(ys), max(max(ys), min(ys) + 1e-9)
+
+    def px(t, v):
+        return (pad + (t - x0) * (width - 2 * pad) / (x1 - x0),
+                height - pad - (v - y0) * (height - 2 * pad) / (y1 - y0))
+
+    points = " ".join(f"{x:.1f},{y:.1f}" for x, y in (px(t, v) for t, v in zip(xs, ys)))
+    marks = "".join(
+        f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3" fill="{"#2a2" if tr["side"] == "LONG" else "#c22"}">'
+        f'<title>{html_lib.escape(tr["side"])} {tr["pnl"]:.2f}</title></circle>'
+        for tr in chart["trades"] for x, y in [px(tr["t"], tr["y"])]
+    )
+    return (f'<svg width="{width}" height="{height}" style="background:#fff">'
+            f'<polyline fill="none" stroke="#336" stroke-width="1" points="{points}"/>{marks}</svg>')
 
 @app.get("/", response_class=HTMLResponse)
-def read_dashboard():
-    if not os.path.exists("trading.log"):
+def read_dashboard(page: int = Query(1, ge=1), limit: int = Query(50, ge=1, le=1000),
+                   decision: Optional[str] = None, before_id: Optional[int] = None,
+                   after_id: Optional[int] = None):
+    if not os.path.exists(LOG_FILE) and index.count() == 0:
         return "<h2>Aucune activité de trading pour l'instant.</h2>"
 
-    with open("trading.log", "r") as file:
-        lines = file.readlines()
+    index.sync()
+    total = index.count(decision)
+    pages = max(1, -(-total // limit))
+    rows = index.page(limit, decision, before_id, after_id)
+    # page : affichage seulement ; la navigation se fait par id (keyset)
+    if not rows or (before_id is None and after_id is None):
+        first = True
+    else:
+        first = not index.has_rows(decision, after_id=rows[0]["id"])
+    if first:
+        page = 1
 
-    html = """
+    def link(label, **params):
+        query = {"page": page, "limit": limit, "decision": decision, **params}
+        query = {k: v for k, v in query.items() if v is not None}
+        return f'<a href="?{urlencode(query)}">{label}</a>'
+
+    filters = " | ".join([link("Toutes", decision=None, page=None)] +
+                         [link(d, decision=d, page=None) for d in ("BUY", "SELL", "HOLD")])
+    nav = []
+    if rows and not first:
+        nav.append(link("← Plus récentes", page=max(page - 1, 1), after_id=rows[0]["id"]))
+    if rows and index.has_rows(decision, before_id=rows[-1]["id"]):
+        nav.append(link("Plus anciennes →", page=page + 1, before_id=rows[-1]["id"]))
+
+    html = f"""
     <html>
         <head>
             <title>Trading Bot Dashboard</title>
             <style>
-                body { font-family: Arial; padding: 20px; background-color: #f7f7f7; }
-                h1 { color: #333; }
-                table { border-collapse: collapse; width: 100%; }
-                th, td { padding: 12px; border-bottom: 1px solid #ddd; text-align: left; }
-                tr:hover { background-color: #f1f1f1; }
-                code { background-color: #eee; padding: 2px 4px; border-radius: 4px; }
+                body {{ font-family: Arial; padding: 20px; background-color: #f7f7f7; }}
+                h1 {{ color: #333; }}
+                table {{ border-collapse: collapse; width: 100%; }}
+                th, td {{ padding: 12px; border-bottom: 1px solid #ddd; text-align: left; }}
+                tr:hover {{ background-color: #f1f1f1; }}
+                code {{ background-color: #eee; padding: 2px 4px; border-radius: 4px; }}
             </style>
         </head>
         <body>
             <h1>🧾 Historique des décisions de trading</h1>
-            <table>
+            <p>{filters} — {total} décision(s), page {page}/{pages}</p>
+            <table id="decisions">
                 <tr><th>Timestamp</th><th>Entrée</th><th>Décision</th></tr>
     """
 
-    for line in reversed(lines):
-        if "INPUT=" in line and "-> DECISION=" in line:
-            parts = line.strip().split("] ")
-            timestamp = parts[0].replace("[", "")
-            input_part, decision_part = parts[1].split(" -> DECISION=")
-            html += f"<tr><td>{timestamp}</td><td><code>{input_part}</code></td><td><strong>{decision_part}</strong></td></tr>"
+    for row in rows:
+        html += (f"<tr><td>{html_lib.escape(row['ts'])}</td><td><code>{html_lib.escape(row['input'])}</code></td>"
+                 f"<td><strong>{html_lib.escape(row['decision'])}</strong></td></tr>")
 
-    html += """
+    html += f"""
             </table>
+            <p>{" | ".join(nav)}</p>
+            {live_script(decision) if first else ""}
         </body>
     </html>
     """
     return html
+
+def live_script(decision):
+    """Page 1 : les nouvelles décisions (SSE) sont insérées en tête du tableau."""
+    query = f"?{urlencode({'decision': decision})}" if decision else ""
+    return f"""
+            <script>
+                const source = new EventSource("/events{query}");
+                source.addEventListener("decision", (e) => {{
+                    const d = JSON.parse(e.data);
+                    const row = document.createElement("tr");
+                    for (const [text, tag] of [[d.ts, null], [d.input, "code"], [d.decision, "strong"]]) {{
+                        const td = document.createElement("td");
+                        const el = tag ? document.createElement(tag) : td;
+                        el.textContent = text;
+                        if (tag) td.appendChild(el);
+                        row.appendChild(td);
+                    }}
+                    const table = document.getElementById("decisions");
+                    const first = table.rows[1];
+                    first ? first.parentNode.insertBefore(row, first) : table.appendChild(row);
+                }});
+            </script>"""